@@ -84,7 +84,11 @@
 / Locale and Namespace Configurations
 /---------------------------------------------------------------------------*/
 
+#ifdef CONFIG_FATFS_CODE_PAGE  /* Set from Kconfig through autoconf.h */
+#define FF_CODE_PAGE    CONFIG_FATFS_CODE_PAGE
+#else
 #define FF_CODE_PAGE    936
+#endif
 /* This option specifies the OEM code page to be used on the target system.
 /  Incorrect code page setting can cause a file open failure.
 /
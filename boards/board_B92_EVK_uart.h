@@ -1,7 +1,7 @@
 #ifndef BOARD_B92_EVK_UART_H
 #define BOARD_B92_EVK_UART_H
 
-#include "hal/hal_uart.h"
+#include "drivers/hal_uart.h"
 
 // UART引脚定义
 #define BOARD_UART_TX_PIN    4
@@ -1,4 +1,4 @@
-#include "hal/hal_uart.h"
+#include "drivers/hal_uart.h"
 #include "uart.h"
 #include "gpio.h"
 #include "clock.h"
@@ -37,11 +37,14 @@ uint32_t hal_uart_send(hal_uart_dev_t* dev, const uint8_t* data, uint32_t len) {
 
 uint32_t hal_uart_recv(hal_uart_dev_t* dev, uint8_t* data, uint32_t len, uint32_t timeout) {
     uint32_t recv_len = 0;
-    while (recv_len < len && timeout--) {
+    while (recv_len < len) {
         if (uart_rx_data_ready()) {
             data[recv_len++] = reg_uart_data;
+        } else if (timeout--) {
+            delay_us(1000); // 只在无数据时等待，timeout为空闲毫秒数
+        } else {
+            break;
         }
-        delay_us(1000);
     }
     return recv_len;
 }
@@ -1,18 +1,479 @@
 # Auto-generated Kconfig to CMake variable mapping
 
-# Chip selection with direct chip names
-if(CHIP_TC321X)
-    set(CHIP_NAME "TC321X")
-elseif(CHIP_TL321X)
-    set(CHIP_NAME "TL321X")
-elseif(CHIP_TL322X)
-    set(CHIP_NAME "TL322X")
-elseif(CHIP_TL721X)
-    set(CHIP_NAME "TL721X")
-elseif(CHIP_B91)
-    set(CHIP_NAME "B91")
-elseif(CHIP_B92)
-    set(CHIP_NAME "B92")
+# Load symbols from the Kconfig output file
+if(NOT KCONFIG_CONFIG)
+    set(KCONFIG_CONFIG "${CMAKE_SOURCE_DIR}/.config")
+endif()
+if(EXISTS "${KCONFIG_CONFIG}")
+    file(STRINGS "${KCONFIG_CONFIG}" KCONFIG_LINES REGEX "^(# )?CONFIG_[A-Za-z0-9_]+")
+    foreach(KCONFIG_LINE ${KCONFIG_LINES})
+        if(KCONFIG_LINE MATCHES "^# CONFIG_([A-Za-z0-9_]+) is not set")
+            set(${CMAKE_MATCH_1} OFF)
+        elseif(KCONFIG_LINE MATCHES "^CONFIG_([A-Za-z0-9_]+)=(.*)$")
+            set(KCONFIG_SYMBOL ${CMAKE_MATCH_1})
+            set(KCONFIG_VALUE ${CMAKE_MATCH_2})
+            if(KCONFIG_VALUE STREQUAL "y")
+                set(${KCONFIG_SYMBOL} ON)
+            else()
+                string(REGEX REPLACE "^\"(.*)\"$" "\\1" KCONFIG_VALUE "${KCONFIG_VALUE}")
+                set(${KCONFIG_SYMBOL} "${KCONFIG_VALUE}")
+            endif()
+        endif()
+    endforeach()
+    # Re-run configure whenever the selection changes
+    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS "${KCONFIG_CONFIG}")
+endif()
+
+# Per-symbol autoconf header and dependency stamps
+if(EXISTS "${KCONFIG_CONFIG}")
+    find_package(Python3 COMPONENTS Interpreter)
+endif()
+if(EXISTS "${KCONFIG_CONFIG}" AND Python3_Interpreter_FOUND)
+    set(AUTOCONF_DIR "${CMAKE_BINARY_DIR}/include")
+    set(AUTOCONF_TOOL ${Python3_EXECUTABLE} ${CMAKE_SOURCE_DIR}/gen_autoconf.py
+        --root ${CMAKE_SOURCE_DIR} --config ${KCONFIG_CONFIG} --output ${AUTOCONF_DIR})
+    execute_process(COMMAND ${AUTOCONF_TOOL} WORKING_DIRECTORY ${CMAKE_SOURCE_DIR})
+    # CURRENT_BUILD_* stamps come from build_config.h, refresh them when it changes
+    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS
+        "${CMAKE_SOURCE_DIR}/demo/vendor/common/common/build_config.h")
+    add_compile_options(-include ${AUTOCONF_DIR}/generated/autoconf.h)
+    # The launcher runs once per compiled unit, fixdep.py only imports the standard library
+    set(AUTOCONF_LAUNCHER ${Python3_EXECUTABLE} -S ${CMAKE_SOURCE_DIR}/fixdep.py --output ${AUTOCONF_DIR} --launch)
+    set(CMAKE_C_COMPILER_LAUNCHER ${AUTOCONF_LAUNCHER})
+    set(CMAKE_ASM_COMPILER_LAUNCHER ${AUTOCONF_LAUNCHER})
+endif()
+
+# FatFs unicode tables trimmed to the selected code page
+if(FATFS_CODE_PAGE AND Python3_Interpreter_FOUND)
+    execute_process(COMMAND ${Python3_EXECUTABLE} ${CMAKE_SOURCE_DIR}/gen_ffunicode.py
+        --root ${CMAKE_SOURCE_DIR} --code-page ${FATFS_CODE_PAGE} --output ${CMAKE_BINARY_DIR}/fatfs)
+    set(FATFS_UNICODE_SOURCE "${CMAKE_BINARY_DIR}/fatfs/ffunicode.c")
+    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS
+        "${CMAKE_SOURCE_DIR}/3rd-party/fatfs/ffunicode.c")
+else()
+    set(FATFS_UNICODE_SOURCE "${CMAKE_SOURCE_DIR}/3rd-party/fatfs/ffunicode.c")
+endif()
+
+# Chip selection with direct chip names, CHIP_DIR is the chip source directory under chip/
+if(CHIP_TC_TC321X)
+    set(CHIP_NAME "TC_TC321X")
+    set(CHIP_DIR "TC321X")
+elseif(CHIP_TL_B91)
+    set(CHIP_NAME "TL_B91")
+    set(CHIP_DIR "B91")
+elseif(CHIP_TL_B92)
+    set(CHIP_NAME "TL_B92")
+    set(CHIP_DIR "B92")
+elseif(CHIP_TL_TL321X)
+    set(CHIP_NAME "TL_TL321X")
+    set(CHIP_DIR "TL321X")
+elseif(CHIP_TL_TL322X)
+    set(CHIP_NAME "TL_TL322X")
+    set(CHIP_DIR "tl322x")
+elseif(CHIP_TL_TL721X)
+    set(CHIP_NAME "TL_TL721X")
+    set(CHIP_DIR "TL721X")
+elseif(CHIP_TL_TL751X)
+    set(CHIP_NAME "TL_TL751X")
+    set(CHIP_DIR "tl751x")
+endif()
+
+# Demos provided by each chip
+set(CHIP_DEMOS_TC_TC321X
+    AES_Demo
+    ALG_REG_Demo
+    AUDIO_Demo
+    BQB_EMI_Demo
+    Coremark_Demo
+    Debug_Demo
+    Dhrystone_Demo
+    DUT_Demo
+    FLASH_Demo
+    GPIO_Demo
+    I2C_Demo
+    IR_LEARN_Demo
+    Keyscan_Demo
+    PM_Demo
+    PWM_Demo
+    QDEC_Demo
+    RF_Demo
+    SD_ADC_Demo
+    SPI_Demo
+    Timer_Demo
+    TRNG_Demo
+    UART_Demo
+)
+set(CHIP_DEMOS_TL_B91
+    ADC_Demo
+    AES_Demo
+    ALG_REG_Demo
+    AUDIO_Demo
+    COREMARK
+    Debug_Demo
+    DHRYSTONE
+    DUT_Demo
+    EMI_BQB_Demo
+    Flash_Demo
+    Freertos_Demo
+    GPIO_Demo
+    I2C_Demo
+    LPC_Demo
+    MDEC_Demo
+    PKE_Demo
+    PM_Demo
+    PWM_Demo
+    RF_Demo
+    s7816_Demo
+    SPI_Demo
+    STIMER_Demo
+    TIMER_Demo
+    TRAP_Demo
+    TRNG_Demo
+    UART_Demo
+    USB_Demo
+)
+set(CHIP_DEMOS_TL_B92
+    ADC_Demo
+    AES_Demo
+    ALG_REG_Demo
+    AUDIO_Demo
+    Debug_Demo
+    Display_Demo
+    DUT_Demo
+    EMI_BQB_Demo
+    Flash_Demo
+    GPIO_Demo
+    I2C_Demo
+    LPC_Demo
+    PKE_Demo
+    PM_Demo
+    PWM_Demo
+    QDEC_Demo
+    RF_Demo
+    s7816_Demo
+    Secure_Boot_Demo
+    SPI_Demo
+    STIMER_Demo
+    TIMER_Demo
+    TRAP_Demo
+    TRNG_Demo
+    UART_Demo
+    USB_Demo
+)
+set(CHIP_DEMOS_TL_TL321X
+    ADC_Demo
+    ALG_REG_Demo
+    AUDIO_Demo
+    Codec_Demo
+    COREMARK
+    Debug_Demo
+    DHRYSTONE
+    EMI_BQB_Demo
+    Flash_Demo
+    GPIO_Demo
+    HASH_Demo
+    I2C_Demo
+    IR_LEARN_Demo
+    LPC_Demo
+    PKE_Demo
+    PM_Demo
+    PWM_Demo
+    QDEC_Demo
+    RF_Demo
+    Secure_Boot_Demo
+    Sensor_Lcd_Demo
+    SKE_Demo
+    SPI_Demo
+    STIMER_Demo
+    TIMER_Demo
+    TRAP_Demo
+    TRNG_Demo
+    UART_Demo
+    USB_Demo
+)
+set(CHIP_DEMOS_TL_TL322X
+    ALG_REG_Demo
+    CAN_Demo
+    D25F_COREMARK
+    D25F_DHRYSTONE
+    D25F_RF_Demo
+    Debug_Demo
+    EMI_BQB_Demo
+    Flash_Demo
+    GPIO_Demo
+    HASH_Demo
+    IR_LEARN_Demo
+    MULTI_CORE_Demo
+    N22_COREMARK
+    N22_DHRYSTONE
+    N22_RF_Demo
+    N22_STimer_Demo
+    N22_Test_Demo_Booloader_By_DMA
+    N22_Test_Demo_Booloader_By_N22_MCU
+    N22_Timer_BB_Demo
+    N22_TRAP_Demo
+    PKE_Demo
+    SD_ADC_Demo
+    SKE_Demo
+    SPI_Demo
+    STIMER_Demo
+    TIMER_Demo
+    TRAP_Demo
+    TRNG_Demo
+    UART_Demo
+)
+set(CHIP_DEMOS_TL_TL721X
+    ADC_Demo
+    ALG_REG_Demo
+    AUDIO_Demo
+    Camera_Demo
+    CHACHA20_POLY1305_Demo
+    Codec_Demo
+    COREMARK
+    Debug_Demo
+    DHRYSTONE
+    EMI_BQB_Demo
+    Flash_Demo
+    GPIO_Demo
+    HASH_Demo
+    I2C_Demo
+    IR_LEARN_Demo
+    LPC_Demo
+    PKE_Demo
+    PM_Demo
+    PWM_Demo
+    QDEC_Demo
+    RF_Demo
+    Secure_Boot_Demo
+    Sensor_Lcd_Demo
+    SKE_Demo
+    SPI_Demo
+    STIMER_Demo
+    TIMER_Demo
+    TRAP_Demo
+    TRNG_Demo
+    UART_Demo
+    USB_Demo
+)
+set(CHIP_DEMOS_TL_TL751X
+    ADC_Demo
+    ALG_REG_Demo
+    AUDIO_Demo
+    D25F_COREMARK
+    D25F_DHRYSTONE
+    D25F_RF_Demo
+    Debug_Demo
+    Flash_Demo
+    GPIO_Demo
+    HASH_Demo
+    I2C_Demo
+    LPC_Demo
+    MULTI_CORE_Demo
+    N22_COREMARK
+    N22_DHRYSTONE
+    N22_RF_Demo
+    N22_STIMER_Demo
+    N22_Test_Demo_Booloader_By_DMA
+    N22_Test_Demo_Booloader_By_N22_MCU
+    N22_Timer_BB_Demo
+    N22_TRAP_Demo
+    PKE_Demo
+    PM_Demo
+    PWM_Demo
+    QDEC_Demo
+    SKE_Demo
+    SPI_Demo
+    STIMER_Demo
+    TIMER_Demo
+    TRAP_Demo
+    TRNG_Demo
+    UART_Demo
+    USB_Demo
+)
+
+# Demo selection
+set(SDK_SELECTED_DEMOS "")
+if(DEMO_ADC_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS ADC_Demo)
+endif()
+if(DEMO_AES_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS AES_Demo)
+endif()
+if(DEMO_ALG_REG_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS ALG_REG_Demo)
+endif()
+if(DEMO_AUDIO_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS AUDIO_Demo Audio_Demo)
+endif()
+if(DEMO_BQB_EMI_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS BQB_EMI_Demo)
+endif()
+if(DEMO_CAN_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS CAN_Demo)
+endif()
+if(DEMO_CHACHA20_POLY1305_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS CHACHA20_POLY1305_Demo)
+endif()
+if(DEMO_COREMARK)
+    list(APPEND SDK_SELECTED_DEMOS COREMARK)
+endif()
+if(DEMO_CAMERA_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Camera_Demo)
+endif()
+if(DEMO_CODEC_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Codec_Demo)
+endif()
+if(DEMO_COREMARK_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Coremark_Demo)
+endif()
+if(DEMO_D25F_COREMARK)
+    list(APPEND SDK_SELECTED_DEMOS D25F_COREMARK)
+endif()
+if(DEMO_D25F_DHRYSTONE)
+    list(APPEND SDK_SELECTED_DEMOS D25F_DHRYSTONE)
+endif()
+if(DEMO_D25F_RF_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS D25F_RF_Demo)
+endif()
+if(DEMO_DHRYSTONE)
+    list(APPEND SDK_SELECTED_DEMOS DHRYSTONE)
+endif()
+if(DEMO_DUT_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS DUT_Demo)
+endif()
+if(DEMO_DEBUG_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Debug_Demo)
+endif()
+if(DEMO_DHRYSTONE_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Dhrystone_Demo)
+endif()
+if(DEMO_DISPLAY_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Display_Demo)
+endif()
+if(DEMO_EMI_BQB_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS EMI_BQB_Demo)
+endif()
+if(DEMO_FLASH_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS FLASH_Demo Flash_Demo)
+endif()
+if(DEMO_FREERTOS_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Freertos_Demo)
+endif()
+if(DEMO_GPIO_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS GPIO_Demo)
+endif()
+if(DEMO_HASH_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS HASH_Demo)
+endif()
+if(DEMO_I2C_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS I2C_Demo)
+endif()
+if(DEMO_IR_LEARN_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS IR_LEARN_Demo)
+endif()
+if(DEMO_KEYSCAN_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Keyscan_Demo)
+endif()
+if(DEMO_LPC_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS LPC_Demo)
+endif()
+if(DEMO_MDEC_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS MDEC_Demo)
+endif()
+if(DEMO_MULTI_CORE_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS MULTI_CORE_Demo)
+endif()
+if(DEMO_N22_COREMARK)
+    list(APPEND SDK_SELECTED_DEMOS N22_COREMARK)
+endif()
+if(DEMO_N22_DHRYSTONE)
+    list(APPEND SDK_SELECTED_DEMOS N22_DHRYSTONE)
+endif()
+if(DEMO_N22_RF_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS N22_RF_Demo)
+endif()
+if(DEMO_N22_STIMER_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS N22_STIMER_Demo N22_STimer_Demo)
+endif()
+if(DEMO_N22_TRAP_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS N22_TRAP_Demo)
+endif()
+if(DEMO_N22_TEST_DEMO_BOOLOADER_BY_DMA)
+    list(APPEND SDK_SELECTED_DEMOS N22_Test_Demo_Booloader_By_DMA)
+endif()
+if(DEMO_N22_TEST_DEMO_BOOLOADER_BY_N22_MCU)
+    list(APPEND SDK_SELECTED_DEMOS N22_Test_Demo_Booloader_By_N22_MCU)
+endif()
+if(DEMO_N22_TIMER_BB_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS N22_Timer_BB_Demo)
+endif()
+if(DEMO_OTP_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS OTP_Demo)
+endif()
+if(DEMO_PKE_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS PKE_Demo)
+endif()
+if(DEMO_PM_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS PM_Demo)
+endif()
+if(DEMO_PWM_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS PWM_Demo)
+endif()
+if(DEMO_QDEC_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS QDEC_Demo)
+endif()
+if(DEMO_RF_AOA_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS RF_AOA_Demo)
+endif()
+if(DEMO_RF_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS RF_Demo)
+endif()
+if(DEMO_SD_ADC_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS SD_ADC_Demo)
+endif()
+if(DEMO_SKE_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS SKE_Demo)
+endif()
+if(DEMO_SPI_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS SPI_Demo)
+endif()
+if(DEMO_STIMER_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS STIMER_Demo)
+endif()
+if(DEMO_SECURE_BOOT_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Secure_Boot_Demo)
+endif()
+if(DEMO_SENSOR_LCD_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS Sensor_Lcd_Demo)
+endif()
+if(DEMO_TIMER_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS TIMER_Demo Timer_Demo)
+endif()
+if(DEMO_TRAP_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS TRAP_Demo)
+endif()
+if(DEMO_TRNG_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS TRNG_Demo)
+endif()
+if(DEMO_UART_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS UART_Demo)
+endif()
+if(DEMO_USB_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS USB_Demo)
+endif()
+if(DEMO_S7816_DEMO)
+    list(APPEND SDK_SELECTED_DEMOS s7816_Demo)
+endif()
+
+# Drop selected demos that the selected chip does not provide
+if(CHIP_NAME)
+    set(SDK_CHIP_DEMOS "")
+    foreach(DEMO ${SDK_SELECTED_DEMOS})
+        if(DEMO IN_LIST CHIP_DEMOS_${CHIP_NAME})
+            list(APPEND SDK_CHIP_DEMOS ${DEMO})
+        endif()
+    endforeach()
+    set(SDK_SELECTED_DEMOS ${SDK_CHIP_DEMOS})
 endif()
 
 # Optimization level
@@ -21,25 +21,29 @@ else()
     add_compile_options(-O2 -g)
 endif()
 
-# Include chip-specific toolchain configuration
+# Cross compiling for a bare-metal target, the compiler checks cannot link a hosted executable
+set(CMAKE_SYSTEM_NAME Generic)
+set(CMAKE_TRY_COMPILE_TARGET_TYPE STATIC_LIBRARY)
+
+# Include chip-specific toolchain configuration, before project() probes the compiler
 if(CHIP_TC_TC321X)
-    include(toolchain_tc_tc321x.cmake)
+    include(${CMAKE_CURRENT_LIST_DIR}/toolchain_tc_tc321x.cmake)
 endif()
 if(CHIP_TL_B91)
-    include(toolchain_tl_b91.cmake)
+    include(${CMAKE_CURRENT_LIST_DIR}/toolchain_tl_b91.cmake)
 endif()
 if(CHIP_TL_B92)
-    include(toolchain_tl_b92.cmake)
+    include(${CMAKE_CURRENT_LIST_DIR}/toolchain_tl_b92.cmake)
 endif()
 if(CHIP_TL_TL321X)
-    include(toolchain_tl_tl321x.cmake)
+    include(${CMAKE_CURRENT_LIST_DIR}/toolchain_tl_tl321x.cmake)
 endif()
 if(CHIP_TL_TL322X)
-    include(toolchain_tl_tl322x.cmake)
+    include(${CMAKE_CURRENT_LIST_DIR}/toolchain_tl_tl322x.cmake)
 endif()
 if(CHIP_TL_TL721X)
-    include(toolchain_tl_tl721x.cmake)
+    include(${CMAKE_CURRENT_LIST_DIR}/toolchain_tl_tl721x.cmake)
 endif()
 if(CHIP_TL_TL751X)
-    include(toolchain_tl_tl751x.cmake)
+    include(${CMAKE_CURRENT_LIST_DIR}/toolchain_tl_tl751x.cmake)
 endif()
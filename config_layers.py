@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import argparse
+from collections import Counter
+from pathlib import Path
+
+from instrumentation import log, span, add_arguments, configure_from_args
+
+# Layered configs name their parent layer here, relative to the file itself
+EXTENDS_KEY = "extends"
+DEFAULTS_KEY = "target_defaults"
+VARIABLES_KEY = "variables"
+# Delta suffixes on a key: append items, remove items, replace items in place ({old: new})
+APPEND, REMOVE, SUBSTITUTE = "+", "-", "~"
+# @TARGET@ is the target name, @NAME@ the config name, the rest come from "variables"
+VARIABLE_PATTERN = re.compile(r'@([A-Z][A-Z0-9_]*)@')
+
+
+class ConfigLoader:
+    def __init__(self):
+        """Initialize the loader; resolved configs are memoized until a file in their layer chain changes"""
+        # path -> (stamps of the layer chain, resolved config)
+        self.memo = {}
+        # path -> (stamp, raw json), so a family base shared by several chips is read once
+        self.raw = {}
+
+    @staticmethod
+    def _stamp(path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read(self, path):
+        """Return the raw JSON of a single layer file"""
+        stamp = self._stamp(path)
+        cached = self.raw.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        with span("parse", path=path), open(path, 'r') as f:
+            data = json.load(f)
+        self.raw[path] = (stamp, data)
+        return data
+
+    def chain(self, json_path):
+        """Return the layer files of a config, family base first and the config itself last"""
+        files = []
+        path = os.path.abspath(json_path)
+        while path:
+            if path in files:
+                raise ValueError(f"{json_path}: layer cycle through {path}")
+            files.insert(0, path)
+            parent = self._read(path).get(EXTENDS_KEY)
+            path = os.path.normpath(os.path.join(os.path.dirname(path), parent)) if parent else None
+        return files
+
+    def load(self, json_path):
+        """Return the flat config of a JSON file, resolving layers; flat files are returned as they are"""
+        path = os.path.abspath(json_path)
+        cached = self.memo.get(path)
+        if cached and all(self._stamp(p) == stamp for p, stamp in cached[0]):
+            return cached[1]
+
+        files = self.chain(path)
+        layers = [self._read(p) for p in files]
+        if len(layers) == 1 and DEFAULTS_KEY not in layers[0] and VARIABLES_KEY not in layers[0]:
+            resolved = layers[0]
+        else:
+            with span("resolve_layers", path=path):
+                resolved = self.resolve(layers)
+        self.memo[path] = ([(p, self._stamp(p)) for p in files], resolved)
+        return resolved
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def apply(base, delta):
+        """Apply a delta to a dict: plain keys replace, "key+" appends, "key-" removes, "key~" substitutes"""
+        result = dict(base)
+        for key, value in delta.items():
+            name, op = (key[:-1], key[-1]) if key[-1:] in (APPEND, REMOVE, SUBSTITUTE) else (key, None)
+            current = result.get(name, [])
+            if op == APPEND:
+                result[name] = list(current) + list(value)
+            elif op == REMOVE:
+                result[name] = [item for item in current if item not in value]
+            elif op == SUBSTITUTE:
+                result[name] = [value.get(item, item) for item in current]
+            elif isinstance(value, dict) and isinstance(current, dict) and name != "targets":
+                result[name] = ConfigLoader.apply(current, value)
+            else:
+                result[name] = value
+        return result
+
+    @staticmethod
+    def substitute(value, variables):
+        """Expand the known @VARIABLE@ references in strings, leaving unknown ones untouched"""
+        if isinstance(value, str):
+            return VARIABLE_PATTERN.sub(lambda m: variables.get(m.group(1), m.group(0)), value)
+        if isinstance(value, list):
+            return [ConfigLoader.substitute(item, variables) for item in value]
+        if isinstance(value, dict):
+            return {key: ConfigLoader.substitute(item, variables) for key, item in value.items()}
+        return value
+
+    def resolve(self, layers):
+        """Merge the layers into the flat format: each target is the merged defaults plus its own delta"""
+        merged = {}
+        for layer in layers:
+            layer = {k: v for k, v in layer.items() if k != EXTENDS_KEY}
+            # Targets are keyed by name across layers, so a chip can amend a target its family declares;
+            # the deltas are kept in layer order and applied over the fully merged defaults below
+            targets = merged.get("targets", {})
+            for target in layer.pop("targets", []):
+                targets.setdefault(target["name"], []).append(target)
+            for name in layer.pop("targets" + REMOVE, []):
+                targets.pop(name, None)
+            merged = self.apply(merged, layer)
+            merged["targets"] = targets
+
+        defaults = merged.pop(DEFAULTS_KEY, {})
+        variables = dict(merged.pop(VARIABLES_KEY, {}))
+        variables.setdefault("NAME", merged.get("name", ""))
+        targets = []
+        for name, deltas in merged.get("targets", {}).items():
+            flat = defaults
+            for delta in deltas:
+                flat = self.apply(flat, delta)
+            flat = self.substitute(flat, dict(variables, TARGET=name))
+            targets.append({"name": flat.pop("name"), **flat})
+        merged["targets"] = targets
+        return self.substitute(merged, variables)
+
+    # ------------------------------------------------------------------
+    # Splitting flat configs into layers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def templatize(value, variables):
+        """Replace occurrences of the variable values by @VARIABLE@ references, longest value first"""
+        if isinstance(value, str):
+            for name, text in sorted(variables.items(), key=lambda item: -len(item[1])):
+                if text:
+                    value = value.replace(text, f"@{name}@")
+            return value
+        if isinstance(value, list):
+            return [ConfigLoader.templatize(item, variables) for item in value]
+        if isinstance(value, dict):
+            return {key: ConfigLoader.templatize(item, variables) for key, item in value.items()}
+        return value
+
+    @staticmethod
+    def _size(value):
+        return len(json.dumps(value))
+
+    def delta(self, base, actual):
+        """Return the smallest delta turning the base dict into actual, checked by applying it"""
+        delta = {}
+        for key, value in actual.items():
+            if key in base and base[key] == value:
+                continue
+            current = base.get(key)
+            candidates = [{key: value}]
+            if isinstance(current, list) and isinstance(value, list):
+                kept = [item for item in current if item in value]
+                removed = [item for item in current if item not in value]
+                added = value[len(kept):]
+                if value[:len(kept)] == kept:
+                    ops = {}
+                    if removed:
+                        ops[key + REMOVE] = removed
+                    if added:
+                        ops[key + APPEND] = added
+                    candidates.append(ops)
+                if len(current) == len(value) and len(set(current)) == len(current):
+                    pairs = {old: new for old, new in zip(current, value) if old != new}
+                    candidates.append({key + SUBSTITUTE: pairs})
+            for ops in sorted(candidates, key=self._size):
+                if self.apply({key: current} if key in base else {}, ops).get(key) == value:
+                    delta.update(ops)
+                    break
+        for key in base:
+            if key not in actual:
+                raise ValueError(f"cannot express the removal of {key} as a delta")
+        return delta
+
+    def _common_defaults(self, targets):
+        """Return the per-key most common value over the templated targets, the base every target deltas from"""
+        defaults = {}
+        for key in targets[0]:
+            if key == "name":
+                continue
+            counts = Counter(json.dumps(t[key]) for t in targets if key in t)
+            defaults[key] = json.loads(counts.most_common(1)[0][0])
+        return defaults
+
+    def split(self, family_path, json_paths, variable_name="CHIP"):
+        """Rewrite flat configs of one chip family as a family base layer plus per-chip delta layers"""
+        family_path = os.path.abspath(family_path)
+        flats, chip_targets = {}, {}
+        for json_path in json_paths:
+            path = os.path.abspath(json_path)
+            flat = self.load(path)
+            chip = chip_name(path).split("_", 1)[-1]
+            # The SDK spells some chip paths in lower case (chip/tl322x), so both spellings are templated
+            variables = {variable_name: chip, variable_name + "_LOWER": chip.lower(), "NAME": flat.get("name", "")}
+            chip_targets[path] = [{"name": t["name"], **self.templatize({k: v for k, v in t.items() if k != "name"},
+                                                                     dict(variables, TARGET=t["name"]))}
+                                  for t in flat["targets"]]
+            flats[path] = (flat, variables)
+
+        family_defaults = self._common_defaults([t for targets in chip_targets.values() for t in targets])
+        meta = [{k: v for k, v in flat.items() if k != "targets"} for flat, _ in flats.values()]
+        family = {key: value for key, value in meta[0].items()
+                  if key != "name" and all(m.get(key) == value for m in meta)}
+        family[DEFAULTS_KEY] = family_defaults
+
+        layers = {}
+        for path, (flat, variables) in flats.items():
+            chip_defaults = self._common_defaults(chip_targets[path])
+            layer = {EXTENDS_KEY: os.path.relpath(family_path, os.path.dirname(path)).replace(os.sep, "/")}
+            layer.update({k: v for k, v in flat.items() if k != "targets" and k not in family})
+            layer[VARIABLES_KEY] = {k: v for k, v in variables.items() if k != "NAME"}
+            defaults_delta = self.delta(family_defaults, chip_defaults)
+            if defaults_delta:
+                layer[DEFAULTS_KEY] = defaults_delta
+            layer["targets"] = [{"name": t["name"], **self.delta(chip_defaults, t)} for t in chip_targets[path]]
+            layers[path] = layer
+
+        # Only write when every layered file resolves back to exactly the flat config it replaces
+        for path, (flat, _) in flats.items():
+            if self.resolve([family, layers[path]]) != flat:
+                raise ValueError(f"{path}: layered form does not resolve back to the flat config")
+
+        for path, data in [(family_path, family)] + list(layers.items()):
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.write("\n")
+            log(f"Generated config layer: {path}", event="generated", path=path)
+        self.memo.clear()
+        self.raw.clear()
+
+
+# Shared by every generator in the process, so a config is resolved once per run
+_loader = ConfigLoader()
+
+
+def load_config(json_path):
+    """Return the flat config of a cmake_configs JSON file through the shared memoized loader"""
+    return _loader.load(json_path)
+
+
+def config_files(json_path):
+    """Return the layer files a config is built from, family base first"""
+    return _loader.chain(json_path)
+
+
+def chip_name(json_path):
+    """Return the chip a cmake_configs JSON file configures (TL_PLATFORM_SDK_B92_cmake.json -> TL_B92)"""
+    json_name = os.path.splitext(os.path.basename(json_path))[0]
+    return json_name.replace("PLATFORM_SDK_", "").replace("_cmake", "")
+
+
+def chip_source_dir(json_data, chip):
+    """Return the chip source directory under chip/ most targets compile from (e.g. TL_B92 -> B92)"""
+    dir_counts = Counter()
+    for target in json_data.get("targets", []):
+        for dir_path in target.get("directories", []):
+            parts = dir_path.split("/")
+            if len(parts) > 1 and parts[0] == "chip":
+                dir_counts[parts[1]] += 1
+    return dir_counts.most_common(1)[0][0] if dir_counts else chip
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve layered cmake_configs, or split flat ones into layers")
+    parser.add_argument("--root", default=os.getcwd(), help="SDK root directory")
+    parser.add_argument("--split", nargs="+", metavar=("FAMILY_JSON", "CONFIG_JSON"),
+                        help="rewrite the flat CONFIG_JSON files as deltas over a new FAMILY_JSON base layer")
+    parser.add_argument("--flatten", metavar="CONFIG_JSON", help="print the resolved flat form of a config")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    loader = ConfigLoader()
+    if args.split:
+        if len(args.split) < 2:
+            parser.error("--split needs a family file and at least one config")
+        loader.split(args.split[0], args.split[1:])
+    elif args.flatten:
+        print(json.dumps(loader.load(args.flatten), indent=4))
+    else:
+        configs_dir = Path(args.root).absolute() / "cmake_configs"
+        for json_file in sorted(configs_dir.glob("*_cmake.json")):
+            files = loader.chain(json_file)
+            size = sum(os.path.getsize(p) for p in files)
+            flat_size = len(json.dumps(loader.load(json_file), indent=4))
+            layers = " <- ".join(os.path.basename(p) for p in files)
+            print(f"{flat_size:>8} {size:>8} {layers}")
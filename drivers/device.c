@@ -0,0 +1,5 @@
+#include "device.h"
+
+// 设备表，只在这里定义一次
+device_t device_table[DEVICE_MAX_COUNT];
+uint8_t device_count = 0;
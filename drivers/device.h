@@ -16,22 +16,25 @@ typedef struct {
     void* dev;  // 指向HAL设备句柄
 } device_t;
 
+#define DEVICE_MAX_COUNT 32
+
+// 设备表（定义在device.c，所有编译单元共用同一张表）
+extern device_t device_table[DEVICE_MAX_COUNT];
+extern uint8_t device_count;
+
 // 注册设备
 static inline void device_register(const device_t* dev) {
-    static device_t devices[32];
-    static uint8_t count = 0;
-    if (count < 32) {
-        memcpy(&devices[count], dev, sizeof(device_t));
-        count++;
+    if (device_count < DEVICE_MAX_COUNT) {
+        memcpy(&device_table[device_count], dev, sizeof(device_t));
+        device_count++;
     }
 }
 
-// 查找设备
+// 查找设备（只比较已注册的设备）
 static inline device_t* device_find(const char* name) {
-    static device_t devices[32];
-    for (uint8_t i = 0; i < 32; i++) {
-        if (strcmp(devices[i].name, name) == 0) {
-            return &devices[i];
+    for (uint8_t i = 0; i < device_count; i++) {
+        if (strcmp(device_table[i].name, name) == 0) {
+            return &device_table[i];
         }
     }
     return NULL;
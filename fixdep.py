@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Runs once per compiled unit as the compiler launcher, so it only imports the standard library
+import os
+import re
+import sys
+import argparse
+import subprocess
+from pathlib import Path
+
+SYMBOL_RE = re.compile(rb'\b(?:CONFIG_(\w+)|CURRENT_BUILD_(\w+))')
+
+
+class DepfileFixer:
+    def __init__(self, output_dir):
+        """Initialize the fixer with the include directory gen_autoconf.py writes autoconf.h and the stamps to"""
+        self.output_dir = Path(output_dir).absolute()
+        self.autoconf_h = self.output_dir / "generated" / "autoconf.h"
+        self.stamp_dir = self.output_dir / "config"
+
+    def _parse_depfile(self, text):
+        """Parse a make-style depfile into (target, [prerequisites])"""
+        text = text.replace("\\\n", " ")
+        target, _, deps = text.partition(": ")
+        words = re.findall(r'(?:\\.|[^\s\\])+', deps)
+        return target.strip(), [w.replace("\\ ", " ") for w in words]
+
+    def _referenced_symbols(self, path, cache):
+        """Return the config symbols a file references, as stamp names"""
+        if path in cache:
+            return cache[path]
+        symbols = set()
+        try:
+            with open(path, 'rb') as f:
+                for config, build in SYMBOL_RE.findall(f.read()):
+                    if config:
+                        symbols.add(config.decode())
+                    else:
+                        symbols.add("CURRENT_BUILD_" + build.decode())
+        except OSError:
+            pass
+        cache[path] = symbols
+        return symbols
+
+    def fixdep(self, depfile):
+        """Replace autoconf.h in a depfile with the stamps of the symbols actually used
+
+        build_config.h stays a plain prerequisite: every demo has its own, written by the CMake configure
+        step, so only its own timestamp tells the objects it changed.
+        """
+        with open(depfile, 'r') as f:
+            target, deps = self._parse_depfile(f.read())
+
+        kept = []
+        symbols = set()
+        cache = {}
+        for dep in deps:
+            # Skip autoconf.h and stamps from an earlier fixdep run
+            path = Path(dep).absolute()
+            if path == self.autoconf_h or path.parent == self.stamp_dir:
+                continue
+            kept.append(dep)
+            symbols |= self._referenced_symbols(dep, cache)
+
+        # Only depend on stamps that exist, unknown CONFIG_ names are local macros
+        stamps = [str(self.stamp_dir / name) for name in sorted(symbols) if (self.stamp_dir / name).exists()]
+
+        content = f"{target}:"
+        for dep in kept + stamps:
+            content += " \\\n  " + dep.replace(" ", "\\ ")
+        content += "\n"
+        with open(depfile, 'w') as f:
+            f.write(content)
+
+    def launch(self, command):
+        """Run a compiler command and fix up the depfile it writes (for CMAKE_<LANG>_COMPILER_LAUNCHER)"""
+        result = subprocess.run(command)
+        if result.returncode != 0:
+            return result.returncode
+
+        depfile = None
+        for i, arg in enumerate(command):
+            if arg == "-MF" and i + 1 < len(command):
+                depfile = command[i + 1]
+            elif arg.startswith("-MF") and len(arg) > 3:
+                depfile = arg[3:]
+        if depfile is None and "-MD" in command and "-o" in command:
+            depfile = os.path.splitext(command[command.index("-o") + 1])[0] + ".d"
+        if depfile and os.path.exists(depfile):
+            self.fixdep(depfile)
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Make compiler depfiles depend on per-symbol config stamps")
+    parser.add_argument("--output", default="include", help="include directory holding autoconf.h and the stamps")
+    parser.add_argument("--fixdep", default=None, metavar="DEPFILE",
+                        help="rewrite a compiler depfile to depend on config stamps")
+    parser.add_argument("--launch", nargs=argparse.REMAINDER,
+                        help="compiler command to run, then fix up its depfile")
+    args = parser.parse_args()
+
+    fixer = DepfileFixer(args.output)
+    if args.launch:
+        sys.exit(fixer.launch(args.launch))
+    elif args.fixdep:
+        fixer.fixdep(args.fixdep)
+    else:
+        parser.error("one of --launch or --fixdep is required")
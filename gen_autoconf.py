@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import argparse
+import glob
+from pathlib import Path
+
+from resolve_kconfig import KconfigResolver
+from config_layers import load_config
+from instrumentation import log, span, add_arguments, configure_from_args
+
+
+class AutoconfGenerator:
+    def __init__(self, root_dir, output_dir, config_path=".config", build_config=None):
+        """Initialize the autoconf generator with the project root and the output include directory"""
+        self.root_dir = Path(root_dir).absolute()
+        self.output_dir = Path(output_dir).absolute()
+        self.config_path = self.root_dir / config_path
+        self.build_config = Path(build_config) if build_config else \
+            self.root_dir / "demo" / "vendor" / "common" / "common" / "build_config.h"
+
+        # autoconf.h for the C code, include/config/<SYMBOL> stamps for the dependency tracking
+        self.autoconf_h = self.output_dir / "generated" / "autoconf.h"
+        self.stamp_dir = self.output_dir / "config"
+        self.auto_conf = self.stamp_dir / "auto.conf"
+
+    def parse_config(self, path):
+        """Parse a .config file into a {symbol: value} dict, skipping unset symbols"""
+        values = {}
+        if not os.path.exists(path):
+            return values
+        with open(path, 'r') as f:
+            for line in f:
+                match = re.match(r'^CONFIG_(\w+)=(.*)$', line.strip())
+                if match:
+                    values[match.group(1)] = match.group(2)
+        return values
+
+    def parse_build_config(self):
+        """Return the CURRENT_BUILD_* macros defined in build_config.h as pseudo-symbols"""
+        values = {}
+        if not self.build_config.exists():
+            return values
+        with open(self.build_config, 'r', encoding="utf-8", errors="ignore") as f:
+            for match in re.finditer(r'^\s*#define\s+CURRENT_BUILD_(\w+)\s+(\w+)', f.read(), re.M):
+                values[f"CURRENT_BUILD_{match.group(1)}"] = match.group(2)
+        return values
+
+    def _write_if_changed(self, path, content):
+        """Write a file only when its content changes, so unchanged outputs keep their mtime"""
+        if path.exists():
+            with open(path, 'r') as f:
+                if f.read() == content:
+                    return False
+        os.makedirs(path.parent, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return True
+
+    def generate_autoconf_h(self, values):
+        """Generate autoconf.h with one CONFIG_* define per enabled symbol"""
+        content = "/* Auto-generated from .config, do not edit */\n"
+        content += "#ifndef AUTOCONF_H\n#define AUTOCONF_H\n\n"
+        for name, value in values.items():
+            if name.startswith("CURRENT_BUILD_"):
+                continue
+            if value == "y":
+                content += f"#define CONFIG_{name} 1\n"
+            elif value == "m":
+                content += f"#define CONFIG_{name}_MODULE 1\n"
+            elif value != "n":
+                content += f"#define CONFIG_{name} {value}\n"
+        content += "\n#endif\n"
+
+        if self._write_if_changed(self.autoconf_h, content):
+            log(f"Generated autoconf.h: {self.autoconf_h}", event="generated", path=self.autoconf_h)
+        else:
+            log(f"autoconf.h unchanged, skipping: {self.autoconf_h}", event="unchanged", path=self.autoconf_h)
+
+    def update_stamps(self, values):
+        """Touch include/config/<SYMBOL> for every symbol whose value changed since the last run"""
+        os.makedirs(self.stamp_dir, exist_ok=True)
+        previous = {}
+        if self.auto_conf.exists():
+            with open(self.auto_conf, 'r') as f:
+                previous = json.load(f)
+
+        changed = []
+        for name in sorted(set(previous) | set(values)):
+            stamp = self.stamp_dir / name
+            if previous.get(name) != values.get(name) or not stamp.exists():
+                stamp.touch()
+                changed.append(name)
+
+        with open(self.auto_conf, 'w') as f:
+            json.dump(values, f, indent=4, sort_keys=True)
+        log(f"Updated {len(changed)} config stamps in {self.stamp_dir}", event="stamps", path=self.stamp_dir,
+            changed=len(changed))
+        return changed
+
+    def known_symbols(self):
+        """Return every Kconfig symbol and CURRENT_BUILD_* demo macro, so unset ones get a stamp too"""
+        symbols = []
+        if (self.root_dir / "Kconfig").exists():
+            symbols += list(KconfigResolver(self.root_dir).symbols)
+        for json_file in sorted(glob.glob(str(self.root_dir / "cmake_configs" / "*_cmake.json"))):
+            try:
+                json_data = load_config(json_file)
+            except (ValueError, OSError) as e:
+                log(f"Error parsing {json_file}: {e}", event="error", path=json_file)
+                continue
+            for target in json_data.get("targets", []):
+                if "name" in target:
+                    symbols.append(f"CURRENT_BUILD_{target['name']}")
+        return symbols
+
+    def generate_all(self):
+        """Generate autoconf.h and refresh the per-symbol stamps"""
+        with span("parse_config"):
+            values = self.parse_config(self.config_path)
+            values.update(self.parse_build_config())
+        # A stamp must exist before a symbol is enabled, or sources referencing it never depend on it
+        with span("known_symbols"):
+            for name in self.known_symbols():
+                values.setdefault(name, "n")
+        self.generate_autoconf_h(values)
+        with span("update_stamps"):
+            return self.update_stamps(values)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate autoconf.h and per-symbol config stamps")
+    parser.add_argument("--root", default=os.getcwd(), help="SDK root directory")
+    parser.add_argument("--config", default=".config", help="resolved .config file")
+    parser.add_argument("--output", default="include", help="output include directory")
+    parser.add_argument("--build-config", default=None, help="build_config.h path")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    generator = AutoconfGenerator(args.root, args.output, args.config, args.build_config)
+    generator.generate_all()
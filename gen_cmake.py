@@ -1,10 +1,52 @@
 #!/usr/bin/env python3
 import os
+import re
+import sys
 import json
 import glob
+import shlex
 import shutil
+import filecmp
+import argparse
+import posixpath
 from pathlib import Path
 
+from instrumentation import log, span, add_arguments, configure_from_args
+from config_layers import load_config, chip_name as config_chip_name, chip_source_dir
+from gen_ffunicode import FfunicodeSlicer, FATFS_DIR
+from generate_toolchain import C_STANDARD, toolchain_compile_options
+
+# Headers reached by at least this share of a chip's translation units are PCH candidates
+PCH_MIN_COVERAGE = 0.9
+PCH_MAX_HEADERS = 8
+
+# Build steps in the configs come from the IDE, which runs them in project/<family>/<chip>/<config>/
+IDE_BUILD_DIR_TO_ROOT = "../../../../"
+IDE_VARIABLES = {"${BuildArtifactFileBaseName}": "{target}", "${BuildArtifactFileName}": "{target}.elf"}
+# Shared header tl_gen_config_header.sh rewrites when the demo named in it is not the one being built
+# Per-demo stand-in for demo/vendor/common/common/build_config.h, which tl_gen_config_header.sh rewrites in place
+CONFIG_HEADER_CONTENT = """/* Auto-generated by gen_cmake.py, the per-demo stand-in for the shared build_config.h */
+#ifndef BUILD_CONFIG_H
+#define BUILD_CONFIG_H
+
+#define CURRENT_BUILD_{target}       1//Compile option name
+#endif
+"""
+# Custom target per step phase: (part of "all", collected in the per-chip <CHIP_NAME>_<phase> aggregate)
+STEP_TARGETS = {
+    "pre_build": (False, False),
+    "bin": (True, True),
+    "post_build": (True, False),
+    "size": (False, True),
+    "lst": (False, True),
+}
+# Dual-core chips map flash here; a core's link script places its image at NDS_SAG_LMA_FLASH
+FLASH_BASE = 0x20000000
+LINK_FLASH_ADDR = re.compile(r'NDS_SAG_LMA_FLASH\s*=\s*(0x[0-9a-fA-F]+)')
+LINK_FLASH_SIZE = re.compile(r'FLASH_SIZE\s*=\s*(0x[0-9a-fA-F]+)')
+# The driver library a target links names the core it runs on
+CORE_LIBRARIES = {"driver_d25f": "d25f", "driver_n22": "n22"}
+
 class CMakeGenerator:
     def __init__(self, root_dir):
         """Initialize the CMake generator with the root directory of the project"""
@@ -12,23 +54,27 @@ class CMakeGenerator:
         self.cmake_configs_dir = self.root_dir / "cmake_configs"
         self.json_files = glob.glob(str(self.cmake_configs_dir / "*_cmake.json"))
         
-        # Ensure output directories exist
-        os.makedirs(self.root_dir, exist_ok=True)
-        # Create a directory to store chip-specific build configurations
+        # Chip-specific build configurations, created by the generator methods that write them, so
+        # tools reading the config model through a generator leave the tree alone
         self.chip_build_dir = self.root_dir / "chip_builds"
-        os.makedirs(self.chip_build_dir, exist_ok=True)
         
         # Flag to track if root CMakeLists has been generated
         self.root_cmake_generated = False
+        # chip -> {target: driver sources the target never reaches}, shared by the CMake and database writers
+        self.pruned_memo = {}
+        self.include_graph = None
+        self.reachability = None
+        self.fatfs_unicode = None
+        # Include directories autoconf.h was written to for the compilation database
+        self.autoconf_dirs = set()
         
     def parse_json(self, json_path):
-        """Parse a single JSON configuration file"""
-        with open(json_path, 'r') as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing {json_path}: {e}")
-                return None
+        """Parse a single JSON configuration file, resolving its layers into the flat format"""
+        try:
+            return load_config(json_path)
+        except (ValueError, OSError) as e:
+            log(f"Error parsing {json_path}: {e}", event="error", path=json_path)
+            return None
     
     def generate_root_cmakelists(self):
         """Generate the root directory CMakeLists.txt only once"""
@@ -39,51 +85,436 @@ class CMakeGenerator:
         root_cmake = self.root_dir / "CMakeLists.txt"
         
         content = """cmake_minimum_required(VERSION 3.19)
-project(tl_new_sdk)
 
-# Include all submodules
-include(cmake/toolchain.cmake)
+# Include all submodules (Kconfig first, the toolchain selection depends on CHIP_*). The selected chip's
+# compiler has to be set before project() enables the languages.
 include(cmake/kconfig.cmake)
+include(cmake/toolchain.cmake)
+project(tl_new_sdk C ASM)
 
-# Enable chip-specific configurations
-option(CHIP_TC321X "Enable TC321X chip support" OFF)
-option(CHIP_TL321X "Enable TL321X chip support" OFF)
-option(CHIP_B92 "Enable B92 chip support" OFF)
+# Only the selected chip's driver, link and library paths are considered
+if(NOT CHIP_NAME)
+    message(FATAL_ERROR "No chip selected! Please enable one of the CHIP_* options.")
+endif()
+include(chip_builds/${CHIP_NAME}/CMakeLists.txt)
 
-# Recursively add all subdirectories
-file(GLOB_RECURSE SUB_DIRS RELATIVE ${CMAKE_CURRENT_SOURCE_DIR} *)
-foreach(DIR ${SUB_DIRS})
-    if(IS_DIRECTORY ${CMAKE_CURRENT_SOURCE_DIR}/${DIR} AND EXISTS ${CMAKE_CURRENT_SOURCE_DIR}/${DIR}/CMakeLists.txt)
-        add_subdirectory(${DIR})
+# Only the selected demos are configured and built
+foreach(DEMO ${SDK_SELECTED_DEMOS})
+    if(EXISTS ${CMAKE_CURRENT_SOURCE_DIR}/demo/vendor/${DEMO}/CMakeLists.txt)
+        add_subdirectory(demo/vendor/${DEMO})
+        if(TARGET ${DEMO})
+            sdk_apply_pch(${DEMO})
+            sdk_prune_drivers(${DEMO})
+            sdk_add_build_steps(${DEMO})
+        endif()
+    else()
+        message(STATUS "Demo ${DEMO} has no CMakeLists.txt, skipping")
     endif()
 endforeach()
 
-# Include Kconfig configuration
-include(${CMAKE_BINARY_DIR}/kconfig.cmake)
+# Multi-core products whose core demos are all selected
+sdk_add_products()
 """
         
         with open(root_cmake, 'w') as f:
             f.write(content)
-        print(f"Generated root CMakeLists.txt: {root_cmake}")
+        log(f"Generated root CMakeLists.txt: {root_cmake}", event="generated", path=root_cmake)
         self.root_cmake_generated = True  # Mark as generated
     
-    def generate_chip_specific_cmake(self, chip_name):
+    def _include_graph(self):
+        """Return the include graph of tools/include_graph.py, one per run for all chips, or None without it"""
+        if self.include_graph is None:
+            sys.path.insert(0, str(self.root_dir / "tools"))
+            try:
+                from include_graph import IncludeGraph
+            except ImportError:
+                IncludeGraph = None
+            self.include_graph = IncludeGraph(self.root_dir) if IncludeGraph else False
+        return self.include_graph or None
+    
+    def select_pch_headers(self, json_data, chip_name, source_dir):
+        """Return the chip's PCH headers: "precompile_headers" from the JSON, else the umbrella headers nearly every unit reaches"""
+        configured = json_data.get("precompile_headers")
+        if configured is not None:
+            # false or [] opts the chip out
+            return list(configured or [])
+        
+        graph = self._include_graph()
+        if not graph:
+            return []
+        targets = graph.load_targets([chip_name])
+        if not targets:
+            return []
+        graph.scan_all(targets)
+        report = graph.analyze(targets)
+        
+        prefix = f"chip/{source_dir}/"
+        candidates = [row["header"] for row in report["chips"].get(chip_name, [])
+                      if row["coverage"] >= PCH_MIN_COVERAGE and row["header"].startswith(prefix)]
+        # Keep only headers no other candidate includes, so umbrellas are precompiled in their own include order
+        include_dirs = targets[0][3]
+        reached = {c: graph.closure(str(self.root_dir / c), include_dirs) for c in candidates}
+        roots = [c for c in candidates
+                 if not any(str(self.root_dir / c) in reached[o] and str(self.root_dir / o) not in reached[c]
+                            for o in candidates if o != c)]
+        return roots[:PCH_MAX_HEADERS]
+    
+    def select_pruned_drivers(self, json_data, chip_name):
+        """Return {target: set of driver source paths} no symbol of the target reaches; "prune_drivers": false opts out"""
+        if chip_name in self.pruned_memo:
+            return self.pruned_memo[chip_name]
+        pruned = {}
+        if json_data and json_data.get("prune_drivers", True):
+            if self.reachability is None:
+                graph = self._include_graph()
+                try:
+                    from driver_reachability import DriverReachability
+                except ImportError:
+                    DriverReachability = None
+                # One analyzer for all chips, so the symbol cache is loaded once per run
+                self.reachability = DriverReachability(self.root_dir, graph=graph) if graph and DriverReachability else False
+            if self.reachability:
+                report = self.reachability.analyze([chip_name]).get(chip_name, {})
+                pruned = {name: {self.root_dir / p for p in demo["pruned"]} for name, demo in report.items()}
+                count = sum(len(p) for p in pruned.values())
+                total = count + sum(len(demo["kept"]) for demo in report.values())
+                log(f"Pruned {count} of {total} driver sources unreachable from the {chip_name} demos",
+                    event="pruned", chip=chip_name, pruned=count, total=total)
+        self.pruned_memo[chip_name] = pruned
+        return pruned
+    
+    def _pch_groups(self, json_data):
+        """Group the targets by C flag set, a PCH can only be reused with identical flags"""
+        groups = {}
+        for target in json_data.get("targets", []):
+            if target.get("name"):
+                flags = tuple(target.get("c_compile_options", []))
+                groups.setdefault(flags, []).append(target["name"])
+        return list(groups.items())
+    
+    def _step_commands(self, entry, target_name):
+        """Split one pre_build/post_build entry into argument lists, with the IDE paths mapped onto the CMake trees"""
+        for variable, value in IDE_VARIABLES.items():
+            entry = entry.replace(variable, value.format(target=target_name))
+        commands = []
+        for part in entry.split(";"):
+            args = []
+            for arg in shlex.split(part):
+                # ${CMAKE_CURRENT_SOURCE_DIR} means the SDK root in the configs, like in expand_options
+                if arg.startswith("${CMAKE_CURRENT_SOURCE_DIR}/"):
+                    arg = "${CMAKE_SOURCE_DIR}/" + posixpath.normpath(arg[len("${CMAKE_CURRENT_SOURCE_DIR}/"):])
+                elif arg.startswith(IDE_BUILD_DIR_TO_ROOT):
+                    arg = "${CMAKE_SOURCE_DIR}/" + posixpath.normpath(arg[len(IDE_BUILD_DIR_TO_ROOT):])
+                elif arg.startswith("./"):
+                    arg = "${dir}/" + arg[2:]
+                args.append(arg)
+            if args:
+                commands.append(args)
+        return commands
+    
+    def _build_steps(self, target):
+        """Return a target's objcopy, pre/post build, size and listing steps with the files each one reads and writes"""
+        name = target["name"]
+        bin_file = f"${{dir}}/{name}.bin"
+        image = bin_file if target.get("obj_copy") else name
+        steps = []
+        if target.get("obj_copy"):
+            objcopy = ["${CMAKE_OBJCOPY}"] + [a for option in target["obj_copy"] for a in shlex.split(option)]
+            steps.append({"phase": "bin", "args": objcopy + [f"$<TARGET_FILE:{name}>", bin_file],
+                          "depends": [name], "outputs": [bin_file], "comment": f"Creating {name}.bin"})
+        for phase in ("pre_build", "post_build"):
+            for entry in target.get(phase, []):
+                for args in self._step_commands(entry, name):
+                    script = posixpath.basename(args[0])
+                    depends = [args[0]] if args[0].startswith("${CMAKE_SOURCE_DIR}/") else []
+                    outputs = []
+                    if script == "tl_gen_config_header.sh":
+                        # Every target has its own build_config.h, see _write_build_steps
+                        continue
+                    if script == "secure_boot_tool.sh" and len(args) >= 5:
+                        # <tool dir> <cfg.ini> <input bin> <output bin>
+                        depends += [args[2], args[3]]
+                        outputs.append(args[4])
+                    elif phase == "post_build":
+                        depends.append(image)
+                    if not outputs:
+                        index = sum(step["phase"] == phase and step["outputs"][0].endswith(".stamp") for step in steps)
+                        outputs.append(f"${{dir}}/{name}_{phase}_{index}.stamp")
+                    if script.endswith(".sh"):
+                        # The scripts are not executable in the repository
+                        args = ["bash"] + args
+                    steps.append({"phase": phase, "args": args, "depends": depends, "outputs": outputs,
+                                  "comment": f"Running {script} for {name}"})
+        # Reports are only built on request, a source-interleaved listing of an LTO image is slow
+        for phase, tool, key, suffix in (("size", "${CMAKE_SIZE}", "print_size", "size"),
+                                         ("lst", "${CMAKE_OBJDUMP}", "obj_dump", "lst")):
+            if key in target:
+                output = f"${{dir}}/{name}.{suffix}"
+                options = [a for option in target[key] for a in shlex.split(option)]
+                steps.append({"phase": phase, "args": [tool] + options + [f"$<TARGET_FILE:{name}>", ">", output],
+                              "depends": [name], "outputs": [output], "comment": f"Creating {name}.{suffix}"})
+        return steps
+    
+    def link_layout(self, target):
+        """Return (flash offset, flash size) of a target's image from the NDS_SAG_LMA_FLASH and FLASH_SIZE of its link script"""
+        for option in target.get("linker_options", []):
+            if option.startswith("-T"):
+                script = self.root_dir / option[2:].replace("${CMAKE_CURRENT_SOURCE_DIR}/", "")
+                try:
+                    text = script.read_text(errors="ignore")
+                except OSError:
+                    return None, None
+                address = LINK_FLASH_ADDR.search(text)
+                size = LINK_FLASH_SIZE.search(text)
+                return (int(address.group(1), 16) - FLASH_BASE if address else None,
+                        int(size.group(1), 16) if size else None)
+        return None, None
+    
+    def products(self, json_data):
+        """Return the config's multi-core products with the core, flash offset and flash size of each image"""
+        targets = {t.get("name"): t for t in json_data.get("targets", [])} if json_data else {}
+        products = []
+        for product in json_data.get("products", []) if json_data else []:
+            images = []
+            for name in product.get("images", []):
+                target = targets.get(name)
+                core = next((CORE_LIBRARIES[lib] for lib in target.get("linker_libraries", [])
+                             if lib in CORE_LIBRARIES), None) if target else None
+                offset, flash_size = self.link_layout(target) if target else (None, None)
+                if core is None or offset is None or offset < 0:
+                    log(f"Product {product.get('name')}: {name} is not a core image with a flash link script, skipping",
+                        event="error", product=product.get("name"), target=name)
+                    images = []
+                    break
+                images.append({"target": name, "core": core, "offset": offset, "flash_size": flash_size})
+            if images:
+                flash_size = min((i["flash_size"] for i in images if i["flash_size"]), default=None)
+                products.append({"name": product["name"], "images": images, "flash_size": flash_size})
+        return products
+    
+    def _write_products(self, f, json_data):
+        """Write sdk_add_products(): per product, one flash image packed from the .bin of every core"""
+        f.write("\n# Multi-core products: the core demos are independent targets, so they build concurrently and a change\n")
+        f.write("# relinks only the core it affects; the product image is repacked from the core .bin files.\n")
+        f.write("function(sdk_add_products)\n")
+        for product in self.products(json_data):
+            name = product["name"]
+            bins = [f"${{CMAKE_BINARY_DIR}}/demo/vendor/{i['target']}/{i['target']}.bin" for i in product["images"]]
+            conditions = " AND ".join(f"TARGET {i['target']}_bin" for i in product["images"])
+            f.write(f"    if(Python3_Interpreter_FOUND AND {conditions})\n")
+            f.write(f"        set(dir ${{CMAKE_BINARY_DIR}}/products/{name})\n")
+            f.write(f"        add_custom_command(OUTPUT ${{dir}}/{name}.bin ${{dir}}/{name}_manifest.json\n")
+            f.write(f"            COMMAND ${{Python3_EXECUTABLE}} ${{CMAKE_SOURCE_DIR}}/tools/product_image.py --name {name}\n")
+            if product["flash_size"]:
+                f.write(f"                --flash-size 0x{product['flash_size']:x}\n")
+            for image, bin_file in zip(product["images"], bins):
+                f.write(f"                --image {image['core']}:0x{image['offset']:x}:{bin_file}\n")
+            f.write("                -o ${dir}\n")
+            f.write(f"            DEPENDS ${{CMAKE_SOURCE_DIR}}/tools/product_image.py ${{CMAKE_SOURCE_DIR}}/tools/fw_packer.py\n")
+            f.write(f"                {' '.join(bins)}\n")
+            f.write(f"            COMMENT \"Packing {name}.bin\"\n")
+            f.write("            VERBATIM)\n")
+            f.write(f"        add_custom_target({name} ALL DEPENDS ${{dir}}/{name}.bin)\n")
+            f.write(f"        add_dependencies({name} {' '.join(i['target'] + '_bin' for i in product['images'])})\n")
+            f.write("    endif()\n")
+        f.write("endfunction()\n")
+    
+    def _cmake_options(self, options):
+        """Split options into CMake arguments with ${CMAKE_CURRENT_SOURCE_DIR} (the SDK root in the configs) pinned"""
+        args = []
+        for option in options:
+            args += shlex.split(option.replace("${CMAKE_CURRENT_SOURCE_DIR}", "${CMAKE_SOURCE_DIR}"))
+        return args
+    
+    def _write_demo_targets(self, f, json_data):
+        """Write each target's directories, options and link inputs of this chip and sdk_add_demo(), which builds a demo from them"""
+        f.write("\n# Per-demo sources, compile options and link inputs of this chip. The demo CMakeLists are shared by\n")
+        f.write("# every chip, so only the selected chip's entries reach the build.\n")
+        for target in json_data.get("targets", []) if json_data else []:
+            name = target.get("name")
+            if not name:
+                continue
+            lists = [
+                ("DIRECTORIES", [f"${{CMAKE_SOURCE_DIR}}/{d}" for d in target.get("directories", [])]),
+                ("C_OPTIONS", self._cmake_options(target.get("c_compile_options", []))),
+                ("ASM_OPTIONS", self._cmake_options(target.get("asm_compile_options", []))),
+                ("LINK_OPTIONS", self._cmake_options(target.get("linker_options", []))),
+                ("LINK_DIRECTORIES", self._cmake_options(target.get("linker_directories", []))),
+                ("LINK_LIBRARIES", list(target.get("linker_libraries", []))),
+            ]
+            for key, values in lists:
+                if values:
+                    f.write(f"set(CHIP_{key}_{name}\n")
+                    for value in values:
+                        f.write(f"    {value}\n")
+                    f.write(")\n")
+        f.write("function(sdk_add_demo target)\n")
+        f.write("    set(sources \"\")\n")
+        f.write("    foreach(path ${CHIP_DIRECTORIES_${target}})\n")
+        f.write("        if(IS_DIRECTORY ${path})\n")
+        f.write("            file(GLOB_RECURSE found CONFIGURE_DEPENDS ${path}/*.c ${path}/*.S)\n")
+        f.write("            list(SORT found)\n")
+        f.write("            list(APPEND sources ${found})\n")
+        f.write("        elseif(path MATCHES \"\\\\.(c|S)$\" AND EXISTS ${path})\n")
+        f.write("            list(APPEND sources ${path})\n")
+        f.write("        endif()\n")
+        f.write("    endforeach()\n")
+        f.write("    list(REMOVE_DUPLICATES sources)\n")
+        f.write("    add_executable(${target} ${sources})\n")
+        f.write("    # FatFs users compile the unicode tables sliced to the configured code page instead\n")
+        f.write("    set(fatfs_unicode ${CMAKE_SOURCE_DIR}/3rd-party/fatfs/ffunicode.c)\n")
+        f.write("    if(fatfs_unicode IN_LIST sources AND NOT FATFS_UNICODE_SOURCE STREQUAL fatfs_unicode)\n")
+        f.write("        set_source_files_properties(${fatfs_unicode} PROPERTIES HEADER_FILE_ONLY ON)\n")
+        f.write("        target_sources(${target} PRIVATE ${FATFS_UNICODE_SOURCE})\n")
+        f.write("        set_source_files_properties(${FATFS_UNICODE_SOURCE} PROPERTIES\n")
+        f.write("            INCLUDE_DIRECTORIES ${CMAKE_SOURCE_DIR}/3rd-party/fatfs)\n")
+        f.write("    endif()\n")
+        f.write("    target_compile_options(${target} PRIVATE\n")
+        f.write("        \"$<$<COMPILE_LANGUAGE:C>:${CHIP_C_OPTIONS_${target}}>\"\n")
+        f.write("        \"$<$<COMPILE_LANGUAGE:ASM>:${CHIP_ASM_OPTIONS_${target}}>\")\n")
+        f.write("    target_link_options(${target} PRIVATE ${CHIP_LINK_OPTIONS_${target}})\n")
+        f.write("    target_link_directories(${target} PRIVATE ${CHIP_LINK_DIRECTORIES_${target}})\n")
+        f.write("    target_link_libraries(${target} PRIVATE ${CHIP_LINK_LIBRARIES_${target}})\n")
+        f.write("endfunction()\n")
+    
+    def _write_pruned_drivers(self, f, chip_name, json_data):
+        """Write the per-demo lists of unreachable driver sources and sdk_prune_drivers(), which skips compiling them"""
+        with span("resolve_driver_reachability", chip=chip_name):
+            pruned = self.select_pruned_drivers(json_data, chip_name)
+        f.write("\n# Driver sources no symbol reference of the demo reaches (tools/driver_reachability.py). They stay\n")
+        f.write("# listed but are not compiled, instead of being compiled for --gc-sections to drop them at link time.\n")
+        f.write("option(SDK_PRUNE_DRIVERS \"Skip compiling driver sources a demo never references\" ON)\n")
+        for name, paths in sorted(pruned.items()):
+            if not paths:
+                continue
+            f.write(f"set(CHIP_PRUNED_DRIVERS_{name}\n")
+            for path in sorted(paths):
+                f.write(f"    ${{CMAKE_SOURCE_DIR}}/{path.relative_to(self.root_dir).as_posix()}\n")
+            f.write(")\n")
+        f.write("function(sdk_prune_drivers target)\n")
+        f.write("    if(SDK_PRUNE_DRIVERS AND CHIP_PRUNED_DRIVERS_${target})\n")
+        f.write("        set_source_files_properties(${CHIP_PRUNED_DRIVERS_${target}} TARGET_DIRECTORY ${target}\n")
+        f.write("            PROPERTIES HEADER_FILE_ONLY ON)\n")
+        f.write("    endif()\n")
+        f.write("endfunction()\n")
+    
+    def _write_build_steps(self, f, json_data):
+        """Write one sdk_build_steps_<demo>() per target and the sdk_add_build_steps() dispatcher"""
+        f.write("\n# Build steps and reports as custom commands with declared inputs and outputs, so a step reruns only\n")
+        f.write("# when what it reads changed and independent steps run in parallel. <demo>_bin and <demo>_post_build\n")
+        f.write("# are part of \"all\", <demo>_size and <demo>_lst (objdump listing) are only built on request.\n\n")
+        f.write("# size and objdump sit next to objcopy when the initial cache does not name them\n")
+        f.write("foreach(tool size objdump)\n")
+        f.write("    string(TOUPPER ${tool} TOOL)\n")
+        f.write("    if(NOT CMAKE_${TOOL} AND CMAKE_OBJCOPY)\n")
+        f.write("        string(REGEX REPLACE \"objcopy([^/]*)$\" \"${tool}\\\\1\" CMAKE_${TOOL} \"${CMAKE_OBJCOPY}\")\n")
+        f.write("    endif()\n")
+        f.write("endforeach()\n\n")
+        f.write("# Per-chip aggregates: make <CHIP_NAME>_bin, <CHIP_NAME>_size or <CHIP_NAME>_lst for all selected demos\n")
+        f.write("foreach(phase bin size lst)\n")
+        f.write("    add_custom_target(${CHIP_NAME}_${phase})\n")
+        f.write("endforeach()\n\n")
+        f.write("function(sdk_add_build_steps target)\n")
+        f.write("    if(COMMAND sdk_build_steps_${target})\n")
+        f.write("        cmake_language(CALL sdk_build_steps_${target})\n")
+        f.write("    endif()\n")
+        f.write("endfunction()\n")
+        # Demos build concurrently, so they cannot take turns rewriting the shared build_config.h: each one
+        # gets its own, only rewritten when its content changes
+        for target in json_data.get("targets", []) if json_data else []:
+            name = target.get("name")
+            if not name:
+                continue
+            steps = self._build_steps(target)
+            f.write(f"\nfunction(sdk_build_steps_{name})\n")
+            f.write(f"    set(dir ${{CMAKE_BINARY_DIR}}/demo/vendor/{name})\n")
+            # Found before demo/vendor/common/common, app_config.h includes it by its plain name
+            f.write("    file(CONFIGURE OUTPUT ${dir}/config/build_config.h CONTENT [=[\n")
+            f.write(CONFIG_HEADER_CONTENT.format(target=name))
+            f.write("]=])\n")
+            f.write(f"    target_include_directories({name} BEFORE PRIVATE ${{dir}}/config)\n")
+            for step in steps:
+                f.write(f"    add_custom_command(OUTPUT {' '.join(step['outputs'])}\n")
+                f.write(f"        COMMAND {' '.join(step['args'])}\n")
+                if step["outputs"][0].endswith(".stamp"):
+                    f.write(f"        COMMAND ${{CMAKE_COMMAND}} -E touch {step['outputs'][0]}\n")
+                if step["depends"]:
+                    f.write(f"        DEPENDS {' '.join(step['depends'])}\n")
+                f.write("        WORKING_DIRECTORY ${dir}\n")
+                f.write(f"        COMMENT \"{step['comment']}\"\n")
+                f.write("        VERBATIM)\n")
+            for phase, (in_all, aggregate) in STEP_TARGETS.items():
+                outputs = [o for step in steps if step["phase"] == phase for o in step["outputs"]]
+                if not outputs:
+                    continue
+                f.write(f"    add_custom_target({name}_{phase}{' ALL' if in_all else ''} DEPENDS {' '.join(outputs)})\n")
+                if aggregate:
+                    f.write(f"    add_dependencies(${{CHIP_NAME}}_{phase} {name}_{phase})\n")
+            # Pre build steps finish before the demo compiles, post build steps read the .bin target's output
+            if any(step["phase"] == "pre_build" for step in steps):
+                f.write(f"    add_dependencies({name} {name}_pre_build)\n")
+            if any(step["phase"] == "bin" for step in steps) and any(step["phase"] == "post_build" for step in steps):
+                f.write(f"    add_dependencies({name}_post_build {name}_bin)\n")
+            f.write("endfunction()\n")
+    
+    def generate_chip_specific_cmake(self, chip_name, source_dir=None, json_data=None):
         """Generate chip-specific CMake configuration that won't be overwritten"""
         # Create unique directory for each chip's build configuration
         chip_specific_dir = self.chip_build_dir / chip_name
         os.makedirs(chip_specific_dir, exist_ok=True)
+        source_dir = source_dir or chip_name
         
-        # Generate chip-specific CMakeLists
+        # Generate chip-specific CMakeLists, included by the root CMakeLists for the selected chip only
         chip_cmake = chip_specific_dir / "CMakeLists.txt"
         with open(chip_cmake, 'w') as f:
             f.write(f"# Chip-specific configuration for {chip_name}\n")
-            f.write(f"set(CHIP_NAME {chip_name})\n\n")
-            f.write(f"# Include chip-specific sources\n")
-            f.write(f"add_subdirectory(${{CMAKE_SOURCE_DIR}}/chip/{chip_name}/boot)\n")
-            f.write(f"add_subdirectory(${{CMAKE_SOURCE_DIR}}/chip/{chip_name}/drivers)\n")
-            f.write(f"add_subdirectory(${{CMAKE_SOURCE_DIR}}/chip/{chip_name}/link)\n\n")
+            f.write(f"set(CHIP_NAME {chip_name})\n")
+            f.write(f"set(CHIP_SOURCE_DIR ${{CMAKE_SOURCE_DIR}}/chip/{source_dir})\n\n")
+            f.write(f"# Chip-specific driver, link and library paths\n")
+            f.write(f"set(CHIP_DRIVER_DIR ${{CHIP_SOURCE_DIR}}/drivers)\n")
+            f.write(f"set(CHIP_LINK_DIR ${{CHIP_SOURCE_DIR}}/link)\n")
+            f.write(f"set(CHIP_LIB_DIR ${{CHIP_SOURCE_DIR}}/drivers/lib)\n")
+            f.write(f"include_directories(${{CHIP_DRIVER_DIR}})\n")
+            f.write(f"link_directories(${{CHIP_LIB_DIR}})\n\n")
             f.write(f"# Set chip-specific compiler definitions\n")
-            f.write(f"add_definitions(-DCHIP_{chip_name.upper()})\n")
+            f.write(f"add_definitions(-DCHIP_{chip_name.upper()})\n\n")
+            
+            # One PCH per distinct flag set, built once and reused by every demo with those flags
+            with span("resolve_pch", chip=chip_name):
+                headers = self.select_pch_headers(json_data, chip_name, source_dir) if json_data else []
+            f.write("# Precompiled headers, shared by all demos built with the same flag set\n")
+            f.write("option(SDK_USE_PCH \"Precompile the chip umbrella headers\" ON)\n")
+            if headers:
+                f.write("if(SDK_USE_PCH AND NOT TOOLCHAIN_TC32)\n")
+                f.write("    set(CHIP_PCH_HEADERS\n")
+                for header in headers:
+                    f.write(f"        ${{CMAKE_SOURCE_DIR}}/{header}\n")
+                f.write("    )\n")
+                f.write("    file(CONFIGURE OUTPUT ${CMAKE_BINARY_DIR}/pch/pch_stub.c CONTENT \"\")\n")
+                for index, (flags, demos) in enumerate(self._pch_groups(json_data)):
+                    f.write(f"    set(CHIP_PCH_FLAGS_{index}\n")
+                    for flag in self._cmake_options(flags):
+                        f.write(f"        {flag}\n")
+                    f.write("    )\n")
+                    # Passed exactly as sdk_add_demo() passes CHIP_C_OPTIONS_<demo>, REUSE_FROM needs identical flags
+                    f.write(f"    add_library({chip_name}_pch_{index} OBJECT EXCLUDE_FROM_ALL ${{CMAKE_BINARY_DIR}}/pch/pch_stub.c)\n")
+                    f.write(f"    target_compile_options({chip_name}_pch_{index} PRIVATE\n")
+                    f.write(f"        \"$<$<COMPILE_LANGUAGE:C>:${{CHIP_PCH_FLAGS_{index}}}>\")\n")
+                    f.write(f"    target_precompile_headers({chip_name}_pch_{index} PRIVATE ${{CHIP_PCH_HEADERS}})\n")
+                    for demo in demos:
+                        f.write(f"    set(CHIP_PCH_GROUP_{demo} {index})\n")
+                f.write("endif()\n\n")
+            # The demo's own compile options come from sdk_add_demo(), with or without a PCH
+            f.write("function(sdk_apply_pch target)\n")
+            f.write("    set(group ${CHIP_PCH_GROUP_${target}})\n")
+            f.write("    if(NOT \"${group}\" STREQUAL \"\" AND TARGET ${CHIP_NAME}_pch_${group})\n")
+            f.write("        target_precompile_headers(${target} REUSE_FROM ${CHIP_NAME}_pch_${group})\n")
+            f.write("    endif()\n")
+            f.write("endfunction()\n")
+            self._write_demo_targets(f, json_data)
+            self._write_pruned_drivers(f, chip_name, json_data)
+            self._write_build_steps(f, json_data)
+            self._write_products(f, json_data)
         
         # Create a symlink to the chip-specific configuration for easy access
         if os.name != 'nt':  # Skip on Windows which has limited symlink support
@@ -91,16 +522,86 @@ include(${CMAKE_BINARY_DIR}/kconfig.cmake)
             if not os.path.exists(symlink_path):
                 os.symlink(chip_cmake, symlink_path)
         
-        print(f"Generated chip-specific CMake for {chip_name}: {chip_cmake}")
+        log(f"Generated chip-specific CMake for {chip_name}: {chip_cmake}", event="generated", path=chip_cmake)
         return chip_specific_dir
     
+    def generate_host_cmake(self):
+        """Generate the host build flavor: the HAL and one chip's adapters compiled against the mock backend"""
+        # Chips whose driver directory holds generated HAL adapters (gpio_<chip>.c, optionally uart_<chip>_hal.c)
+        adapter_chips = sorted(p.parent.parent.name for p in self.root_dir.glob("chip/*/drivers/gpio_*.c"))
+        if not adapter_chips:
+            log("No HAL chip adapters found, skipping the host build flavor", event="skipped")
+            return None
+        default_chip = next((c for c in adapter_chips
+                             if list((self.root_dir / "chip" / c / "drivers").glob("uart_*_hal.c"))), adapter_chips[0])
+        
+        host_dir = self.chip_build_dir / "HOST"
+        os.makedirs(host_dir, exist_ok=True)
+        host_cmake = host_dir / "CMakeLists.txt"
+        content = f"""# Host build flavor, configured on its own with the native compiler:
+#   cmake -S chip_builds/HOST -B build/host && cmake --build build/host && ctest --test-dir build/host
+# The HAL (drivers/) and the chosen chip's adapters are compiled against host/mock, whose gpio.h,
+# uart.h, dma.h and clock.h keep the peripheral registers in RAM instead of the chip drivers.
+cmake_minimum_required(VERSION 3.19)
+project(tl_new_sdk_host C)
+
+get_filename_component(SDK_ROOT ${{CMAKE_CURRENT_SOURCE_DIR}}/../.. ABSOLUTE)
+set(HAL_HOST_CHIP {default_chip} CACHE STRING "Chip whose HAL adapters are built for the host")
+set_property(CACHE HAL_HOST_CHIP PROPERTY STRINGS {" ".join(adapter_chips)})
+
+set(CMAKE_C_STANDARD 11)
+set(CMAKE_C_STANDARD_REQUIRED ON)
+if(NOT CMAKE_BUILD_TYPE)
+    set(CMAKE_BUILD_TYPE Release)
+endif()
+
+# The adapters are copied out of the chip driver directory, where #include "gpio.h" would find the real driver
+file(GLOB HAL_HOST_ADAPTER_SOURCES ${{SDK_ROOT}}/chip/${{HAL_HOST_CHIP}}/drivers/gpio_*.c
+                                   ${{SDK_ROOT}}/chip/${{HAL_HOST_CHIP}}/drivers/uart_*_hal.c)
+set(HAL_HOST_ADAPTERS)
+set(HAL_HOST_HAS_UART OFF)
+foreach(source ${{HAL_HOST_ADAPTER_SOURCES}})
+    get_filename_component(name ${{source}} NAME)
+    configure_file(${{source}} ${{CMAKE_CURRENT_BINARY_DIR}}/adapters/${{name}} COPYONLY)
+    list(APPEND HAL_HOST_ADAPTERS ${{CMAKE_CURRENT_BINARY_DIR}}/adapters/${{name}})
+    if(name MATCHES "^uart_")
+        set(HAL_HOST_HAS_UART ON)
+    endif()
+endforeach()
+add_library(hal_host STATIC
+    ${{SDK_ROOT}}/host/mock/mock_backend.c
+    ${{SDK_ROOT}}/drivers/device.c
+    ${{HAL_HOST_ADAPTERS}}
+)
+# host/mock comes first so the adapters' #include "gpio.h" etc. resolve to the mock drivers
+target_include_directories(hal_host PUBLIC ${{SDK_ROOT}}/host/mock ${{SDK_ROOT}} ${{SDK_ROOT}}/boards)
+target_compile_definitions(hal_host PUBLIC HAL_HOST=1)
+target_compile_options(hal_host PRIVATE -Wall -Wextra -Wno-unused-parameter -Wno-unused-variable)
+
+add_executable(hal_bench ${{SDK_ROOT}}/host/hal_bench.c ${{SDK_ROOT}}/host/hal_bench_devices.c)
+target_link_libraries(hal_bench PRIVATE hal_host)
+if(HAL_HOST_HAS_UART)
+    target_compile_definitions(hal_bench PRIVATE HAL_HOST_HAS_UART=1)
+endif()
+
+enable_testing()
+add_test(NAME hal_selfcheck COMMAND hal_bench 1000)
+"""
+        if host_cmake.exists() and host_cmake.read_text() == content:
+            log(f"Host build flavor unchanged, skipping: {host_cmake}", event="unchanged", path=host_cmake)
+        else:
+            with open(host_cmake, 'w') as f:
+                f.write(content)
+            log(f"Generated host build flavor ({default_chip} adapters): {host_cmake}", event="generated", path=host_cmake)
+        return host_dir
+    
     def generate_subdir_cmakelists(self, json_data, json_name):
         """Generate CMakeLists.txt for each subdirectory without overwriting"""
         if not json_data or "targets" not in json_data:
             return
             
         # Get direct chip name
-        chip_name = json_name.replace("PLATFORM_SDK_", "").replace("_cmake", "")
+        chip_name = config_chip_name(json_name)
         chip_dir = self.root_dir / "chip" / chip_name
         os.makedirs(chip_dir, exist_ok=True)
         
@@ -115,77 +616,46 @@ include(${CMAKE_BINARY_DIR}/kconfig.cmake)
                 f.write("add_subdirectory(boot)\n")
                 f.write("add_subdirectory(drivers)\n")
                 f.write("add_subdirectory(link)\n")
-            print(f"Generated chip directory CMakeLists: {chip_cmake}")
+            log(f"Generated chip directory CMakeLists: {chip_cmake}", event="generated", path=chip_cmake)
         else:
-            print(f"Chip CMakeLists already exists, skipping: {chip_cmake}")
+            log(f"Chip CMakeLists already exists, skipping: {chip_cmake}", event="skipped", path=chip_cmake)
         
         # Generate chip-specific build configuration
-        self.generate_chip_specific_cmake(chip_name)
+        self.generate_chip_specific_cmake(chip_name, chip_source_dir(json_data, chip_name), json_data)
         
         # Process each target
         for target in json_data["targets"]:
-            target_name = target.get("name")
-            if not target_name:
-                continue
-                
-            # Create demo directory
-            demo_dir = self.root_dir / "demo" / "vendor" / target_name
-            os.makedirs(demo_dir, exist_ok=True)
-            
-            # Generate demo directory CMakeLists
-            demo_cmake = demo_dir / "CMakeLists.txt"
-            
-            # Only generate if it doesn't exist
-            if not os.path.exists(demo_cmake):
-                with open(demo_cmake, 'w') as f:
-                    f.write(f"# Auto-generated {target_name} demo CMake configuration\n")
-                    f.write(f"project({target_name})\n\n")
-                    
-                    # Add source files
-                    if "directories" in target:
-                        f.write("set(SOURCES\n")
-                        for dir_path in target["directories"]:
-                            f.write(f"    {dir_path}\n")
-                        f.write(")\n\n")
-                    
-                    # Add compilation target
-                    f.write("add_executable(${PROJECT_NAME} ${SOURCES})\n\n")
-                    
-                    # Add chip-specific include path
-                    f.write(f"target_include_directories(${{PROJECT_NAME}} PRIVATE\n")
-                    f.write(f"    ${{CMAKE_SOURCE_DIR}}/chip/{chip_name}/drivers/include\n")
-                    f.write(")\n\n")
-                    
-                    # Add linker options
-                    if "linker_options" in target:
-                        f.write("target_link_options(${PROJECT_NAME} PRIVATE\n")
-                        for opt in target["linker_options"]:
-                            f.write(f"    {opt}\n")
-                        f.write(")\n\n")
-                    
-                    # Link libraries
-                    if "linker_libraries" in target:
-                        f.write("target_link_libraries(${PROJECT_NAME} PRIVATE\n")
-                        for lib in target["linker_libraries"]:
-                            f.write(f"    {lib}\n")
-                        f.write(")\n\n")
-                    
-                    # Pre-build and post-build steps
-                    if "pre_build" in target and len(target["pre_build"]) > 0:
-                        f.write("add_custom_command(TARGET ${PROJECT_NAME} PRE_BUILD\n")
-                        f.write(f"    COMMAND {target['pre_build'][0]}\n")
-                        f.write("    COMMENT \"Executing pre-build steps\"\n")
-                        f.write(")\n\n")
-                    
-                    if "post_build" in target:
-                        f.write("add_custom_command(TARGET ${PROJECT_NAME} POST_BUILD\n")
-                        f.write(f"    COMMAND {target['post_build'][0]}\n")
-                        f.write("    COMMENT \"Executing post-build steps\"\n")
-                        f.write(")\n")
-                
-                print(f"Generated demo CMakeLists.txt: {demo_cmake}")
-            else:
-                print(f"Demo CMakeLists already exists, skipping: {demo_cmake}")
+            with span("emit_target", chip=chip_name, target=target.get("name")):
+                self.generate_demo_cmakelists(target, chip_name)
+    
+    def generate_demo_cmakelists(self, target, chip_name, force=False):
+        """Generate one demo's CMakeLists.txt, shared by every chip: it only hands the demo to sdk_add_demo()"""
+        target_name = target.get("name")
+        if not target_name:
+            return
+        
+        # Create demo directory
+        demo_dir = self.root_dir / "demo" / "vendor" / target_name
+        os.makedirs(demo_dir, exist_ok=True)
+        
+        # Generate demo directory CMakeLists
+        demo_cmake = demo_dir / "CMakeLists.txt"
+        
+        # Sources, flags and link inputs differ per chip, they come from the selected chip's chip_builds file
+        content = (f"# Auto-generated {target_name} demo CMake configuration\n"
+                   f"# Sources, compile options and link inputs come from the selected chip's target entry\n"
+                   f"project({target_name} C ASM)\n\n"
+                   "sdk_add_demo(${PROJECT_NAME})\n")
+        
+        # The content no longer depends on the chip, so only a changed template rewrites the file
+        if os.path.exists(demo_cmake) and not force:
+            with open(demo_cmake, 'r') as f:
+                if f.read() == content:
+                    log(f"Demo CMakeLists unchanged, skipping: {demo_cmake}", event="unchanged", path=demo_cmake)
+                    return
+        with open(demo_cmake, 'w') as f:
+            f.write(content)
+        log(f"Generated demo CMakeLists.txt: {demo_cmake}", event="generated", path=demo_cmake)
     
     def generate_toolchain_config(self):
         """Generate toolchain configuration that supports multiple chips"""
@@ -208,9 +678,157 @@ endif()
 """
             with open(toolchain_file, 'w') as f:
                 f.write(content)
-            print(f"Generated multi-chip toolchain config: {toolchain_file}")
+            log(f"Generated multi-chip toolchain config: {toolchain_file}", event="generated", path=toolchain_file)
         else:
-            print(f"Toolchain config already exists, skipping: {toolchain_file}")
+            log(f"Toolchain config already exists, skipping: {toolchain_file}", event="skipped", path=toolchain_file)
+    
+    def target_sources(self, target, pruned=()):
+        """Return the C and assembly sources a target compiles, from its directories and file entries, less pruned ones"""
+        sources = []
+        for dir_path in target.get("directories", []):
+            path = self.root_dir / dir_path
+            if path.is_dir():
+                sources += sorted(p for p in path.rglob("*") if p.suffix in (".c", ".S"))
+            elif path.suffix in (".c", ".S") and path.exists():
+                sources.append(path)
+        return [s for s in dict.fromkeys(sources) if s not in pruned]
+    
+    def expand_options(self, options):
+        """Split compile options into arguments with ${CMAKE_CURRENT_SOURCE_DIR} pointed at the root"""
+        args = []
+        for option in options:
+            args += shlex.split(option.replace("${CMAKE_CURRENT_SOURCE_DIR}", str(self.root_dir)))
+        return args
+    
+    def fatfs_unicode_source(self):
+        """Return the ffunicode.c sliced to the configured code page, generated once under build/fatfs"""
+        if self.fatfs_unicode is None:
+            self.fatfs_unicode = FfunicodeSlicer(self.root_dir, self.root_dir / "build" / "fatfs").generate()
+        return self.fatfs_unicode
+    
+    def directory_options(self, chip_name, build_dir=None, build_type=""):
+        """Return the options the CMake build adds to every target of a chip, in the order it adds them
+
+        With a .config, kconfig.cmake forces autoconf.h (written under <build_dir>/include as configure
+        does) and adds the OPT_LEVEL; the toolchain files follow.
+        """
+        options = []
+        config = self.root_dir / ".config"
+        if config.exists():
+            from gen_autoconf import AutoconfGenerator
+            include_dir = Path(build_dir or self.root_dir / "build").absolute() / "include"
+            autoconf = AutoconfGenerator(self.root_dir, include_dir)
+            if include_dir not in self.autoconf_dirs:
+                autoconf.generate_all()
+                self.autoconf_dirs.add(include_dir)
+            options += ["-include", str(autoconf.autoconf_h)]
+            values = autoconf.parse_config(config)
+            options += [f"-O{level}" for level in "0123" if values.get(f"OPT_LEVEL_{level}") == "y"][:1]
+        return options + toolchain_compile_options(chip_name, build_type)
+    
+    def write_config_header(self, config_dir, target_name):
+        """Write a target's build_config.h into config_dir like the CMake build does, unless unchanged; return config_dir"""
+        header = config_dir / "build_config.h"
+        content = CONFIG_HEADER_CONTENT.format(target=target_name)
+        if not header.exists() or header.read_text() != content:
+            os.makedirs(config_dir, exist_ok=True)
+            header.write_text(content)
+        return config_dir
+    
+    def iter_compile_commands(self, json_data, chip_name, source_dir, build_dir=None, build_type=""):
+        """Yield one compilation database entry per target source, straight from the config model
+
+        The arguments are the ones the CMake build of build_dir passes. Each entry also names its "target",
+        which the database file itself leaves out.
+        """
+        chip_flags = [f"-DCHIP_{chip_name.upper()}", f"-I{self.root_dir / 'chip' / source_dir / 'drivers'}"]
+        demo_dir = Path(build_dir or self.root_dir / "build").absolute() / "demo" / "vendor"
+        directory_options = self.directory_options(chip_name, build_dir, build_type)
+        pruned = self.select_pruned_drivers(json_data, chip_name)
+        fatfs_unicode = self.root_dir / FATFS_DIR / "ffunicode.c"
+        for target in json_data.get("targets", []):
+            if not target.get("name"):
+                continue
+            compiler = "tc32-elf-gcc" if "TC32" in target.get("toolchain", "") else "riscv32-elf-gcc"
+            # CMake drops repeated options, keeping the first; CMAKE_C_STANDARD comes last, as gnu since
+            # CMAKE_C_EXTENSIONS is left on
+            c_options = directory_options + self.expand_options(target.get("c_compile_options", []))
+            # The target's build_config.h comes first, as sdk_build_steps_<demo> puts it
+            config_dir = self.write_config_header(demo_dir / target["name"] / "config", target["name"])
+            c_args = ([compiler, chip_flags[0], f"-I{config_dir}"] + chip_flags[1:] + list(dict.fromkeys(c_options))
+                      + [f"-std=gnu{C_STANDARD}"])
+            asm_options = directory_options + self.expand_options(target.get("asm_compile_options", []))
+            asm_args = [compiler, chip_flags[0], f"-I{config_dir}"] + chip_flags[1:] + list(dict.fromkeys(asm_options))
+            for source in self.target_sources(target, pruned.get(target["name"], ())):
+                rel_path = source.relative_to(self.root_dir)
+                output = f"build/{chip_name}/{target['name']}/{rel_path.with_suffix('.o').as_posix()}"
+                args = asm_args if source.suffix == ".S" else c_args
+                # As in the CMake build, FatFs users compile the slice in place of the full unicode tables
+                if source == fatfs_unicode:
+                    source = self.fatfs_unicode_source()
+                    args = args + [f"-I{fatfs_unicode.parent}"]
+                yield {
+                    "directory": str(self.root_dir),
+                    "file": str(source),
+                    "arguments": args + ["-c", str(source), "-o", output],
+                    "output": output,
+                    "target": target["name"],
+                }
+    
+    def _write_compile_commands(self, entries, output):
+        """Stream entries into a compilation database, skipping duplicates; keep the old file if nothing changed"""
+        output = Path(output)
+        os.makedirs(output.parent, exist_ok=True)
+        tmp = output.with_name(f".{output.name}.tmp")
+        seen = set()
+        count = 0
+        with open(tmp, 'w') as f:
+            f.write("[")
+            for entry in entries:
+                # The same source built with the same flags by many demos is one entry
+                key = (entry["file"], tuple(entry["arguments"][:-2]))
+                if key in seen:
+                    continue
+                seen.add(key)
+                f.write(",\n" if count else "\n")
+                f.write(json.dumps({k: v for k, v in entry.items() if k != "target"}))
+                count += 1
+            f.write("\n]\n")
+        
+        # An unchanged database keeps its mtime, so IDEs do not re-index
+        if output.exists() and filecmp.cmp(tmp, output, shallow=False):
+            os.remove(tmp)
+            log(f"Compilation database unchanged, skipping: {output}", event="unchanged", path=output)
+        else:
+            os.replace(tmp, output)
+            log(f"Generated compilation database with {count} entries: {output}", event="generated", path=output)
+        return count
+    
+    def generate_compile_commands(self, chips=None, per_chip=False, output=None, build_dir=None, build_type=""):
+        """Write compile_commands.json for the given chips (default all), merged or one file per chip
+
+        The arguments match a CMake build in build_dir with the given CMAKE_BUILD_TYPE.
+        """
+        configs = []
+        for json_file in sorted(self.json_files):
+            chip_name = config_chip_name(json_file)
+            if chips and chip_name not in chips:
+                continue
+            json_data = self.parse_json(json_file)
+            if json_data:
+                configs.append((chip_name, json_data))
+        
+        def entries_of(chip_name, json_data):
+            return self.iter_compile_commands(json_data, chip_name, chip_source_dir(json_data, chip_name),
+                                              build_dir, build_type)
+        
+        if per_chip:
+            out_dir = Path(output) if output else self.root_dir / "build" / "compile_commands"
+            for chip_name, json_data in configs:
+                self._write_compile_commands(entries_of(chip_name, json_data), out_dir / chip_name / "compile_commands.json")
+        else:
+            merged = (entry for chip_name, json_data in configs for entry in entries_of(chip_name, json_data))
+            self._write_compile_commands(merged, output or self.root_dir / "compile_commands.json")
     
     def generate_all(self):
         """Generate all CMakeLists.txt files without overwriting existing ones"""
@@ -225,14 +843,34 @@ endif()
         
         for json_file in self.json_files:
             json_name = os.path.splitext(os.path.basename(json_file))[0]
-            print(f"Processing configuration file: {json_name}")
+            log(f"Processing configuration file: {json_name}", event="processing", config=json_name)
             
-            json_data = self.parse_json(json_file)
-            if json_data:
-                self.generate_subdir_cmakelists(json_data, json_name)
+            with span("chip", config=json_name):
+                json_data = self.parse_json(json_file)
+                if json_data:
+                    self.generate_subdir_cmakelists(json_data, json_name)
+        
+        # Host flavor for unit tests and benchmarks of the HAL, next to the chip builds
+        self.generate_host_cmake()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the CMake build from cmake_configs/*.json")
+    parser.add_argument("--compile-commands", action="store_true",
+                        help="only write compile_commands.json from the config model, without CMake")
+    parser.add_argument("--chip", action="append", default=None, help="restrict the database to this chip (repeatable)")
+    parser.add_argument("--per-chip", action="store_true", help="write one database per chip instead of a merged one")
+    parser.add_argument("-o", "--output", default=None, help="database file, or directory with --per-chip")
+    parser.add_argument("--build-dir", default=None,
+                        help="CMake build directory the database matches, for its autoconf.h (default: build)")
+    parser.add_argument("--build-type", default="", help="CMAKE_BUILD_TYPE the database matches")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+    
     # Assume the script runs in the SDK root directory
     generator = CMakeGenerator(os.getcwd())
-    generator.generate_all()
-    print("CMakeLists.txt generation completed without overwrites")
+    if args.compile_commands:
+        generator.generate_compile_commands(args.chip, args.per_chip, args.output, args.build_dir, args.build_type)
+    else:
+        generator.generate_all()
+        log("CMakeLists.txt generation completed without overwrites", event="done")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+import os
+import re
+import argparse
+import hashlib
+from pathlib import Path
+
+from instrumentation import log, span, add_arguments, configure_from_args
+
+FATFS_DIR = Path("3rd-party") / "fatfs"
+
+# Conditions made only of FF_CODE_PAGE, numbers, comparisons and &&/|| are decided here
+SLICEABLE_RE = re.compile(r'^(?:\s|FF_CODE_PAGE|\d+|==|!=|<=|>=|<|>|&&|\|\||\(|\))+$')
+TOKEN_RE = re.compile(r'FF_CODE_PAGE|\d+|==|!=|<=|>=|<|>|&&|\|\||\(|\)')
+# Binary operators of those conditions by C precedence, loosest first
+OPERATORS = [
+    {"||": lambda a, b: a or b},
+    {"&&": lambda a, b: a and b},
+    {"==": lambda a, b: a == b, "!=": lambda a, b: a != b},
+    {"<": lambda a, b: a < b, ">": lambda a, b: a > b, "<=": lambda a, b: a <= b, ">=": lambda a, b: a >= b},
+]
+
+
+class FfunicodeSlicer:
+    def __init__(self, root_dir, output_dir, config_path=".config"):
+        """Initialize the slicer with the project root and the directory receiving the trimmed source"""
+        self.root_dir = Path(root_dir).absolute()
+        self.output_dir = Path(output_dir).absolute()
+        self.config_path = self.root_dir / config_path
+        self.source = self.root_dir / FATFS_DIR / "ffunicode.c"
+        self.ffconf = self.root_dir / FATFS_DIR / "ffconf.h"
+        self.output = self.output_dir / "ffunicode.c"
+
+    def code_page(self):
+        """Return the configured code page: CONFIG_FATFS_CODE_PAGE from .config, else FF_CODE_PAGE in ffconf.h"""
+        if self.config_path.exists():
+            with open(self.config_path, 'r') as f:
+                match = re.search(r'^CONFIG_FATFS_CODE_PAGE=(\d+)$', f.read(), re.M)
+                if match:
+                    return int(match.group(1))
+        with open(self.ffconf, 'r') as f:
+            match = re.search(r'^\s*#define\s+FF_CODE_PAGE\s+(\d+)', f.read(), re.M)
+        if not match:
+            raise ValueError(f"FF_CODE_PAGE not found in {self.ffconf}")
+        return int(match.group(1))
+
+    def _evaluate(self, condition, code_page):
+        """Evaluate an FF_CODE_PAGE-only condition, or return None if it depends on anything else"""
+        condition = re.sub(r'/\*.*?\*/|//.*$', '', condition).strip()
+        if not condition or not SLICEABLE_RE.match(condition) or "FF_CODE_PAGE" not in condition:
+            return None
+        tokens = [str(code_page) if t == "FF_CODE_PAGE" else t for t in TOKEN_RE.findall(condition)]
+        try:
+            value = self._parse(tokens)
+        except IndexError:
+            value = None
+        if value is None or tokens:
+            raise ValueError(f"Malformed #if condition: {condition}")
+        return bool(value)
+
+    def _parse(self, tokens, level=0):
+        """Consume one expression of the operators from OPERATORS[level] on and return its C value"""
+        if level == len(OPERATORS):
+            token = tokens.pop(0)
+            if token != "(":
+                return int(token)
+            value = self._parse(tokens)
+            return value if tokens.pop(0) == ")" else None
+        value = self._parse(tokens, level + 1)
+        while tokens and tokens[0] in OPERATORS[level] and value is not None:
+            operator = OPERATORS[level][tokens.pop(0)]
+            right = self._parse(tokens, level + 1)
+            value = None if right is None else int(operator(value, right))
+        return value
+
+    def slice(self, text, code_page):
+        """Drop every conditional block on FF_CODE_PAGE that is inactive for code_page, keep all others"""
+        lines = []
+        # One frame per open #if: [sliced, active, taken] (sliced frames are decided here and not emitted)
+        stack = []
+        for line in text.splitlines(keepends=True):
+            match = re.match(r'^\s*#\s*(if|ifdef|ifndef|elif|else|endif)\b(.*)$', line)
+            emitting = all(frame[1] for frame in stack if frame[0])
+            if not match:
+                if emitting:
+                    lines.append(line)
+                continue
+
+            directive, condition = match.group(1), match.group(2)
+            if directive in ("if", "ifdef", "ifndef"):
+                value = self._evaluate(condition, code_page) if directive == "if" else None
+                stack.append([value is not None, bool(value), bool(value)])
+                if value is None and emitting:
+                    lines.append(line)
+            elif directive in ("elif", "else"):
+                frame = stack[-1]
+                if not frame[0]:
+                    if emitting:
+                        lines.append(line)
+                    continue
+                value = True if directive == "else" else self._evaluate(condition, code_page)
+                if value is None:
+                    raise ValueError(f"Cannot slice mixed #elif: {line.strip()}")
+                frame[1] = value and not frame[2]
+                frame[2] = frame[2] or value
+            else:
+                frame = stack.pop()
+                if not frame[0] and all(f[1] for f in stack if f[0]):
+                    lines.append(line)
+        return "".join(lines)
+
+    def generate(self, code_page=None):
+        """Write the trimmed ffunicode.c, unless one for the same code page and source already exists"""
+        code_page = self.code_page() if code_page is None else code_page
+        with open(self.source, 'r', encoding="utf-8", errors="surrogateescape") as f:
+            text = f.read()
+        source_hash = hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest()
+        stamp = f"/* Sliced from {FATFS_DIR.as_posix()}/ffunicode.c ({source_hash[:16]}) for FF_CODE_PAGE {code_page} */\n"
+
+        # The stamp line is the cache key: same source and code page means the output is still valid
+        if self.output.exists():
+            with open(self.output, 'r', encoding="utf-8", errors="surrogateescape") as f:
+                if f.readline() == stamp:
+                    log(f"ffunicode.c for code page {code_page} up to date, skipping: {self.output}",
+                        event="unchanged", path=self.output, code_page=code_page)
+                    return self.output
+
+        with span("slice", code_page=code_page):
+            sliced = self.slice(text, code_page)
+        # Fail the build if ffconf.h and the sliced code page ever disagree
+        guard = (f"#if FF_CODE_PAGE != {code_page}\n"
+                 f"#error \"ffunicode.c was sliced for code page {code_page}, regenerate it with gen_ffunicode.py\"\n"
+                 "#endif\n")
+        sliced = re.sub(r'^(#include "ff.h"\n)', lambda m: m.group(1) + guard, sliced, count=1, flags=re.M)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp = self.output.with_suffix(".tmp")
+        with open(tmp, 'w', encoding="utf-8", errors="surrogateescape") as f:
+            f.write(stamp + sliced)
+        os.replace(tmp, self.output)
+        log(f"Generated ffunicode.c for code page {code_page} ({len(text)} -> {len(sliced)} bytes): {self.output}",
+            event="generated", path=self.output, code_page=code_page, size=len(sliced))
+        return self.output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emit an ffunicode.c holding only the configured FatFs code page")
+    parser.add_argument("--root", default=os.getcwd(), help="SDK root directory")
+    parser.add_argument("--config", default=".config", help="resolved .config file")
+    parser.add_argument("--output", default=os.path.join("build", "fatfs"), help="output directory")
+    parser.add_argument("--code-page", type=int, default=None,
+                        help="code page to keep (default: CONFIG_FATFS_CODE_PAGE, else ffconf.h)")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    FfunicodeSlicer(args.root, args.output, args.config).generate(args.code_page)
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 import os
-import json
+import re
+import argparse
 import glob
 from pathlib import Path
 
+from instrumentation import log, span, add_arguments, configure_from_args
+from config_layers import load_config, chip_name, chip_source_dir
+
 class KconfigGenerator:
     def __init__(self, root_dir):
         """Initialize the Kconfig generator with the project root directory"""
@@ -14,15 +18,54 @@ class KconfigGenerator:
         
         # Ensure output directories exist
         os.makedirs(self.root_dir, exist_ok=True)
+        
+        # Chip name -> source directory and demo list, shared by all generators below
+        with span("resolve_chips"):
+            self.chips = self._extract_chips()
     
     def parse_json(self, json_path):
-        """Parse a single JSON configuration file"""
-        with open(json_path, 'r') as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError as e:
-                print(f"Error parsing {json_path}: {e}")
-                return None
+        """Parse a single JSON configuration file, resolving its layers into the flat format"""
+        try:
+            return load_config(json_path)
+        except (ValueError, OSError) as e:
+            log(f"Error parsing {json_path}: {e}", event="error", path=json_path)
+            return None
+    
+    def _extract_chips(self):
+        """Collect each chip's source directory under chip/ and the demos it provides"""
+        chips = {}
+        for json_file in sorted(self.json_files):
+            json_name = os.path.splitext(os.path.basename(json_file))[0]
+            if "PLATFORM_SDK_" not in json_name:
+                continue
+            chip = chip_name(json_file)
+            json_data = self.parse_json(json_file)
+            if not json_data:
+                continue
+            demos = [target["name"] for target in json_data.get("targets", []) if "name" in target]
+            chips[chip] = {"source_dir": chip_source_dir(json_data, chip), "demos": demos}
+        return chips
+    
+    def _demo_symbols(self):
+        """Map each DEMO_* symbol to its demo directory names and the chips providing it"""
+        # Collect all demos
+        demos = set()
+        for json_file in self.json_files:
+            json_data = self.parse_json(json_file)
+            if json_data and "targets" in json_data:
+                for target in json_data["targets"]:
+                    if "name" in target:
+                        demos.add(target["name"])
+        
+        # Names differing only in case (e.g. AUDIO_Demo / Audio_Demo) share one symbol
+        symbols = {}
+        for demo in sorted(demos):
+            entry = symbols.setdefault(f"DEMO_{demo.upper()}", {"names": [], "chips": []})
+            entry["names"].append(demo)
+            for chip, info in self.chips.items():
+                if demo in info["demos"] and chip not in entry["chips"]:
+                    entry["chips"].append(chip)
+        return symbols
     
     def generate_root_kconfig(self):
         """Generate the root Kconfig file"""
@@ -37,10 +80,13 @@ source "demo/Kconfig"
 
 # Include toolchain configurations
 source "tools/Kconfig"
+
+# Include third-party component configurations
+source "3rd-party/Kconfig"
 """
         with open(self.kconfig_root, 'w') as f:
             f.write(content)
-        print(f"Generated root Kconfig: {self.kconfig_root}")
+        log(f"Generated root Kconfig: {self.kconfig_root}", event="generated", path=self.kconfig_root)
     
     def generate_chip_kconfig(self):
         """Generate Kconfig configurations for chips using direct names"""
@@ -51,29 +97,27 @@ source "tools/Kconfig"
         content = "# Auto-generated chip configurations\n\n"
         content += "menu \"Chip Selection\"\n\n"
         
-        # Extract all chip names - using direct names like TC321X, B92, TL321X
-        chips = []
-        for json_file in self.json_files:
-            json_name = os.path.splitext(os.path.basename(json_file))[0]
-            if "PLATFORM_SDK_" in json_name:
-                # Remove prefixes to get direct chip names
-                chip = json_name.replace("PLATFORM_SDK_", "").replace("_cmake", "")
-                chips.append(chip)
+        # Chips are mutually exclusive, so exactly one chip is ever selected
+        chips = list(self.chips)
+        content += "choice\n"
+        content += "    prompt \"Target chip\"\n"
+        if chips:
+            content += f"    default CHIP_{chips[0].upper()}\n"
+        content += "\n"
         
         # Add chip selection configurations with direct names
-        for i, chip in enumerate(chips):
-            content += f"config CHIP_{chip.upper()}\n"  # e.g., CHIP_TC321X, CHIP_B92
+        for chip in chips:
+            content += f"config CHIP_{chip.upper()}\n"  # e.g., CHIP_TL_B92, CHIP_TL_TL321X
             content += f"    bool \"{chip}\"\n"  # Display name as direct chip name
-            if i == 0:
-                content += "    default y\n"
             content += f"    help\n"
             content += f"        Select {chip} as the target platform\n\n"
         
+        content += "endchoice\n\n"
         content += "endmenu\n"
         
         with open(chip_kconfig, 'w') as f:
             f.write(content)
-        print(f"Generated chip Kconfig: {chip_kconfig}")
+        log(f"Generated chip Kconfig: {chip_kconfig}", event="generated", path=chip_kconfig)
     
     def generate_demo_kconfig(self):
         """Generate Kconfig configurations for demo programs"""
@@ -84,27 +128,20 @@ source "tools/Kconfig"
         content = "# Auto-generated demo program configurations\n\n"
         content += "menu \"Demo Program Selection\"\n\n"
         
-        # Collect all demos
-        demos = set()
-        for json_file in self.json_files:
-            json_data = self.parse_json(json_file)
-            if json_data and "targets" in json_data:
-                for target in json_data["targets"]:
-                    if "name" in target:
-                        demos.add(target["name"])
-        
-        # Add demo selection configurations
-        for demo in sorted(demos):
-            content += f"config DEMO_{demo.upper()}\n"
-            content += f"    bool \"{demo}\"\n"
+        # Add demo selection configurations, only selectable for chips that provide them
+        for symbol, demo in self._demo_symbols().items():
+            content += f"config {symbol}\n"
+            content += f"    bool \"{' / '.join(demo['names'])}\"\n"
+            if demo["chips"]:
+                content += f"    depends on {' || '.join(f'CHIP_{chip.upper()}' for chip in demo['chips'])}\n"
             content += f"    help\n"
-            content += f"        Enable {demo} sample program\n\n"
+            content += f"        Enable {demo['names'][0]} sample program\n\n"
         
         content += "endmenu\n"
         
         with open(demo_kconfig, 'w') as f:
             f.write(content)
-        print(f"Generated demo Kconfig: {demo_kconfig}")
+        log(f"Generated demo Kconfig: {demo_kconfig}", event="generated", path=demo_kconfig)
     
     def generate_toolchain_kconfig(self):
         """Generate Kconfig configurations for toolchains"""
@@ -114,11 +151,16 @@ source "tools/Kconfig"
         
         content = "# Auto-generated toolchain configurations\n\n"
         
-        # Toolchain selection
+        # Toolchain selection, one toolchain per build (TC chips default to TC32)
         content += "menu \"Toolchain Selection\"\n\n"
+        content += "choice\n"
+        content += "    prompt \"Toolchain\"\n"
+        for chip in self.chips:
+            if chip[:2] == "TC":
+                content += f"    default TOOLCHAIN_TC32 if CHIP_{chip.upper()}\n"
+        content += "    default TOOLCHAIN_RISCV\n\n"
         content += "config TOOLCHAIN_RISCV\n"
         content += "    bool \"RISC-V Cross GCC\"\n"
-        content += "    default y\n"
         content += "    help\n"
         content += "        Use RISC-V cross-compilation toolchain\n\n"
         
@@ -126,10 +168,14 @@ source "tools/Kconfig"
         content += "    bool \"TC32-GCC Toolchain\"\n"
         content += "    help\n"
         content += "        Use TC32 compilation toolchain\n\n"
+        content += "endchoice\n\n"
         content += "endmenu\n\n"
         
-        # Optimization level configuration
+        # Optimization level configuration, exactly one level is selected
         content += "menu \"Compilation Optimization Level\"\n\n"
+        content += "choice\n"
+        content += "    prompt \"Optimization level\"\n"
+        content += "    default OPT_LEVEL_2\n\n"
         content += "config OPT_LEVEL_0\n"
         content += "    bool \"-O0 (No optimization)\"\n"
         
@@ -138,15 +184,43 @@ source "tools/Kconfig"
         
         content += "config OPT_LEVEL_2\n"
         content += "    bool \"-O2 (More optimization)\"\n"
-        content += "    default y\n"
         
         content += "config OPT_LEVEL_3\n"
         content += "    bool \"-O3 (Maximum optimization)\"\n"
+        content += "endchoice\n\n"
         content += "endmenu\n"
         
         with open(tool_kconfig, 'w') as f:
             f.write(content)
-        print(f"Generated toolchain Kconfig: {tool_kconfig}")
+        log(f"Generated toolchain Kconfig: {tool_kconfig}", event="generated", path=tool_kconfig)
+    
+    def generate_third_party_kconfig(self):
+        """Generate Kconfig configurations for third-party components"""
+        third_party_kconfig = self.root_dir / "3rd-party" / "Kconfig"
+        os.makedirs(third_party_kconfig.parent, exist_ok=True)
+        
+        # The FatFs code page defaults to the value in ffconf.h
+        code_page = 936
+        ffconf = self.root_dir / "3rd-party" / "fatfs" / "ffconf.h"
+        if ffconf.exists():
+            with open(ffconf, 'r') as f:
+                match = re.search(r'^\s*#define\s+FF_CODE_PAGE\s+(\d+)', f.read(), re.M)
+                if match:
+                    code_page = int(match.group(1))
+        
+        content = "# Auto-generated third-party component configurations\n\n"
+        content += "menu \"FatFs\"\n\n"
+        content += "config FATFS_CODE_PAGE\n"
+        content += "    int \"OEM code page\"\n"
+        content += f"    default {code_page}\n"
+        content += "    help\n"
+        content += "        OEM code page used by FatFs (e.g. 437, 932, 936). Only the tables\n"
+        content += "        of this code page are compiled; 0 keeps all of them.\n\n"
+        content += "endmenu\n"
+        
+        with open(third_party_kconfig, 'w') as f:
+            f.write(content)
+        log(f"Generated third-party Kconfig: {third_party_kconfig}", event="generated", path=third_party_kconfig)
     
     def generate_kconfig_cmake(self):
         """Generate file mapping Kconfig configurations to CMake variables with direct chip names"""
@@ -155,20 +229,102 @@ source "tools/Kconfig"
         kconfig_cmake = cmake_dir / "kconfig.cmake"
         
         content = "# Auto-generated Kconfig to CMake variable mapping\n\n"
-        content += "# Chip selection with direct chip names\n"
-        # Using direct chip names without extra prefixes
-        content += "if(CHIP_TC321X)\n"
-        content += "    set(CHIP_NAME \"TC321X\")\n"
-        content += "elseif(CHIP_TL321X)\n"
-        content += "    set(CHIP_NAME \"TL321X\")\n"
-        content += "elseif(CHIP_TL322X)\n"
-        content += "    set(CHIP_NAME \"TL322X\")\n"
-        content += "elseif(CHIP_TL721X)\n"
-        content += "    set(CHIP_NAME \"TL721X\")\n"
-        content += "elseif(CHIP_B91)\n"
-        content += "    set(CHIP_NAME \"B91\")\n"
-        content += "elseif(CHIP_B92)\n"
-        content += "    set(CHIP_NAME \"B92\")\n"
+        
+        # Load the resolved .config so the Kconfig selection is authoritative over stale cache entries
+        content += "# Load symbols from the Kconfig output file\n"
+        content += "if(NOT KCONFIG_CONFIG)\n"
+        content += "    set(KCONFIG_CONFIG \"${CMAKE_SOURCE_DIR}/.config\")\n"
+        content += "endif()\n"
+        content += "if(EXISTS \"${KCONFIG_CONFIG}\")\n"
+        content += "    file(STRINGS \"${KCONFIG_CONFIG}\" KCONFIG_LINES REGEX \"^(# )?CONFIG_[A-Za-z0-9_]+\")\n"
+        content += "    foreach(KCONFIG_LINE ${KCONFIG_LINES})\n"
+        content += "        if(KCONFIG_LINE MATCHES \"^# CONFIG_([A-Za-z0-9_]+) is not set\")\n"
+        content += "            set(${CMAKE_MATCH_1} OFF)\n"
+        content += "        elseif(KCONFIG_LINE MATCHES \"^CONFIG_([A-Za-z0-9_]+)=(.*)$\")\n"
+        content += "            set(KCONFIG_SYMBOL ${CMAKE_MATCH_1})\n"
+        content += "            set(KCONFIG_VALUE ${CMAKE_MATCH_2})\n"
+        content += "            if(KCONFIG_VALUE STREQUAL \"y\")\n"
+        content += "                set(${KCONFIG_SYMBOL} ON)\n"
+        content += "            else()\n"
+        content += "                string(REGEX REPLACE \"^\\\"(.*)\\\"$\" \"\\\\1\" KCONFIG_VALUE \"${KCONFIG_VALUE}\")\n"
+        content += "                set(${KCONFIG_SYMBOL} \"${KCONFIG_VALUE}\")\n"
+        content += "            endif()\n"
+        content += "        endif()\n"
+        content += "    endforeach()\n"
+        content += "    # Re-run configure whenever the selection changes\n"
+        content += "    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS \"${KCONFIG_CONFIG}\")\n"
+        content += "endif()\n\n"
+        
+        # autoconf.h plus include/config/<SYMBOL> stamps; the compiler launcher rewrites each
+        # depfile so a source only depends on the stamps of the symbols it references
+        content += "# Per-symbol autoconf header and dependency stamps\n"
+        content += "if(EXISTS \"${KCONFIG_CONFIG}\")\n"
+        content += "    find_package(Python3 COMPONENTS Interpreter)\n"
+        content += "endif()\n"
+        content += "if(EXISTS \"${KCONFIG_CONFIG}\" AND Python3_Interpreter_FOUND)\n"
+        content += "    set(AUTOCONF_DIR \"${CMAKE_BINARY_DIR}/include\")\n"
+        content += "    set(AUTOCONF_TOOL ${Python3_EXECUTABLE} ${CMAKE_SOURCE_DIR}/gen_autoconf.py\n"
+        content += "        --root ${CMAKE_SOURCE_DIR} --config ${KCONFIG_CONFIG} --output ${AUTOCONF_DIR})\n"
+        content += "    execute_process(COMMAND ${AUTOCONF_TOOL} WORKING_DIRECTORY ${CMAKE_SOURCE_DIR})\n"
+        content += "    # CURRENT_BUILD_* stamps come from build_config.h, refresh them when it changes\n"
+        content += "    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS\n"
+        content += "        \"${CMAKE_SOURCE_DIR}/demo/vendor/common/common/build_config.h\")\n"
+        content += "    add_compile_options(-include ${AUTOCONF_DIR}/generated/autoconf.h)\n"
+        content += "    # The launcher runs once per compiled unit, fixdep.py only imports the standard library\n"
+        content += "    set(AUTOCONF_LAUNCHER ${Python3_EXECUTABLE} -S ${CMAKE_SOURCE_DIR}/fixdep.py --output ${AUTOCONF_DIR} --launch)\n"
+        content += "    set(CMAKE_C_COMPILER_LAUNCHER ${AUTOCONF_LAUNCHER})\n"
+        content += "    set(CMAKE_ASM_COMPILER_LAUNCHER ${AUTOCONF_LAUNCHER})\n"
+        content += "endif()\n\n"
+        
+        # ffunicode.c carries every code page table, FatFs users compile the slice for the selected one
+        content += "# FatFs unicode tables trimmed to the selected code page\n"
+        content += "if(FATFS_CODE_PAGE AND Python3_Interpreter_FOUND)\n"
+        content += "    execute_process(COMMAND ${Python3_EXECUTABLE} ${CMAKE_SOURCE_DIR}/gen_ffunicode.py\n"
+        content += "        --root ${CMAKE_SOURCE_DIR} --code-page ${FATFS_CODE_PAGE} --output ${CMAKE_BINARY_DIR}/fatfs)\n"
+        content += "    set(FATFS_UNICODE_SOURCE \"${CMAKE_BINARY_DIR}/fatfs/ffunicode.c\")\n"
+        content += "    set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS\n"
+        content += "        \"${CMAKE_SOURCE_DIR}/3rd-party/fatfs/ffunicode.c\")\n"
+        content += "else()\n"
+        content += "    set(FATFS_UNICODE_SOURCE \"${CMAKE_SOURCE_DIR}/3rd-party/fatfs/ffunicode.c\")\n"
+        content += "endif()\n\n"
+        
+        # Chip selection, generated from the same chip list as chip/Kconfig
+        content += "# Chip selection with direct chip names, CHIP_DIR is the chip source directory under chip/\n"
+        for i, (chip, info) in enumerate(self.chips.items()):
+            content += f"{'if' if i == 0 else 'elseif'}(CHIP_{chip.upper()})\n"
+            content += f"    set(CHIP_NAME \"{chip}\")\n"
+            content += f"    set(CHIP_DIR \"{info['source_dir']}\")\n"
+        if self.chips:
+            content += "endif()\n\n"
+        
+        # Demos each chip provides
+        content += "# Demos provided by each chip\n"
+        for chip, info in self.chips.items():
+            content += f"set(CHIP_DEMOS_{chip.upper()}\n"
+            for demo in info["demos"]:
+                content += f"    {demo}\n"
+            content += ")\n"
+        content += "\n"
+        
+        # Demo selection
+        content += "# Demo selection\n"
+        content += "set(SDK_SELECTED_DEMOS \"\")\n"
+        for symbol, demo in self._demo_symbols().items():
+            content += f"if({symbol})\n"
+            content += f"    list(APPEND SDK_SELECTED_DEMOS {' '.join(demo['names'])})\n"
+            content += "endif()\n"
+        content += "\n"
+        
+        # Only keep demos that the selected chip actually provides
+        content += "# Drop selected demos that the selected chip does not provide\n"
+        content += "if(CHIP_NAME)\n"
+        content += "    set(SDK_CHIP_DEMOS \"\")\n"
+        content += "    foreach(DEMO ${SDK_SELECTED_DEMOS})\n"
+        content += "        if(DEMO IN_LIST CHIP_DEMOS_${CHIP_NAME})\n"
+        content += "            list(APPEND SDK_CHIP_DEMOS ${DEMO})\n"
+        content += "        endif()\n"
+        content += "    endforeach()\n"
+        content += "    set(SDK_SELECTED_DEMOS ${SDK_CHIP_DEMOS})\n"
         content += "endif()\n\n"
         
         # Optimization level
@@ -193,17 +349,20 @@ source "tools/Kconfig"
         
         with open(kconfig_cmake, 'w') as f:
             f.write(content)
-        print(f"Generated kconfig.cmake: {kconfig_cmake}")
+        log(f"Generated kconfig.cmake: {kconfig_cmake}", event="generated", path=kconfig_cmake)
     
     def generate_all(self):
         """Generate all Kconfig files"""
-        self.generate_root_kconfig()
-        self.generate_chip_kconfig()
-        self.generate_demo_kconfig()
-        self.generate_toolchain_kconfig()
-        self.generate_kconfig_cmake()
+        for step in (self.generate_root_kconfig, self.generate_chip_kconfig, self.generate_demo_kconfig,
+                     self.generate_toolchain_kconfig, self.generate_third_party_kconfig, self.generate_kconfig_cmake):
+            with span("emit", step=step.__name__):
+                step()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the Kconfig tree from cmake_configs/*.json")
+    add_arguments(parser)
+    configure_from_args(parser.parse_args())
+    
     generator = KconfigGenerator(os.getcwd())
     generator.generate_all()
-    print("Kconfig file generation completed")
+    log("Kconfig file generation completed", event="done")
@@ -1,14 +1,39 @@
 #!/usr/bin/env python3
 import os
 import glob
+import argparse
+from collections import Counter
 from pathlib import Path
 
+from instrumentation import log, span, add_arguments, configure_from_args
+from toolchain_probe import ToolchainProbe
+from config_layers import load_config, chip_name
+
+# Options toolchain.cmake and the chip toolchain files add to every target. gen_cmake repeats them in
+# compile_commands.json, so they live here rather than only in the generated files.
+C_STANDARD = 11
+WARNING_OPTIONS = ("-Wall", "-Wextra", "-Werror", "-Wno-unused-parameter", "-Wno-unused-function")
+BUILD_TYPE_OPTIONS = {"Debug": ("-O0", "-g3"), "": ("-O2", "-g")}
+ARCH_COMPILE_OPTIONS = {
+    "TC": ("-mtc32", "-mlittle-endian"),
+    "TL": ("-march=rv32imc", "-mabi=ilp32", "-mcmodel=medany"),
+}
+
+
+def toolchain_compile_options(chip, build_type=""):
+    """Return the options the toolchain files add for a chip and CMAKE_BUILD_TYPE, in the order CMake adds them"""
+    return (list(WARNING_OPTIONS) + list(BUILD_TYPE_OPTIONS.get(build_type, BUILD_TYPE_OPTIONS[""]))
+            + list(ARCH_COMPILE_OPTIONS.get(chip[:2], ())))
+
+
 class ToolchainGenerator:
-    def __init__(self, root_dir):
+    def __init__(self, root_dir, toolchain_roots=None):
         """Initialize toolchain generator with project root directory"""
         self.root_dir = Path(root_dir).absolute()
         self.cmake_dir = self.root_dir / "cmake"
         self.cmake_configs_dir = self.root_dir / "cmake_configs"
+        self.initial_cache_dir = self.cmake_dir / "initial_cache"
+        self.probe = ToolchainProbe(self.root_dir, toolchain_roots)
         
         # Create cmake directory if it doesn't exist
         os.makedirs(self.cmake_dir, exist_ok=True)
@@ -24,8 +49,7 @@ class ToolchainGenerator:
         for json_file in json_files:
             json_name = os.path.splitext(os.path.basename(json_file))[0]
             if "PLATFORM_SDK_" in json_name:
-                chip = json_name.replace("PLATFORM_SDK_", "").replace("_cmake", "")
-                chips.add(chip)
+                chips.add(chip_name(json_file))
         
         return sorted(chips)
     
@@ -35,51 +59,52 @@ class ToolchainGenerator:
         
         # Only generate if it doesn't exist
         if os.path.exists(toolchain_path):
-            print(f"Shared toolchain config already exists, skipping: {toolchain_path}")
+            log(f"Shared toolchain config already exists, skipping: {toolchain_path}", event="skipped", path=toolchain_path)
             return
         
-        content = """# Shared toolchain configuration for all chips
+        warnings = "".join(f"    {option}\n" for option in WARNING_OPTIONS)
+        content = f"""# Shared toolchain configuration for all chips
 # This file contains common settings shared across all chip platforms
 
 # Common compiler flags
-set(CMAKE_C_STANDARD 11)
+set(CMAKE_C_STANDARD {C_STANDARD})
 set(CMAKE_C_STANDARD_REQUIRED ON)
 
 # Common warning flags
 add_compile_options(
-    -Wall
-    -Wextra
-    -Werror
-    -Wno-unused-parameter
-    -Wno-unused-function
-)
+{warnings})
 
 # Common optimization flags
 if(CMAKE_BUILD_TYPE STREQUAL "Debug")
-    add_compile_options(-O0 -g3)
+    add_compile_options({" ".join(BUILD_TYPE_OPTIONS["Debug"])})
 else()
-    add_compile_options(-O2 -g)
+    add_compile_options({" ".join(BUILD_TYPE_OPTIONS[""])})
 endif()
 
-# Include chip-specific toolchain configuration
+# Cross compiling for a bare-metal target, the compiler checks cannot link a hosted executable
+set(CMAKE_SYSTEM_NAME Generic)
+set(CMAKE_TRY_COMPILE_TARGET_TYPE STATIC_LIBRARY)
+
+# Include chip-specific toolchain configuration, before project() probes the compiler
 """
         
         # Add chip-specific includes
         for chip in self.chips:
             chip_upper = chip.upper()
             content += f"if(CHIP_{chip_upper})\n"
-            content += f"    include(toolchain_{chip.lower()}.cmake)\n"
+            content += f"    include(${{CMAKE_CURRENT_LIST_DIR}}/toolchain_{chip.lower()}.cmake)\n"
             content += "endif()\n"
         
         with open(toolchain_path, 'w') as f:
             f.write(content)
         
-        print(f"Generated shared toolchain config: {toolchain_path}")
+        log(f"Generated shared toolchain config: {toolchain_path}", event="generated", path=toolchain_path)
     
     def generate_chip_toolchains(self):
         """Generate chip-specific toolchain configurations"""
         for chip in self.chips:
-            self._generate_single_chip_toolchain(chip)
+            with span("emit_chip", chip=chip):
+                self._generate_single_chip_toolchain(chip)
     
     def _generate_single_chip_toolchain(self, chip):
         """Generate toolchain file for a single chip"""
@@ -88,7 +113,7 @@ endif()
         
         # Only generate if it doesn't exist
         if os.path.exists(toolchain_path):
-            print(f"Chip toolchain for {chip} already exists, skipping: {toolchain_path}")
+            log(f"Chip toolchain for {chip} already exists, skipping: {toolchain_path}", event="skipped", path=toolchain_path)
             return
         
         # Base content - adjust based on actual chip requirements
@@ -106,8 +131,7 @@ endif()
             
             # Chip-specific compiler flags
             content += "add_compile_options(\n"
-            content += "    -mtc32\n"
-            content += "    -mlittle-endian\n"
+            content += "".join(f"    {option}\n" for option in ARCH_COMPILE_OPTIONS["TC"])
             content += ")\n\n"
             
             # Chip-specific linker flags
@@ -127,9 +151,7 @@ endif()
             
             # Chip-specific compiler flags
             content += "add_compile_options(\n"
-            content += "    -march=rv32imc\n"
-            content += "    -mabi=ilp32\n"
-            content += "    -mcmodel=medany\n"
+            content += "".join(f"    {option}\n" for option in ARCH_COMPILE_OPTIONS["TL"])
             content += ")\n\n"
             
             # Chip-specific linker flags
@@ -141,14 +163,112 @@ endif()
         with open(toolchain_path, 'w') as f:
             f.write(content)
         
-        print(f"Generated chip toolchain for {chip}: {toolchain_path}")
+        log(f"Generated chip toolchain for {chip}: {toolchain_path}", event="generated", path=toolchain_path)
     
+    def _chip_toolchain(self, chip):
+        """Return the chip's (toolchainVersionName, toolchain): the config's own, else the one most targets use"""
+        prefix, _, name = chip.partition("_")
+        json_path = self.cmake_configs_dir / f"{prefix}_PLATFORM_SDK_{name}_cmake.json"
+        json_data = load_config(json_path)
+        targets = json_data.get("targets", [])
+        version_name = json_data.get("toolchainVersionName") or ""
+        if not version_name and targets:
+            version_name = Counter(t.get("toolchainVersionName", "") for t in targets).most_common(1)[0][0]
+        toolchain = json_data.get("toolchainName") or (targets[0].get("toolchain", "") if targets else "")
+        return version_name, toolchain
+
+    def _initial_cache_content(self, chip, version_name, info):
+        """Return the initial cache script pre-seeding the compiler identity and ABI CMake would otherwise probe"""
+        lines = [
+            f"# Initial cache for {chip}, generated by generate_toolchain.py from the installed toolchains",
+            f"# Use for a new build tree: cmake -C cmake/initial_cache/{chip.lower()}.cmake -S . -B build/{chip}",
+            f"# Requested toolchain: {version_name or '(none)'}",
+            f"# Matched: {info['banner']}",
+            "",
+            "set(CMAKE_SYSTEM_NAME Generic CACHE STRING \"\")",
+            "set(CMAKE_TRY_COMPILE_TARGET_TYPE STATIC_LIBRARY CACHE STRING \"\")",
+        ]
+
+        def cache(name, value, kind="INTERNAL"):
+            if isinstance(value, (list, tuple)):
+                value = ";".join(p.replace("\\", "/") for p in value)
+            lines.append(f"set({name} \"{value}\" CACHE {kind} \"\")")
+
+        for tool in ("ar", "ranlib", "objcopy", "objdump", "size", "ld"):
+            if tool in info["tools"]:
+                cache(f"CMAKE_{tool.upper()}" if tool != "ld" else "CMAKE_LINKER", info["tools"][tool], "FILEPATH")
+
+        languages = [("C", info["path"]), ("ASM", info["path"])]
+        if "g++" in info["tools"]:
+            languages.append(("CXX", info["tools"]["g++"]))
+        for lang, compiler in languages:
+            lines.append("")
+            cache(f"CMAKE_{lang}_COMPILER", compiler, "FILEPATH")
+            cache(f"CMAKE_{lang}_COMPILER_ID", "GNU")
+            cache(f"CMAKE_{lang}_COMPILER_VERSION", info["version"])
+            if lang == "ASM":
+                continue
+            # Identification and the try_compile based checks are skipped, their results come from here
+            cache(f"CMAKE_{lang}_COMPILER_ID_RUN", "TRUE")
+            cache(f"CMAKE_{lang}_COMPILER_FORCED", "TRUE")
+            cache(f"CMAKE_{lang}_COMPILER_WORKS", "TRUE")
+            cache(f"CMAKE_{lang}_ABI_COMPILED", "TRUE")
+            cache(f"CMAKE_{lang}_COMPILER_ABI", "ELF")
+            cache(f"CMAKE_{lang}_SIZEOF_DATA_PTR", info["pointer_size"])
+            cache(f"CMAKE_{lang}_BYTE_ORDER", info["byte_order"])
+            if lang == "C":
+                cache("CMAKE_C_STANDARD_COMPUTED_DEFAULT", info["c_standard"])
+                cache("CMAKE_C_EXTENSIONS_COMPUTED_DEFAULT", "ON")
+            cache(f"CMAKE_{lang}_IMPLICIT_INCLUDE_DIRECTORIES", info["include_dirs"])
+            cache(f"CMAKE_{lang}_IMPLICIT_LINK_DIRECTORIES", info["link_dirs"])
+        return "\n".join(lines) + "\n"
+
+    def generate_initial_caches(self):
+        """Generate one initial cache script per chip for the installed toolchain matching its toolchainVersionName"""
+        os.makedirs(self.initial_cache_dir, exist_ok=True)
+        with span("discover"):
+            self.probe.discover()
+        for chip in self.chips:
+            cache_path = self.initial_cache_dir / f"{chip.lower()}.cmake"
+            version_name, toolchain = self._chip_toolchain(chip)
+            info = self.probe.match(version_name, toolchain)
+            if info is None:
+                # A stale script would pin a toolchain that is gone
+                if cache_path.exists():
+                    os.remove(cache_path)
+                log(f"No installed toolchain matches \"{version_name or toolchain}\" for {chip}, "
+                    f"configure will probe the compiler", event="skipped", chip=chip)
+                continue
+
+            content = self._initial_cache_content(chip, version_name, info)
+            if cache_path.exists():
+                with open(cache_path, 'r') as f:
+                    if f.read() == content:
+                        log(f"Initial cache for {chip} unchanged, skipping: {cache_path}", event="unchanged",
+                            path=cache_path)
+                        continue
+            with open(cache_path, 'w') as f:
+                f.write(content)
+            log(f"Generated initial cache for {chip} ({info['version']}, {info['path']}): {cache_path}",
+                event="generated", path=cache_path)
+
     def generate_all(self):
         """Generate all toolchain configuration files"""
         self.generate_shared_toolchain()
         self.generate_chip_toolchains()
-        print("Toolchain configuration generation completed")
+        self.generate_initial_caches()
+        log("Toolchain configuration generation completed", event="done")
 
 if __name__ == "__main__":
-    generator = ToolchainGenerator(os.getcwd())
+    parser = argparse.ArgumentParser(description="Generate the CMake toolchain files for every chip")
+    parser.add_argument("--toolchain-root", action="append", default=None,
+                        help="extra directory to search for toolchains (repeatable, also SDK_TOOLCHAIN_ROOTS)")
+    parser.add_argument("--rescan", action="store_true", help="probe every installed compiler again")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+    
+    generator = ToolchainGenerator(os.getcwd(), args.toolchain_root)
+    if args.rescan:
+        generator.probe.discover(rescan=True)
     generator.generate_all()
@@ -0,0 +1,206 @@
+/********************************************************************************************************
+ * @file    hal_bench.c
+ *
+ * @brief   This is the source file of the host HAL self-check and micro-benchmark
+ *
+ * @par     Built by the host flavor (chip_builds/HOST) against the mock backend. Each case first checks
+ *          the HAL result against the mock registers, then reports wall time and register accesses per
+ *          operation. Access counts are deterministic, so CI can compare them exactly between runs.
+ *          Usage: hal_bench [iterations]
+ *
+ *******************************************************************************************************/
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#include "drivers/device.h"
+#include "drivers/hal_gpio.h"
+#if HAL_HOST_HAS_UART
+    #include "drivers/hal_uart.h"
+#endif
+#include "dma.h"
+#include "mock_backend.h"
+
+static int failures = 0;
+
+#define CHECK(cond)                                                          \
+    do {                                                                     \
+        if (!(cond)) {                                                       \
+            fprintf(stderr, "%s:%d: check failed: %s\n", __FILE__, __LINE__, #cond); \
+            failures++;                                                      \
+        }                                                                    \
+    } while (0)
+
+static double now_ns(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1e9 + ts.tv_nsec;
+}
+
+static uint64_t start_us;
+
+/**
+ * @brief     Print one benchmark line: wall time, register accesses and virtual delay time per operation.
+ * @param[in] name     - the case name.
+ * @param[in] ops      - operations performed.
+ * @param[in] start_ns - start time.
+ * @param[in] accesses - register accesses during the run.
+ * @return    none
+ */
+static void report(const char *name, unsigned long ops, double start_ns, uint64_t accesses)
+{
+    double elapsed = now_ns() - start_ns;
+    printf("%-24s %10lu ops %10.1f ns/op %8.2f accesses/op %10.1f delay_us/op\n", name, ops, elapsed / ops,
+           (double)accesses / ops, (double)(mock_regs.time_us - start_us) / ops);
+}
+
+/* hal_bench_devices.c, registering from another translation unit than the lookups below */
+void hal_bench_register_devices(const char *names[DEVICE_MAX_COUNT], char storage[DEVICE_MAX_COUNT][16]);
+
+static void bench_device_lookup(unsigned long iterations)
+{
+    static const char *names[DEVICE_MAX_COUNT];
+    static char        storage[DEVICE_MAX_COUNT][16];
+    hal_bench_register_devices(names, storage);
+    CHECK(device_count == DEVICE_MAX_COUNT);
+    CHECK(device_find("dev0") != NULL && device_find("dev0")->dev == storage[0]);
+    CHECK(device_find(names[DEVICE_MAX_COUNT - 1]) != NULL);
+    CHECK(device_find("missing") == NULL);
+
+    double   start = now_ns();
+    start_us       = mock_regs.time_us;
+    unsigned hits  = 0;
+    for (unsigned long i = 0; i < iterations; i++) {
+        hits += device_find(names[i % DEVICE_MAX_COUNT]) != NULL;
+    }
+    CHECK(hits == iterations);
+    report("device_find", iterations, start, 0);
+}
+
+static void bench_gpio(unsigned long iterations)
+{
+    hal_gpio_dev_t *out[MOCK_GPIO_PIN_CNT / 2];
+    hal_gpio_dev_t *in[MOCK_GPIO_PIN_CNT / 2];
+
+    mock_reset();
+    for (int i = 0; i < MOCK_GPIO_PIN_CNT / 2; i++) {
+        out[i] = hal_gpio_init(i, HAL_GPIO_DIR_OUTPUT);
+        in[i]  = hal_gpio_init(i + MOCK_GPIO_PIN_CNT / 2, HAL_GPIO_DIR_INPUT);
+    }
+    CHECK(mock_regs.gpio_oen == 0x0000ffffu && mock_regs.gpio_ien == 0xffff0000u);
+    hal_gpio_set(out[3], true);
+    CHECK(mock_regs.gpio_out == (1u << 3) && hal_gpio_get(out[3]));
+    mock_gpio_drive(MOCK_GPIO_PIN_CNT / 2 + 5, 1);
+    CHECK(hal_gpio_get(in[5]) && !hal_gpio_get(in[4]));
+
+    /* Batch path: all output pins written, then all input pins read, per operation */
+    uint64_t accesses = mock_regs.accesses;
+    double   start    = now_ns();
+    start_us          = mock_regs.time_us;
+    unsigned ones     = 0;
+    for (unsigned long i = 0; i < iterations; i++) {
+        for (int p = 0; p < MOCK_GPIO_PIN_CNT / 2; p++) {
+            hal_gpio_set(out[p], (i + p) & 1);
+        }
+        for (int p = 0; p < MOCK_GPIO_PIN_CNT / 2; p++) {
+            ones += hal_gpio_get(in[p]);
+        }
+    }
+    CHECK(ones == iterations);
+    report("gpio_batch_16x_set_get", iterations, start, mock_regs.accesses - accesses);
+}
+
+#if HAL_HOST_HAS_UART
+static void bench_uart(unsigned long iterations)
+{
+    static uint8_t tx[256], rx[256];
+    for (unsigned i = 0; i < sizeof(tx); i++) {
+        tx[i] = (uint8_t)(i * 7 + 1);
+    }
+
+    mock_reset();
+    hal_uart_dev_t *dev = hal_uart_init(115200, HAL_UART_PARITY_NONE, HAL_UART_STOPBIT_1, HAL_UART_MODE_POLLING);
+    CHECK(dev != NULL && mock_regs.uart_baud == 115200);
+
+    CHECK(hal_uart_send(dev, tx, sizeof(tx)) == sizeof(tx));
+    CHECK(mock_uart_drain(rx, sizeof(rx)) == sizeof(rx) && memcmp(tx, rx, sizeof(tx)) == 0);
+    CHECK(mock_uart_feed(tx, 16) == 16);
+    CHECK(hal_uart_recv(dev, rx, 16, 100) == 16 && memcmp(tx, rx, 16) == 0);
+    CHECK(hal_uart_recv(dev, rx, 1, 5) == 0 && mock_regs.time_us >= 5000);
+
+    uint64_t accesses = mock_regs.accesses;
+    double   start    = now_ns();
+    start_us          = mock_regs.time_us;
+    for (unsigned long i = 0; i < iterations; i++) {
+        hal_uart_send(dev, tx, sizeof(tx));
+        mock_uart_drain(rx, sizeof(rx));
+    }
+    report("uart_send_256B", iterations, start, mock_regs.accesses - accesses);
+
+    accesses = mock_regs.accesses;
+    start    = now_ns();
+    start_us = mock_regs.time_us;
+    for (unsigned long i = 0; i < iterations; i++) {
+        mock_uart_feed(tx, sizeof(tx));
+        hal_uart_recv(dev, rx, sizeof(rx), sizeof(rx));
+    }
+    CHECK(memcmp(tx, rx, sizeof(tx)) == 0);
+    report("uart_recv_256B", iterations, start, mock_regs.accesses - accesses);
+    hal_uart_deinit(dev);
+}
+#endif
+
+static void bench_dma(unsigned long iterations)
+{
+    static uint8_t src[1024], dst[1024];
+    for (unsigned i = 0; i < sizeof(src); i++) {
+        src[i] = (uint8_t)(i ^ 0x5a);
+    }
+
+    mock_reset();
+    mock_dma_latency_polls = 4;
+    dma_set_address(DMA_CHN0, (uintptr_t)src, (uintptr_t)dst);
+    dma_set_transfer_count(DMA_CHN0, sizeof(src));
+    dma_chn_en(DMA_CHN0);
+    unsigned polls = 0;
+    while (dma_chn_is_busy(DMA_CHN0)) {
+        polls++;
+    }
+    CHECK(polls == 4 && memcmp(src, dst, sizeof(src)) == 0 && mock_dma[DMA_CHN0].bytes == sizeof(src));
+    mock_dma_latency_polls = 0;
+
+    uint64_t accesses = mock_regs.accesses;
+    double   start    = now_ns();
+    start_us          = mock_regs.time_us;
+    for (unsigned long i = 0; i < iterations; i++) {
+        dma_set_address(DMA_CHN1, (uintptr_t)src, (uintptr_t)dst);
+        dma_set_transfer_count(DMA_CHN1, sizeof(src));
+        dma_chn_en(DMA_CHN1);
+        while (dma_chn_is_busy(DMA_CHN1)) {
+        }
+    }
+    report("dma_copy_1KiB", iterations, start, mock_regs.accesses - accesses);
+}
+
+int main(int argc, char **argv)
+{
+    unsigned long iterations = argc > 1 ? strtoul(argv[1], NULL, 0) : 100000;
+    if (iterations == 0) {
+        iterations = 1;
+    }
+
+    bench_device_lookup(iterations);
+    bench_gpio(iterations);
+    bench_dma(iterations / 16 + 1);
+#if HAL_HOST_HAS_UART
+    bench_uart(iterations / 16 + 1);
+#endif
+
+    if (failures) {
+        fprintf(stderr, "%d check(s) failed\n", failures);
+        return 1;
+    }
+    return 0;
+}
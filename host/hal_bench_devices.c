@@ -0,0 +1,28 @@
+/********************************************************************************************************
+ * @file    hal_bench_devices.c
+ *
+ * @brief   This is the source file of the device registrations for the host HAL self-check
+ *
+ * @par     Compiled as its own translation unit, so hal_bench.c only finds these devices if every unit
+ *          shares the one device table defined in drivers/device.c.
+ *
+ *******************************************************************************************************/
+#include <stdio.h>
+
+#include "drivers/device.h"
+
+/**
+ * @brief     Register DEVICE_MAX_COUNT devices named "dev<i>", each pointing at its name storage.
+ * @param[out] names   - the registered names.
+ * @param[out] storage - the name storage, also used as the device handles.
+ * @return    none
+ */
+void hal_bench_register_devices(const char *names[DEVICE_MAX_COUNT], char storage[DEVICE_MAX_COUNT][16])
+{
+    for (int i = 0; i < DEVICE_MAX_COUNT; i++) {
+        snprintf(storage[i], 16, "dev%d", i);
+        names[i]        = storage[i];
+        device_t device = {.name = names[i], .type = (i & 1) ? DEVICE_TYPE_UART : DEVICE_TYPE_GPIO, .dev = storage[i]};
+        device_register(&device);
+    }
+}
@@ -0,0 +1,41 @@
+/********************************************************************************************************
+ * @file    clock.h
+ *
+ * @brief   This is the header file of the host mock clock driver
+ *
+ *******************************************************************************************************/
+#ifndef MOCK_CLOCK_H
+#define MOCK_CLOCK_H
+
+#include "mock_backend.h"
+
+/**
+ * @brief  Clock configuration, same layout as the chip drivers' sys_clk_t.
+ */
+typedef struct
+{
+    unsigned short pll_clk;  /**< pll clk */
+    unsigned char  cclk;     /**< cpu clk */
+    unsigned char  hclk;     /**< hclk */
+    unsigned char  pclk;     /**< pclk */
+    unsigned char  mspi_clk; /**< mspi_clk */
+} sys_clk_t;
+
+extern sys_clk_t sys_clk;
+
+/**
+ * @brief     Advance the virtual clock instead of spinning.
+ * @param[in] microsec - the time to wait.
+ * @return    none
+ */
+static inline void delay_us(unsigned int microsec)
+{
+    mock_regs.time_us += microsec;
+}
+
+static inline void delay_ms(unsigned int millisec)
+{
+    mock_regs.time_us += (uint64_t)millisec * 1000;
+}
+
+#endif
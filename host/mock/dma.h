@@ -0,0 +1,67 @@
+/********************************************************************************************************
+ * @file    dma.h
+ *
+ * @brief   This is the header file of the host mock DMA driver
+ *
+ *******************************************************************************************************/
+#ifndef MOCK_DMA_H
+#define MOCK_DMA_H
+
+#include "mock_backend.h"
+
+typedef enum
+{
+    DMA_CHN0,
+    DMA_CHN1,
+    DMA_CHN2,
+    DMA_CHN3,
+    DMA_CHN4,
+    DMA_CHN5,
+    DMA_CHN6,
+    DMA_CHN7,
+} dma_chn_e;
+
+typedef dma_chn_e dma_chn_t;
+
+typedef struct
+{
+    unsigned int config;
+} dma_config_t;
+
+static inline void dma_config(dma_chn_e chn, const dma_config_t *config)
+{
+    (void)chn;
+    (void)config;
+    mock_regs.accesses++;
+}
+
+static inline void dma_set_address(dma_chn_e chn, uintptr_t src_addr, uintptr_t dst_addr)
+{
+    mock_regs.accesses += 2;
+    mock_dma[chn].src = src_addr;
+    mock_dma[chn].dst = dst_addr;
+}
+
+static inline void dma_set_transfer_count(dma_chn_e chn, unsigned int len)
+{
+    mock_regs.accesses++;
+    mock_dma[chn].size = len;
+}
+
+static inline void dma_chn_en(dma_chn_e chn)
+{
+    mock_dma_start(chn);
+}
+
+static inline void dma_chn_dis(dma_chn_e chn)
+{
+    mock_regs.accesses++;
+    mock_dma[chn].busy_polls = 0;
+}
+
+static inline unsigned int dma_chn_is_busy(dma_chn_e chn)
+{
+    return mock_dma_poll(chn);
+}
+
+#endif
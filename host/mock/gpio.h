@@ -0,0 +1,110 @@
+/********************************************************************************************************
+ * @file    gpio.h
+ *
+ * @brief   This is the header file of the host mock GPIO driver
+ *
+ *******************************************************************************************************/
+#ifndef MOCK_GPIO_H
+#define MOCK_GPIO_H
+
+#include "mock_backend.h"
+
+typedef uint8_t gpio_pin_e;
+
+typedef enum
+{
+    AS_GPIO,
+    GPIO_FUN_UART,
+} gpio_func_e;
+
+#define MOCK_PIN_BIT(pin) (1u << ((pin) & (MOCK_GPIO_PIN_CNT - 1)))
+
+static inline void gpio_function_en(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    mock_regs.gpio_func |= MOCK_PIN_BIT(pin);
+}
+
+static inline void gpio_function_dis(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    mock_regs.gpio_func &= ~MOCK_PIN_BIT(pin);
+}
+
+static inline void gpio_set_func(gpio_pin_e pin, gpio_func_e func)
+{
+    if (func == AS_GPIO) {
+        gpio_function_en(pin);
+    } else {
+        gpio_function_dis(pin);
+    }
+}
+
+static inline void gpio_output_en(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    mock_regs.gpio_oen |= MOCK_PIN_BIT(pin);
+}
+
+static inline void gpio_output_dis(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    mock_regs.gpio_oen &= ~MOCK_PIN_BIT(pin);
+}
+
+static inline void gpio_input_en(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    mock_regs.gpio_ien |= MOCK_PIN_BIT(pin);
+}
+
+static inline void gpio_input_dis(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    mock_regs.gpio_ien &= ~MOCK_PIN_BIT(pin);
+}
+
+static inline void gpio_write(gpio_pin_e pin, unsigned int value)
+{
+    mock_regs.accesses++;
+    if (value) {
+        mock_regs.gpio_out |= MOCK_PIN_BIT(pin);
+    } else {
+        mock_regs.gpio_out &= ~MOCK_PIN_BIT(pin);
+    }
+}
+
+static inline void gpio_set_high_level(gpio_pin_e pin)
+{
+    gpio_write(pin, 1);
+}
+
+static inline void gpio_set_low_level(gpio_pin_e pin)
+{
+    gpio_write(pin, 0);
+}
+
+static inline void gpio_toggle(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    mock_regs.gpio_out ^= MOCK_PIN_BIT(pin);
+}
+
+/**
+ * @brief     Read a pin: an output pin reads back its own level, an input pin the driven one.
+ * @param[in] pin - the pin.
+ * @return    0 or non-zero.
+ */
+static inline unsigned int gpio_read(gpio_pin_e pin)
+{
+    mock_regs.accesses++;
+    uint32_t levels = (mock_regs.gpio_out & mock_regs.gpio_oen) | (mock_regs.gpio_in & ~mock_regs.gpio_oen);
+    return levels & MOCK_PIN_BIT(pin);
+}
+
+static inline unsigned int gpio_get_level(gpio_pin_e pin)
+{
+    return gpio_read(pin) ? 1 : 0;
+}
+
+#endif
@@ -0,0 +1,147 @@
+/********************************************************************************************************
+ * @file    mock_backend.c
+ *
+ * @brief   This is the source file of the host mock register and DMA backend
+ *
+ *******************************************************************************************************/
+#include <string.h>
+
+#include "mock_backend.h"
+#include "clock.h"
+
+mock_regs_t    mock_regs;
+mock_dma_chn_t mock_dma[MOCK_DMA_CHN_CNT];
+uint32_t       mock_dma_latency_polls = 0;
+sys_clk_t      sys_clk = {.pclk = 24, .hclk = 48, .cclk = 96};
+
+/* Software FIFOs behind the UART data register, power of two sized so indices wrap with a mask */
+static struct
+{
+    uint8_t  buf[MOCK_UART_FIFO_SIZE];
+    uint32_t head;
+    uint32_t tail;
+} uart_tx_fifo, uart_rx_fifo;
+
+#define FIFO_USED(f) ((f).head - (f).tail)
+#define FIFO_MASK    (MOCK_UART_FIFO_SIZE - 1)
+
+void mock_reset(void)
+{
+    memset(&mock_regs, 0, sizeof(mock_regs));
+    memset(mock_dma, 0, sizeof(mock_dma));
+    mock_regs.uart_data = MOCK_UART_DATA_IDLE;
+    uart_tx_fifo.head = uart_tx_fifo.tail = 0;
+    uart_rx_fifo.head = uart_rx_fifo.tail = 0;
+}
+
+void mock_gpio_drive(uint8_t pin, uint8_t level)
+{
+    if (pin >= MOCK_GPIO_PIN_CNT) {
+        return;
+    }
+    if (level) {
+        mock_regs.gpio_in |= (1u << pin);
+    } else {
+        mock_regs.gpio_in &= ~(1u << pin);
+    }
+}
+
+uint32_t mock_uart_feed(const uint8_t *data, uint32_t len)
+{
+    uint32_t i;
+    for (i = 0; i < len && FIFO_USED(uart_rx_fifo) < MOCK_UART_FIFO_SIZE; i++) {
+        uart_rx_fifo.buf[uart_rx_fifo.head++ & FIFO_MASK] = data[i];
+    }
+    return i;
+}
+
+/**
+ * @brief     Move a byte written to the data register into the transmit FIFO.
+ * @return    1 while the transmit FIFO is full (busy), else 0.
+ * @note      Register writes cannot be trapped on the host, so a write is noticed at the next busy
+ *            poll, which the adapters do before every byte, or when the test drains the FIFO.
+ */
+uint32_t mock_uart_tx_poll(void)
+{
+    mock_regs.accesses++;
+    if (mock_regs.uart_rx_loaded) {
+        /* The byte in the register was received and has been read */
+        mock_regs.uart_rx_loaded = 0;
+        mock_regs.uart_data      = MOCK_UART_DATA_IDLE;
+    } else if (mock_regs.uart_data != MOCK_UART_DATA_IDLE) {
+        if (FIFO_USED(uart_tx_fifo) >= MOCK_UART_FIFO_SIZE) {
+            return 1;
+        }
+        uart_tx_fifo.buf[uart_tx_fifo.head++ & FIFO_MASK] = (uint8_t)mock_regs.uart_data;
+        mock_regs.uart_data = MOCK_UART_DATA_IDLE;
+    }
+    return 0;
+}
+
+/**
+ * @brief     Load the next received byte into the data register.
+ * @return    1 if a byte is ready to be read from the data register, else 0.
+ */
+uint32_t mock_uart_rx_poll(void)
+{
+    /* The byte loaded by the previous poll has been read by now */
+    mock_uart_tx_poll();
+    if (FIFO_USED(uart_rx_fifo) == 0) {
+        return 0;
+    }
+    mock_regs.uart_data      = uart_rx_fifo.buf[uart_rx_fifo.tail++ & FIFO_MASK];
+    mock_regs.uart_rx_loaded = 1;
+    return 1;
+}
+
+uint32_t mock_uart_drain(uint8_t *data, uint32_t len)
+{
+    uint32_t i;
+    if (!mock_regs.uart_rx_loaded) {
+        mock_uart_tx_poll();
+    }
+    for (i = 0; i < len && FIFO_USED(uart_tx_fifo); i++) {
+        data[i] = uart_tx_fifo.buf[uart_tx_fifo.tail++ & FIFO_MASK];
+    }
+    return i;
+}
+
+/**
+ * @brief     Run a transfer: to or from the UART data register it goes through the FIFOs, else memcpy.
+ * @param[in] chn - the DMA channel.
+ * @return    none
+ */
+void mock_dma_start(uint32_t chn)
+{
+    mock_dma_chn_t *c   = &mock_dma[chn % MOCK_DMA_CHN_CNT];
+    uint8_t        *src = (uint8_t *)(uintptr_t)c->src;
+    uint8_t        *dst = (uint8_t *)(uintptr_t)c->dst;
+    uint32_t        i;
+
+    mock_regs.accesses++;
+    if (dst == (uint8_t *)&mock_regs.uart_data) {
+        for (i = 0; i < c->size && FIFO_USED(uart_tx_fifo) < MOCK_UART_FIFO_SIZE; i++) {
+            uart_tx_fifo.buf[uart_tx_fifo.head++ & FIFO_MASK] = src[i];
+        }
+    } else if (src == (uint8_t *)&mock_regs.uart_data) {
+        for (i = 0; i < c->size && FIFO_USED(uart_rx_fifo); i++) {
+            dst[i] = uart_rx_fifo.buf[uart_rx_fifo.tail++ & FIFO_MASK];
+        }
+    } else {
+        memcpy(dst, src, c->size);
+        i = c->size;
+    }
+    c->bytes += i;
+    c->busy_polls = mock_dma_latency_polls;
+}
+
+uint32_t mock_dma_poll(uint32_t chn)
+{
+    mock_dma_chn_t *c = &mock_dma[chn % MOCK_DMA_CHN_CNT];
+    mock_regs.accesses++;
+    if (c->busy_polls) {
+        c->busy_polls--;
+        return 1;
+    }
+    return 0;
+}
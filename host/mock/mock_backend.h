@@ -0,0 +1,96 @@
+/********************************************************************************************************
+ * @file    mock_backend.h
+ *
+ * @brief   This is the header file of the host mock register and DMA backend
+ *
+ * @par     The host build flavor (chip_builds/HOST) compiles the HAL and the chip adapters against
+ *          the gpio.h/uart.h/dma.h/clock.h in this directory instead of the chip drivers. The mock keeps
+ *          the peripheral registers in RAM, moves UART bytes through software FIFOs and runs DMA
+ *          transfers as memcpy, so HAL logic can be unit-tested and benchmarked on the build host.
+ *
+ *******************************************************************************************************/
+#ifndef MOCK_BACKEND_H
+#define MOCK_BACKEND_H
+
+#include <stdint.h>
+
+#define MOCK_GPIO_PIN_CNT      32
+#define MOCK_UART_FIFO_SIZE    4096
+#define MOCK_DMA_CHN_CNT       8
+
+/* The data register holds this value while no byte is waiting to be shifted out */
+#define MOCK_UART_DATA_IDLE    0xffffffffu
+
+/**
+ * @brief  Peripheral register file of the mock chip.
+ */
+typedef struct
+{
+    volatile uint32_t gpio_func;    /* bit per pin: GPIO function enabled */
+    volatile uint32_t gpio_oen;     /* bit per pin: output enabled */
+    volatile uint32_t gpio_ien;     /* bit per pin: input enabled */
+    volatile uint32_t gpio_out;     /* output levels */
+    volatile uint32_t gpio_in;      /* levels driven onto the pins by the test */
+    volatile uint32_t uart_data;    /* UART data register, shared by TX and RX like on the chip */
+    volatile uint32_t uart_ctrl;    /* bit0/1: DMA rx/tx enable, bit2/3: irq rx/tx enable */
+    volatile uint32_t uart_baud;
+    uint32_t          uart_rx_loaded; /* uart_data holds a received byte, not one to send */
+    uint64_t          accesses;     /* register accesses, the mock's measure of bus traffic */
+    uint64_t          time_us;      /* virtual time, advanced by delay_us() */
+} mock_regs_t;
+
+/**
+ * @brief  Register set of one mock DMA channel.
+ */
+typedef struct
+{
+    uintptr_t src;                  /* full host addresses, the chip's 32-bit ones do not fit */
+    uintptr_t dst;
+    uint32_t  size;
+    uint32_t  busy_polls;           /* polls of dma_chn_is_busy() left before the transfer completes */
+    uint64_t  bytes;                /* bytes moved since mock_reset() */
+} mock_dma_chn_t;
+
+extern mock_regs_t    mock_regs;
+extern mock_dma_chn_t mock_dma[MOCK_DMA_CHN_CNT];
+
+/* Polls of dma_chn_is_busy() a transfer takes, to model DMA latency (default 0: done at once) */
+extern uint32_t mock_dma_latency_polls;
+
+/**
+ * @brief     Reset all registers, FIFOs, DMA channels, counters and the virtual clock.
+ * @return    none
+ */
+void mock_reset(void);
+
+/**
+ * @brief     Drive an input level onto a pin, as the outside world would.
+ * @param[in] pin   - pin index, 0 to MOCK_GPIO_PIN_CNT - 1.
+ * @param[in] level - 0 or 1.
+ * @return    none
+ */
+void mock_gpio_drive(uint8_t pin, uint8_t level);
+
+/**
+ * @brief     Queue bytes in the UART receive FIFO.
+ * @param[in] data - the bytes the peer sends.
+ * @param[in] len  - the number of bytes.
+ * @return    the number of bytes queued, fewer when the FIFO is full.
+ */
+uint32_t mock_uart_feed(const uint8_t *data, uint32_t len);
+
+/**
+ * @brief      Take the bytes the UART has sent so far out of the transmit FIFO.
+ * @param[out] data - buffer receiving the bytes.
+ * @param[in]  len  - the size of the buffer.
+ * @return     the number of bytes taken.
+ */
+uint32_t mock_uart_drain(uint8_t *data, uint32_t len);
+
+/* Internal to the mock driver headers */
+uint32_t mock_uart_tx_poll(void);
+uint32_t mock_uart_rx_poll(void);
+void     mock_dma_start(uint32_t chn);
+uint32_t mock_dma_poll(uint32_t chn);
+
+#endif
@@ -0,0 +1,53 @@
+/********************************************************************************************************
+ * @file    uart.h
+ *
+ * @brief   This is the header file of the host mock UART driver (single UART variant)
+ *
+ *******************************************************************************************************/
+#ifndef MOCK_UART_H
+#define MOCK_UART_H
+
+#include "mock_backend.h"
+
+#define reg_uart_data (mock_regs.uart_data)
+
+static inline void uart_init_baudrate(unsigned int baudrate, unsigned int sys_clk, unsigned int parity,
+                                      unsigned int stop_bit)
+{
+    (void)sys_clk;
+    (void)parity;
+    (void)stop_bit;
+    mock_regs.accesses++;
+    mock_regs.uart_baud = baudrate;
+}
+
+static inline void uart_dma_enable(unsigned char rx_dma_en, unsigned char tx_dma_en)
+{
+    mock_regs.accesses++;
+    mock_regs.uart_ctrl = (mock_regs.uart_ctrl & ~0x3u) | (rx_dma_en ? 0x1u : 0) | (tx_dma_en ? 0x2u : 0);
+}
+
+static inline void uart_irq_enable(unsigned char rx_irq_en, unsigned char tx_irq_en)
+{
+    mock_regs.accesses++;
+    mock_regs.uart_ctrl = (mock_regs.uart_ctrl & ~0xcu) | (rx_irq_en ? 0x4u : 0) | (tx_irq_en ? 0x8u : 0);
+}
+
+static inline void uart_ndma_irq_triglevel(unsigned char rx_level, unsigned char tx_level)
+{
+    (void)rx_level;
+    (void)tx_level;
+    mock_regs.accesses++;
+}
+
+static inline unsigned int uart_tx_is_busy(void)
+{
+    return mock_uart_tx_poll();
+}
+
+static inline unsigned int uart_rx_data_ready(void)
+{
+    return mock_uart_rx_poll();
+}
+
+#endif
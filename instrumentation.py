@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import atexit
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+# Per-file events that quiet mode only counts
+FILE_EVENTS = ("generated", "skipped", "unchanged", "processing", "done", "stamps")
+
+
+class Instrumentation:
+    def __init__(self):
+        """Initialize from SDK_GEN_LOG, SDK_GEN_PROFILE and SDK_GEN_TRACEMALLOC, so child generators inherit the setup"""
+        self.mode = "text"
+        self.profile_path = None
+        self.trace_memory = False
+        self.profiler = None
+        self.start = time.perf_counter()
+        self.counts = {}
+        # span name -> [count, total seconds, max seconds]
+        self.spans = {}
+        # Open spans per thread, generators running phases in parallel threads nest them independently
+        self.local = threading.local()
+        self.configure(os.environ.get("SDK_GEN_LOG"), os.environ.get("SDK_GEN_PROFILE"),
+                       os.environ.get("SDK_GEN_TRACEMALLOC") == "1")
+
+    def configure(self, mode=None, profile=None, trace_memory=False):
+        """Select text, json or quiet output and start the optional cProfile / tracemalloc capture"""
+        if mode:
+            if mode not in ("text", "json", "quiet"):
+                raise ValueError(f"Unknown log mode: {mode}")
+            self.mode = mode
+            os.environ["SDK_GEN_LOG"] = mode
+        if profile and self.profiler is None:
+            self.profile_path = profile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if trace_memory and not tracemalloc.is_tracing():
+            self.trace_memory = True
+            tracemalloc.start(10)
+
+    @property
+    def stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def _emit(self, record):
+        """Write one JSON line"""
+        sys.stdout.write(json.dumps(record, default=str) + "\n")
+
+    def log(self, message, event="info", **fields):
+        """Log one event: the message in text mode, a JSON line in json mode, counted only in quiet mode"""
+        self.counts[event] = self.counts.get(event, 0) + 1
+        if self.mode == "json":
+            record = {"t": round(time.perf_counter() - self.start, 6), "event": event, "message": message}
+            if self.stack:
+                record["span"] = self.stack[-1]
+            record.update(fields)
+            self._emit(record)
+        elif self.mode == "text" or event not in FILE_EVENTS:
+            print(message)
+
+    @contextmanager
+    def span(self, name, **fields):
+        """Time a phase; totals per span name are reported by summary()"""
+        self.stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stack.pop()
+            stats = self.spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            if self.mode == "json":
+                record = {"t": round(time.perf_counter() - self.start, 6), "event": "span", "span": name,
+                          "seconds": round(elapsed, 6)}
+                record.update(fields)
+                self._emit(record)
+
+    def summary(self):
+        """Report event counts and span timings, then stop and dump any profiling"""
+        total = time.perf_counter() - self.start
+        if self.mode == "json":
+            self._emit({"event": "summary", "seconds": round(total, 6), "counts": self.counts,
+                        "spans": {name: {"count": s[0], "total": round(s[1], 6), "max": round(s[2], 6)}
+                                  for name, s in self.spans.items()}})
+        elif self.mode == "quiet":
+            counts = ", ".join(f"{count} {event}" for event, count in sorted(self.counts.items()))
+            print(f"{os.path.basename(sys.argv[0])}: {counts or 'nothing to do'} in {total:.2f}s")
+            for name, (count, spent, longest) in sorted(self.spans.items(), key=lambda item: -item[1][1])[:5]:
+                print(f"  {name:<24} {spent:8.3f}s total  {count:5} x  max {longest:.3f}s")
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            print(f"Profile written to {self.profile_path} (view with: python -m pstats {self.profile_path})")
+            pstats.Stats(self.profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+            self.profiler = None
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            print(f"Memory: {current / 1024:.0f} KiB current, {peak / 1024:.0f} KiB peak", file=sys.stderr)
+            for stat in tracemalloc.take_snapshot().statistics("lineno")[:10]:
+                print(f"  {stat}", file=sys.stderr)
+            tracemalloc.stop()
+
+
+_instance = Instrumentation()
+log = _instance.log
+span = _instance.span
+configure = _instance.configure
+atexit.register(_instance.summary)
+
+
+def add_arguments(parser):
+    """Add the shared --log / --profile / --tracemalloc options to a generator's argument parser"""
+    parser.add_argument("--log", choices=["text", "json", "quiet"], default=None,
+                        help="output format: per-file text lines, JSON lines, or a quiet summary")
+    parser.add_argument("--profile", default=None, metavar="FILE", help="write a cProfile capture to FILE")
+    parser.add_argument("--tracemalloc", action="store_true", help="report the top memory allocations")
+
+
+def configure_from_args(args):
+    """Apply the options added by add_arguments"""
+    configure(args.log, args.profile, args.tracemalloc)
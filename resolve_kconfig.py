@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import argparse
+from pathlib import Path
+
+from instrumentation import log, span, add_arguments, configure_from_args
+
+# Expression tokens: quoted strings, operators, parentheses and symbol/constant words
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|&&|\|\||!=|=|!|\(|\)|[A-Za-z0-9_\-\.]+')
+TRISTATE = {"n": 0, "m": 1, "y": 2}
+
+
+class KconfigResolver:
+    def __init__(self, root_dir, kconfig="Kconfig", cache_file=None):
+        """Initialize the resolver and parse (or load from cache) the Kconfig symbol graph"""
+        self.root_dir = Path(root_dir).absolute()
+        self.kconfig_root = self.root_dir / kconfig
+        self.cache_file = Path(cache_file) if cache_file else None
+
+        # The symbol graph is parsed once and reused for every resolve() call
+        self.graph = self._load_cached_graph()
+        if self.graph is None:
+            with span("parse_kconfig"):
+                self.graph = self.parse_tree()
+            self._save_cached_graph()
+        self.symbols = self.graph["symbols"]
+        self.choices = self.graph["choices"]
+
+        # Reverse dependencies from "select", resolved lazily per symbol
+        self.selected_by = {}
+        for name, sym in self.symbols.items():
+            for target, cond in sym["selects"]:
+                self.selected_by.setdefault(target, []).append((name, cond))
+
+    def _source_stamps(self, files):
+        """Return the (mtime, size) stamp of each parsed Kconfig file"""
+        stamps = {}
+        for path in files:
+            st = os.stat(path)
+            stamps[str(path)] = [st.st_mtime_ns, st.st_size]
+        return stamps
+
+    def _load_cached_graph(self):
+        """Load the symbol graph from the cache file if none of its sources changed"""
+        if not self.cache_file or not self.cache_file.exists():
+            return None
+        try:
+            with open(self.cache_file, 'r') as f:
+                graph = json.load(f)
+            if graph.get("root") != str(self.kconfig_root):
+                return None
+            if graph.get("stamps") != self._source_stamps(graph.get("stamps", {})):
+                return None
+            return graph
+        except (OSError, ValueError):
+            return None
+
+    def _save_cached_graph(self):
+        """Store the symbol graph with the stamps of the files it was parsed from"""
+        if not self.cache_file:
+            return
+        os.makedirs(self.cache_file.parent, exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.graph, f)
+
+    # ------------------------------------------------------------------
+    # Parsing
+    # ------------------------------------------------------------------
+
+    def parse_expr(self, text):
+        """Parse a Kconfig expression into nested lists, e.g. ["or", ["sym", "A"], ["sym", "B"]]"""
+        tokens = TOKEN_RE.findall(text)
+        pos = [0]
+
+        def peek():
+            return tokens[pos[0]] if pos[0] < len(tokens) else None
+
+        def take():
+            pos[0] += 1
+            return tokens[pos[0] - 1]
+
+        def parse_or():
+            left = parse_and()
+            while peek() == "||":
+                take()
+                left = ["or", left, parse_and()]
+            return left
+
+        def parse_and():
+            left = parse_not()
+            while peek() == "&&":
+                take()
+                left = ["and", left, parse_not()]
+            return left
+
+        def parse_not():
+            if peek() == "!":
+                take()
+                return ["not", parse_not()]
+            return parse_cmp()
+
+        def parse_cmp():
+            left = parse_primary()
+            if peek() in ("=", "!="):
+                op = "eq" if take() == "=" else "neq"
+                return [op, left, parse_primary()]
+            return left
+
+        def parse_primary():
+            token = take() if peek() is not None else "n"
+            if token == "(":
+                expr = parse_or()
+                if peek() == ")":
+                    take()
+                return expr
+            if token.startswith('"'):
+                return ["const", token[1:-1]]
+            return ["sym", token]
+
+        return parse_or() if tokens else ["const", "y"]
+
+    def _split_condition(self, text):
+        """Split 'value if cond' into the value text and the parsed condition (or None)"""
+        match = re.match(r'^(.*?)\s+if\s+(.*)$', text)
+        if match:
+            return match.group(1).strip(), self.parse_expr(match.group(2))
+        return text.strip(), None
+
+    def _and(self, *exprs):
+        """Combine the given expressions with &&, skipping empty ones"""
+        result = None
+        for expr in exprs:
+            if expr is None:
+                continue
+            result = expr if result is None else ["and", result, expr]
+        return result
+
+    def parse_tree(self):
+        """Parse the root Kconfig and all sourced files into a symbol graph"""
+        graph = {"root": str(self.kconfig_root), "symbols": {}, "choices": [], "stamps": {}}
+        files = []
+        # Stack of dependencies inherited from enclosing menu/if/choice blocks
+        dep_stack = []
+        state = {"entry": None, "choice": None}
+
+        def parse_file(path):
+            files.append(path)
+            with open(path, 'r', encoding="utf-8") as f:
+                lines = f.read().split("\n")
+
+            help_indent = None
+            help_base = 0
+            i = 0
+            while i < len(lines):
+                raw = lines[i].rstrip()
+                i += 1
+                # Help text runs until a line that is indented less than its first line
+                if help_indent is not None:
+                    if not raw.strip():
+                        continue
+                    indent = len(raw) - len(raw.lstrip())
+                    if help_indent < 0 and indent > help_base:
+                        help_indent = indent
+                    if help_indent >= 0 and indent >= help_indent:
+                        continue
+                    help_indent = None
+
+                line = raw.strip()
+                while line.endswith("\\") and i < len(lines):
+                    line = line[:-1] + " " + lines[i].strip()
+                    i += 1
+                if not line or line.startswith("#"):
+                    continue
+
+                keyword, _, rest = line.partition(" ")
+                rest = rest.strip()
+                entry = state["entry"]
+
+                if keyword == "source":
+                    parse_file(self.root_dir / rest.strip('"'))
+                elif keyword in ("config", "menuconfig"):
+                    entry = {
+                        "type": "bool",
+                        "prompt": None,
+                        "defaults": [],
+                        "depends": self._and(*dep_stack),
+                        "selects": [],
+                        "choice": None,
+                    }
+                    if state["choice"] is not None:
+                        choice = graph["choices"][state["choice"]]
+                        entry["choice"] = state["choice"]
+                        choice["symbols"].append(rest)
+                    graph["symbols"].setdefault(rest, entry)
+                    state["entry"] = graph["symbols"][rest]
+                    if state["entry"] is not entry:
+                        # Redefinition: later definitions add to the first one
+                        state["entry"]["depends"] = self._and(state["entry"]["depends"], entry["depends"])
+                elif keyword == "choice":
+                    graph["choices"].append({"defaults": [], "depends": self._and(*dep_stack), "symbols": []})
+                    state["choice"] = len(graph["choices"]) - 1
+                    state["entry"] = graph["choices"][-1]
+                    dep_stack.append(None)
+                elif keyword == "endchoice":
+                    state["choice"] = None
+                    state["entry"] = None
+                    dep_stack.pop()
+                elif keyword in ("menu", "if"):
+                    dep_stack.append(self.parse_expr(rest) if keyword == "if" else None)
+                    state["entry"] = {"menu": True, "depends": None} if keyword == "menu" else None
+                elif keyword in ("endmenu", "endif"):
+                    dep_stack.pop()
+                    state["entry"] = None
+                elif keyword in ("mainmenu", "comment"):
+                    state["entry"] = None
+                elif keyword in ("help", "---help---"):
+                    help_indent = -1
+                    help_base = len(raw) - len(raw.lstrip())
+                elif entry is None:
+                    continue
+                elif keyword in ("bool", "tristate", "string", "int", "hex"):
+                    entry["type"] = keyword
+                    if rest:
+                        entry["prompt"] = self._split_condition(rest)
+                elif keyword in ("def_bool", "def_tristate"):
+                    entry["type"] = keyword[4:]
+                    value, cond = self._split_condition(rest)
+                    entry["defaults"].append([self.parse_expr(value), cond])
+                elif keyword == "prompt":
+                    entry["prompt"] = self._split_condition(rest)
+                elif keyword == "default":
+                    value, cond = self._split_condition(rest)
+                    entry["defaults"].append([self.parse_expr(value), cond])
+                elif keyword == "depends":
+                    expr = self.parse_expr(re.sub(r'^on\s+', '', rest))
+                    if entry.get("menu"):
+                        # "depends on" of a menu applies to everything inside it
+                        dep_stack[-1] = self._and(dep_stack[-1], expr)
+                    else:
+                        entry["depends"] = self._and(entry["depends"], expr)
+                elif keyword == "select" and "selects" in entry:
+                    target, cond = self._split_condition(rest)
+                    entry["selects"].append([target, cond])
+
+        parse_file(self.kconfig_root)
+        graph["stamps"] = self._source_stamps(files)
+        return graph
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+
+    def load_defconfig(self, path):
+        """Read a defconfig fragment into a {symbol: value} dict"""
+        with open(path, 'r') as f:
+            return self.parse_defconfig(f.read())
+
+    def parse_defconfig(self, text):
+        """Parse defconfig text ("CONFIG_X=y", "# CONFIG_X is not set") into a {symbol: value} dict"""
+        values = {}
+        for line in text.splitlines():
+            line = line.strip()
+            match = re.match(r'^# CONFIG_(\w+) is not set$', line)
+            if match:
+                values[match.group(1)] = "n"
+                continue
+            match = re.match(r'^CONFIG_(\w+)=(.*)$', line)
+            if match:
+                value = match.group(2)
+                if value.startswith('"') and value.endswith('"'):
+                    value = value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+                values[match.group(1)] = value
+        return values
+
+    def resolve(self, *fragments):
+        """Resolve every symbol from the given fragments (later ones win) and return {symbol: value}"""
+        user = {}
+        for fragment in fragments:
+            if isinstance(fragment, dict):
+                user.update(fragment)
+            else:
+                user.update(self.load_defconfig(fragment))
+        for name in user:
+            if name not in self.symbols:
+                log(f"Warning: unknown symbol CONFIG_{name} ignored", event="warning", symbol=name)
+
+        memo = {}
+        choice_memo = {}
+
+        def tri(value):
+            return TRISTATE.get(value, 0)
+
+        def eval_expr(expr):
+            """Evaluate an expression to a tristate level (0, 1, 2)"""
+            if expr is None:
+                return 2
+            op = expr[0]
+            if op == "sym":
+                name = expr[1]
+                if name in self.symbols:
+                    return tri(value_of(name))
+                return tri(name)
+            if op == "const":
+                return tri(expr[1])
+            if op == "not":
+                return 2 - eval_expr(expr[1])
+            if op == "and":
+                return min(eval_expr(expr[1]), eval_expr(expr[2]))
+            if op == "or":
+                return max(eval_expr(expr[1]), eval_expr(expr[2]))
+            left, right = text_of(expr[1]), text_of(expr[2])
+            return 2 if (left == right) == (op == "eq") else 0
+
+        def text_of(expr):
+            """Evaluate an operand of '=' / '!=' or a non-bool default to its string value"""
+            if expr[0] == "sym" and expr[1] in self.symbols:
+                return value_of(expr[1])
+            if expr[0] in ("sym", "const"):
+                return expr[1]
+            return "y" if eval_expr(expr) else "n"
+
+        def choice_selection(index):
+            """Return the selected symbol of a choice group, or None if the choice is hidden"""
+            if index in choice_memo:
+                return choice_memo[index]
+            choice_memo[index] = None
+            choice = self.choices[index]
+            if not eval_expr(choice["depends"]):
+                return None
+            visible = [name for name in choice["symbols"] if eval_expr(self.symbols[name]["depends"])]
+            selected = None
+            for name in visible:
+                if user.get(name) == "y":
+                    selected = name
+                    break
+            if selected is None:
+                for value, cond in choice["defaults"]:
+                    if value[0] == "sym" and value[1] in visible and eval_expr(cond):
+                        selected = value[1]
+                        break
+            if selected is None and visible:
+                selected = visible[0]
+            choice_memo[index] = selected
+            return selected
+
+        def value_of(name):
+            if name in memo:
+                return memo[name]
+            # Break dependency cycles by treating the symbol as unset while it is being resolved
+            memo[name] = "n" if self.symbols[name]["type"] in ("bool", "tristate") else ""
+            sym = self.symbols[name]
+            visible = eval_expr(sym["depends"])
+
+            if sym["choice"] is not None:
+                value = "y" if visible and choice_selection(sym["choice"]) == name else "n"
+            elif sym["type"] in ("bool", "tristate"):
+                level = 0
+                if visible:
+                    prompt_visible = sym["prompt"] is not None and eval_expr(sym["prompt"][1])
+                    if prompt_visible and name in user:
+                        level = min(tri(user[name]), visible)
+                    else:
+                        for value, cond in sym["defaults"]:
+                            if eval_expr(cond):
+                                level = min(eval_expr(value), visible)
+                                break
+                for selector, cond in self.selected_by.get(name, []):
+                    level = max(level, min(tri(value_of(selector)), eval_expr(cond)))
+                if sym["type"] == "bool" and level == 1:
+                    level = 2
+                value = {0: "n", 1: "m", 2: "y"}[level]
+            else:
+                value = ""
+                if visible:
+                    if name in user:
+                        value = user[name]
+                    else:
+                        for default, cond in sym["defaults"]:
+                            if eval_expr(cond):
+                                value = text_of(default)
+                                break
+            memo[name] = value
+            return value
+
+        return {name: value_of(name) for name in self.symbols}
+
+    def is_visible(self, values, name):
+        """Return True if the symbol's dependencies are met under the resolved values"""
+        def eval_expr(expr):
+            if expr is None:
+                return True
+            op = expr[0]
+            if op in ("sym", "const"):
+                return values.get(expr[1], expr[1]) in ("y", "m")
+            if op == "not":
+                return not eval_expr(expr[1])
+            if op == "and":
+                return eval_expr(expr[1]) and eval_expr(expr[2])
+            if op == "or":
+                return eval_expr(expr[1]) or eval_expr(expr[2])
+            left = values.get(expr[1][1], expr[1][1])
+            right = values.get(expr[2][1], expr[2][1])
+            return (left == right) == (op == "eq")
+        return eval_expr(self.symbols[name]["depends"])
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def write_config(self, values, config_path):
+        """Write resolved values as a .config file, omitting symbols whose dependencies are unmet"""
+        config_path = Path(config_path)
+        os.makedirs(config_path.parent, exist_ok=True)
+
+        content = "#\n# Automatically generated file; DO NOT EDIT.\n# Telink SDK Configuration\n#\n"
+        for name, sym in self.symbols.items():
+            if not self.is_visible(values, name):
+                continue
+            value = values[name]
+            if sym["type"] in ("bool", "tristate"):
+                if value == "n":
+                    content += f"# CONFIG_{name} is not set\n"
+                else:
+                    content += f"CONFIG_{name}={value}\n"
+            elif sym["type"] == "string":
+                escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+                content += f"CONFIG_{name}=\"{escaped}\"\n"
+            elif value:
+                content += f"CONFIG_{name}={value}\n"
+
+        with open(config_path, 'w') as f:
+            f.write(content)
+        return config_path
+
+    def write_cmake(self, values, cmake_path):
+        """Write resolved values as an initial-cache script usable with 'cmake -C'"""
+        cmake_path = Path(cmake_path)
+        os.makedirs(cmake_path.parent, exist_ok=True)
+
+        content = "# Auto-generated Kconfig values for CMake, use with: cmake -C <this file>\n"
+        for name, sym in self.symbols.items():
+            value = values[name]
+            if sym["type"] in ("bool", "tristate"):
+                state = "OFF" if value == "n" else "ON"
+                content += f"set({name} {state} CACHE BOOL \"\" FORCE)\n"
+            elif value:
+                content += f"set({name} \"{value}\" CACHE STRING \"\" FORCE)\n"
+
+        with open(cmake_path, 'w') as f:
+            f.write(content)
+        return cmake_path
+
+    def generate(self, fragments, config_path, cmake_path=None):
+        """Resolve the fragments and write .config plus the CMake mapping"""
+        with span("resolve"):
+            values = self.resolve(*fragments)
+        self.write_config(values, config_path)
+        log(f"Generated .config: {config_path}", event="generated", path=config_path)
+        if cmake_path:
+            self.write_cmake(values, cmake_path)
+            log(f"Generated CMake mapping: {cmake_path}", event="generated", path=cmake_path)
+        return values
+
+    def resolve_matrix(self, output_dir, fragments=()):
+        """Resolve every chip x demo combination in one pass, writing <chip>/<demo>/.config each"""
+        output_dir = Path(output_dir)
+        chip_choice = next((c for c in self.choices
+                            if c["symbols"] and all(s.startswith("CHIP_") for s in c["symbols"])), None)
+        if chip_choice is None:
+            log("No chip choice found in Kconfig, nothing to resolve", event="skipped")
+            return 0
+        demos = [name for name in self.symbols if name.startswith("DEMO_")]
+        base = [self.load_defconfig(fragment) for fragment in fragments]
+
+        count = 0
+        for chip in chip_choice["symbols"]:
+            with span("resolve_chip", chip=chip):
+                chip_values = self.resolve(*base, {chip: "y"})
+                for demo in demos:
+                    if not self.is_visible(chip_values, demo):
+                        continue
+                    # Select exactly one demo on top of the chip selection
+                    selection = {other: "n" for other in demos}
+                    selection[chip] = "y"
+                    selection[demo] = "y"
+                    values = self.resolve(*base, selection)
+                    target_dir = output_dir / chip[len("CHIP_"):] / demo[len("DEMO_"):]
+                    self.write_config(values, target_dir / ".config")
+                    self.write_cmake(values, target_dir / "config.cmake")
+                    count += 1
+        log(f"Resolved {count} chip x demo configurations into {output_dir}", event="done", path=output_dir,
+            count=count)
+        return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve the generated Kconfig tree into .config and CMake values")
+    parser.add_argument("fragments", nargs="*", help="defconfig fragments, applied in order")
+    parser.add_argument("--set", action="append", default=[], metavar="CONFIG_X=y",
+                        help="extra symbol assignment, applied after all fragments")
+    parser.add_argument("-o", "--output", default=".config", help="output .config path")
+    parser.add_argument("--cmake", default=None, help="output CMake initial-cache path")
+    parser.add_argument("--cache", default=None, help="symbol graph cache file")
+    parser.add_argument("--matrix", default=None, metavar="DIR",
+                        help="resolve every chip x demo combination into DIR")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    resolver = KconfigResolver(os.getcwd(), cache_file=args.cache)
+    if args.matrix:
+        resolver.resolve_matrix(args.matrix, args.fragments)
+    else:
+        fragments = list(args.fragments)
+        if args.set:
+            fragments.append(resolver.parse_defconfig("\n".join(args.set)))
+        resolver.generate(fragments, args.output, args.cmake)
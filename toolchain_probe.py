@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+from instrumentation import log, span, add_arguments, configure_from_args
+
+# Cross compiler prefixes the SDK builds with
+COMPILER_PREFIXES = ("tc32-elf-", "riscv32-elf-")
+EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+
+# Install locations of the Telink IDEs (RDS/<version>/toolchains/<name>/bin) and common manual installs
+DEFAULT_ROOTS = (
+    "~/TelinkIoTStudio",
+    "/opt/TelinkIoTStudio",
+    "C:/TelinkIoTStudio",
+    "/opt/telink",
+)
+MAX_SEARCH_DEPTH = 6
+PROBE_TIMEOUT = 30
+
+
+class ToolchainProbe:
+    def __init__(self, root_dir, roots=None, cache_file=None):
+        """Initialize the probe with the project root and extra toolchain roots (also read from SDK_TOOLCHAIN_ROOTS)"""
+        self.root_dir = Path(root_dir).absolute()
+        self.cache_file = Path(cache_file) if cache_file else self.root_dir / "build" / "toolchain_cache.json"
+        self.roots = list(roots or [])
+        self.roots += [r for r in os.environ.get("SDK_TOOLCHAIN_ROOTS", "").split(os.pathsep) if r]
+        self.roots += DEFAULT_ROOTS
+        self.toolchains = None
+
+    def search_dirs(self):
+        """Return the existing PATH entries and toolchain roots, in search order"""
+        dirs = []
+        for entry in os.environ.get("PATH", "").split(os.pathsep) + self.roots:
+            path = os.path.abspath(os.path.expanduser(entry)) if entry else None
+            if path and os.path.isdir(path) and path not in dirs:
+                dirs.append(path)
+        return dirs
+
+    def _find_compilers(self, directory, depth):
+        """Yield the cross gcc binaries in directory and, up to depth levels down, in its bin/ folders
+
+        Symlinks are kept as found: a distro links riscv32-elf-gcc to a versioned file whose name carries no prefix.
+        """
+        for prefix in COMPILER_PREFIXES:
+            path = os.path.join(directory, prefix + "gcc" + EXE_SUFFIX)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                yield os.path.abspath(path)
+        if depth <= 0:
+            return
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."):
+                yield from self._find_compilers(entry.path, depth - 1)
+
+    # ------------------------------------------------------------------
+    # Probing
+    # ------------------------------------------------------------------
+
+    def _run(self, args):
+        """Run a compiler query and return (returncode, stdout, stderr)"""
+        try:
+            proc = subprocess.run(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                  universal_newlines=True, timeout=PROBE_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return -1, "", str(e)
+        return proc.returncode, proc.stdout, proc.stderr
+
+    def probe(self, compiler):
+        """Query a cross gcc once for its version, target, float ABI, defaults and implicit directories"""
+        prefix = next((p for p in COMPILER_PREFIXES if os.path.basename(compiler).startswith(p)), None)
+        if prefix is None:
+            raise ValueError(f"{compiler} is not named after a cross compiler prefix")
+        bin_dir = os.path.dirname(compiler)
+
+        _, banner, _ = self._run([compiler, "--version"])
+        # -dumpfullversion appeared in GCC 7; the older tc32 gcc only knows -dumpversion
+        code, version, _ = self._run([compiler, "-dumpfullversion"])
+        if code != 0 or not version.strip():
+            _, version, _ = self._run([compiler, "-dumpversion"])
+        _, machine, _ = self._run([compiler, "-dumpmachine"])
+        _, macro_text, _ = self._run([compiler, "-x", "c", "-E", "-dM", os.devnull])
+        macros = dict(re.findall(r'^#define (\w+) ?(.*)$', macro_text, re.M))
+        _, _, verbose = self._run([compiler, "-x", "c", "-E", "-v", os.devnull])
+        _, search_dirs, _ = self._run([compiler, "-print-search-dirs"])
+        _, multilibs, _ = self._run([compiler, "-print-multi-lib"])
+
+        include_dirs = []
+        match = re.search(r'#include <\.\.\.> search starts here:\n(.*?)\nEnd of search list', verbose, re.S)
+        if match:
+            include_dirs = [os.path.normpath(line.strip()) for line in match.group(1).splitlines() if line.strip()]
+        link_dirs = []
+        match = re.search(r'^libraries: =?(.*)$', search_dirs, re.M)
+        if match:
+            for path in match.group(1).split(os.pathsep):
+                path = os.path.normpath(path)
+                if path and os.path.isdir(path) and path not in link_dirs:
+                    link_dirs.append(path)
+
+        if "__riscv_float_abi_double" in macros:
+            float_abi = "double"
+        elif "__riscv_float_abi_single" in macros:
+            float_abi = "single"
+        else:
+            float_abi = "soft"
+        stdc = macros.get("__STDC_VERSION__", "").rstrip("L")
+        c_standard = {"199901": 99, "201112": 11, "201710": 17, "202311": 23}.get(stdc, 90)
+
+        tools = {}
+        for tool in ("g++", "ar", "ranlib", "objcopy", "objdump", "size", "ld"):
+            # gcc-ar/gcc-ranlib understand LTO objects; fall back to the plain binutils
+            for name in (("gcc-" + tool,) if tool in ("ar", "ranlib") else ()) + (tool,):
+                path = os.path.join(bin_dir, prefix + name + EXE_SUFFIX)
+                if os.path.isfile(path):
+                    tools[tool] = path
+                    break
+
+        stat = os.stat(compiler)
+        return {
+            "path": compiler,
+            "prefix": prefix,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "banner": banner.splitlines()[0] if banner else "",
+            "version": version.strip(),
+            "machine": machine.strip(),
+            "float_abi": float_abi,
+            "pointer_size": int(macros.get("__SIZEOF_POINTER__", "4")),
+            "byte_order": "BIG_ENDIAN" if "__BIG_ENDIAN__" in macros
+                          or macros.get("__BYTE_ORDER__") == "__ORDER_BIG_ENDIAN__" else "LITTLE_ENDIAN",
+            "c_standard": c_standard,
+            "include_dirs": include_dirs,
+            "link_dirs": link_dirs,
+            "multilibs": [line.split(";")[0] for line in multilibs.splitlines() if line.strip()],
+            "tools": tools,
+        }
+
+    def load_cache(self):
+        """Load the toolchains found by an earlier discovery"""
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r') as f:
+                try:
+                    return json.load(f)
+                except json.JSONDecodeError:
+                    pass
+        return {"search_dirs": [], "toolchains": {}}
+
+    def save_cache(self, cache):
+        """Write the discovered toolchains"""
+        os.makedirs(self.cache_file.parent, exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(cache, f, indent=4)
+
+    def discover(self, rescan=False):
+        """Return every installed cross toolchain, probing only compilers that are new or changed since the cache"""
+        if self.toolchains is not None and not rescan:
+            return self.toolchains
+        cache = self.load_cache()
+        search_dirs = self.search_dirs()
+
+        def unchanged(info):
+            try:
+                stat = os.stat(info["path"])
+            except OSError:
+                return False
+            return stat.st_mtime_ns == info["mtime_ns"] and stat.st_size == info["size"]
+
+        # Same search path and no compiler touched since: the cached discovery still holds
+        if not rescan and cache["search_dirs"] == search_dirs and all(map(unchanged, cache["toolchains"].values())):
+            self.toolchains = list(cache["toolchains"].values())
+            log(f"Using {len(self.toolchains)} cached toolchains: {self.cache_file}", event="unchanged",
+                path=self.cache_file)
+            return self.toolchains
+
+        path_dirs = {os.path.abspath(entry) for entry in os.environ.get("PATH", "").split(os.pathsep) if entry}
+        toolchains = {}
+        with span("discover_toolchains"):
+            for directory in search_dirs:
+                # PATH entries are bin directories themselves, roots are searched below
+                depth = 0 if directory in path_dirs else MAX_SEARCH_DEPTH
+                for compiler in self._find_compilers(directory, depth):
+                    if compiler in toolchains:
+                        continue
+                    cached = cache["toolchains"].get(compiler)
+                    if cached and unchanged(cached) and not rescan:
+                        toolchains[compiler] = cached
+                        continue
+                    try:
+                        with span("probe", path=compiler):
+                            toolchains[compiler] = self.probe(compiler)
+                    except (OSError, ValueError) as e:
+                        log(f"Error probing {compiler}: {e}", event="error", path=compiler)
+                        continue
+                    log(f"Probed {compiler}: {toolchains[compiler]['banner']}", event="info", path=compiler)
+
+        self.save_cache({"search_dirs": search_dirs, "toolchains": toolchains})
+        self.toolchains = list(toolchains.values())
+        log(f"Discovered {len(self.toolchains)} toolchains: {self.cache_file}", event="generated", path=self.cache_file)
+        return self.toolchains
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def parse_version_name(version_name, toolchain=""):
+        """Split a toolchainVersionName like "TL32 ELF MCULIB V5F GCC12.2" into (prefix, gcc version, float ABI)"""
+        text = f"{version_name} {toolchain}".upper()
+        prefix = "tc32-elf-" if "TC32" in text else "riscv32-elf-"
+        match = re.search(r'GCC\s*(\d+(?:\.\d+)*)', version_name.upper())
+        version = match.group(1) if match else None
+        # V5F is the Andes V5 library built for the single precision FPU, V5 the soft float one
+        match = re.search(r'\bV5(F?)\b', version_name.upper())
+        float_abi = ("single" if match.group(1) else "soft") if match else None
+        return prefix, version, float_abi
+
+    def match(self, version_name, toolchain=""):
+        """Return the installed toolchain satisfying a toolchainVersionName, or None"""
+        prefix, version, float_abi = self.parse_version_name(version_name, toolchain)
+        candidates = []
+        for info in self.discover():
+            if info["prefix"] != prefix:
+                continue
+            if version and info["version"].split(".")[:len(version.split("."))] != version.split("."):
+                continue
+            if float_abi and info["float_abi"] != float_abi:
+                continue
+            candidates.append(info)
+        # Discovery order is search order, so the first candidate of the newest version wins
+        candidates.sort(key=lambda info: [-int(n) if n.isdigit() else 0 for n in info["version"].split(".")])
+        return candidates[0] if candidates else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Discover the installed cross toolchains and match them to the configs")
+    parser.add_argument("--root", default=os.getcwd(), help="SDK root directory")
+    parser.add_argument("--toolchain-root", action="append", default=None,
+                        help="extra directory to search for toolchains (repeatable)")
+    parser.add_argument("--rescan", action="store_true", help="ignore the cache and probe every compiler again")
+    parser.add_argument("--match", default=None, metavar="NAME", help="print the toolchain matching a toolchainVersionName")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    probe = ToolchainProbe(args.root, args.toolchain_root)
+    toolchains = probe.discover(args.rescan)
+    if args.match is not None:
+        info = probe.match(args.match)
+        print(info["path"] if info else f"No installed toolchain matches \"{args.match}\"")
+    else:
+        for info in toolchains:
+            print(f"{info['version']:<10} {info['float_abi']:<7} {info['machine']:<16} {info['path']}")
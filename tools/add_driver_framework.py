@@ -112,7 +112,7 @@ def generate_board_config(root_dir, board_name):
     print(f"✅ {board_name}板级配置文件生成完成")
 
 def generate_driver_manager(root_dir):
-    """生成驱动管理层文件"""
+    """生成驱动管理层文件（device.h声明设备表，device.c定义设备表）"""
     driver_dir = os.path.join(root_dir, "drivers")
     device_path = os.path.join(driver_dir, "device.h")
     
@@ -135,28 +135,39 @@ typedef struct {
     void* dev;  // 指向HAL设备句柄
 } device_t;
 
+#define DEVICE_MAX_COUNT 32
+
+// 设备表（定义在device.c，所有编译单元共用同一张表）
+extern device_t device_table[DEVICE_MAX_COUNT];
+extern uint8_t device_count;
+
 // 注册设备
 static inline void device_register(const device_t* dev) {
-    static device_t devices[32];
-    static uint8_t count = 0;
-    if (count < 32) {
-        memcpy(&devices[count], dev, sizeof(device_t));
-        count++;
+    if (device_count < DEVICE_MAX_COUNT) {
+        memcpy(&device_table[device_count], dev, sizeof(device_t));
+        device_count++;
     }
 }
 
-// 查找设备
+// 查找设备（只比较已注册的设备）
 static inline device_t* device_find(const char* name) {
-    static device_t devices[32];
-    for (uint8_t i = 0; i < 32; i++) {
-        if (strcmp(devices[i].name, name) == 0) {
-            return &devices[i];
+    for (uint8_t i = 0; i < device_count; i++) {
+        if (strcmp(device_table[i].name, name) == 0) {
+            return &device_table[i];
         }
     }
     return NULL;
 }
 
 #endif // DEVICE_H
+""")
+
+    with open(os.path.join(driver_dir, "device.c"), "w", encoding="utf-8") as f:
+        f.write("""#include "device.h"
+
+// 设备表，只在这里定义一次
+device_t device_table[DEVICE_MAX_COUNT];
+uint8_t device_count = 0;
 """)
     print("✅ 驱动管理层文件生成完成")
 
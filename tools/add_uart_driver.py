@@ -213,11 +213,14 @@ static dma_chn_t uart_rx_dma_chn[2] = {DMA_CHN2, DMA_CHN3};
 uint32_t hal_uart_recv(hal_uart_dev_t* dev, uint8_t* data, uint32_t len, uint32_t timeout) {{
     // 实现接收逻辑（简化版）
     uint32_t recv_len = 0;
-    while (recv_len < len && timeout--) {{
+    while (recv_len < len) {{
         if (uart_rx_data_ready(dev->uart_num)) {{
             data[recv_len++] = reg_uart_data(dev->uart_num);
+        }} else if (timeout--) {{
+            delay_us(1000); // 只在无数据时等待1ms，timeout为空闲毫秒数
+        }} else {{
+            break;
         }}
-        delay_us(1000); // 1ms延迟
     }}
     return recv_len;
 }}
@@ -231,11 +234,14 @@ uint32_t hal_uart_recv(hal_uart_dev_t* dev, uint8_t* data, uint32_t len, uint32_
 
 uint32_t hal_uart_recv(hal_uart_dev_t* dev, uint8_t* data, uint32_t len, uint32_t timeout) {
     uint32_t recv_len = 0;
-    while (recv_len < len && timeout--) {
+    while (recv_len < len) {
         if (uart_rx_data_ready()) {
             data[recv_len++] = reg_uart_data;
+        } else if (timeout--) {
+            delay_us(1000); // 只在无数据时等待，timeout为空闲毫秒数
+        } else {
+            break;
         }
-        delay_us(1000);
     }
     return recv_len;
 }
@@ -255,7 +261,7 @@ void hal_uart_deinit(hal_uart_dev_t* dev) {
 """
 
     # 完整C文件内容
-    content = f"""#include "hal/hal_uart.h"
+    content = f"""#include "drivers/hal_uart.h"
 #include "uart.h"
 #include "gpio.h"
 #include "clock.h"
@@ -310,7 +316,7 @@ def generate_board_config(root_dir, board_name, support_multi_uart):
     content = f"""#ifndef BOARD_{board_name.upper()}_UART_H
 #define BOARD_{board_name.upper()}_UART_H
 
-#include "hal/hal_uart.h"
+#include "drivers/hal_uart.h"
 
 {pin_defs}
 
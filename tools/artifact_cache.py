@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from gen_cmake import CMakeGenerator
+from config_layers import chip_name, chip_source_dir
+from include_graph import IncludeGraph
+from dist_build import toolchain_identity
+
+# What the build leaves per demo: the ELF (CMake gives it no suffix), the objcopy image and the reports
+ARTIFACT_SUFFIXES = ("", ".bin", ".size", ".lst")
+DEFAULT_MAX_SIZE = 2 << 30
+# Bumped whenever the key derivation changes, so entries keyed the old way are never hit
+KEY_VERSION = 2
+
+
+class ArtifactStore:
+    def __init__(self, store_dir, max_size=DEFAULT_MAX_SIZE):
+        """Initialize a store of artifact sets by key, bounded to max_size bytes by evicting the least recently used"""
+        self.store_dir = Path(store_dir).absolute()
+        self.max_size = max_size
+        self.index_path = self.store_dir / "index.json"
+        self.index = {"entries": {}, "hits": 0, "misses": 0}
+        if self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                try:
+                    self.index = json.load(f)
+                except json.JSONDecodeError:
+                    pass
+
+    def entry_dir(self, key):
+        return self.store_dir / key[:2] / key
+
+    def save_index(self):
+        """Write the index: entries with their size and last use, and the hit and miss counters"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f, indent=4)
+            f.write("\n")
+        os.replace(tmp, self.index_path)
+
+    def get(self, key, dest_dir):
+        """Copy the artifacts of a key into dest_dir and return their names; None on a miss"""
+        entry = self.index["entries"].get(key)
+        if not entry or not self.entry_dir(key).is_dir():
+            self.index["misses"] += 1
+            return None
+        os.makedirs(dest_dir, exist_ok=True)
+        for name in entry["files"]:
+            shutil.copy2(self.entry_dir(key) / name, Path(dest_dir) / name)
+        entry["last_used"] = time.time()
+        self.index["hits"] += 1
+        return entry["files"]
+
+    def put(self, key, paths, label=""):
+        """Store the given files under a key, then evict down to the size bound"""
+        entry_dir = self.entry_dir(key)
+        tmp = entry_dir.with_name(f"{key}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for path in paths:
+            shutil.copy2(path, tmp / os.path.basename(path))
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp, entry_dir)
+        self.index["entries"][key] = {"label": label, "files": [os.path.basename(p) for p in paths],
+                                      "size": sum(os.path.getsize(p) for p in paths), "last_used": time.time()}
+        self.evict()
+
+    def size(self):
+        return sum(e["size"] for e in self.index["entries"].values())
+
+    def evict(self):
+        """Drop least recently used entries until the store fits its size bound; return how many were dropped"""
+        entries = self.index["entries"]
+        total = self.size()
+        dropped = 0
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_size:
+                break
+            total -= entries[key]["size"]
+            shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            del entries[key]
+            dropped += 1
+        return dropped
+
+
+class ArtifactCache:
+    def __init__(self, root_dir, store_dir=None, remote_dir=None, build_dir="build/{chip}", max_size=DEFAULT_MAX_SIZE):
+        """Initialize the cache; remote_dir is a second, shared store consulted on a local miss"""
+        self.root_dir = Path(root_dir).resolve()
+        self.build_dir = build_dir
+        self.local = ArtifactStore(store_dir or self.root_dir / "build" / "artifact_cache", max_size)
+        self.remote = ArtifactStore(remote_dir, max_size) if remote_dir else None
+        self.generator = CMakeGenerator(self.root_dir)
+        self.graph = IncludeGraph(self.root_dir)
+        self.hash_memo = {}
+
+    def hash_file(self, path):
+        """Return the SHA-256 of a file, memoized for the headers and libraries many demos share"""
+        if path not in self.hash_memo:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            self.hash_memo[path] = digest.hexdigest()
+        return self.hash_memo[path]
+
+    def artifact_dir(self, chip, target):
+        """Return where the CMake build of a chip leaves the artifacts of a demo"""
+        return self.root_dir / self.build_dir.format(chip=chip) / "demo" / "vendor" / target
+
+    def load_demos(self, chips=None, targets=None):
+        """Return [(chip, target config, [(source, include dirs)])] for the selected demos"""
+        demos = []
+        for json_file in sorted(self.root_dir.glob("cmake_configs/*_cmake.json")):
+            chip = chip_name(json_file)
+            json_data = self.generator.parse_json(json_file) if not chips or chip in chips else None
+            if not json_data:
+                continue
+            units = {}
+            source_dir = chip_source_dir(json_data, chip)
+            build_dir = self.root_dir / self.build_dir.format(chip=chip)
+            for entry in self.generator.iter_compile_commands(json_data, chip, source_dir, build_dir):
+                include_dirs = tuple(a[2:] for a in entry["arguments"] if a.startswith("-I") and len(a) > 2)
+                units.setdefault(entry["target"], []).append((entry["file"], include_dirs))
+            for target in json_data.get("targets", []):
+                if target.get("name") in units and (not targets or target["name"] in targets):
+                    demos.append((chip, target, units[target["name"]]))
+        self.graph.scan_all([(chip, target["name"], [s for s, _ in units], dirs)
+                             for chip, target, units in demos for dirs in {d for _, d in units}])
+        return demos
+
+    def key(self, chip, target, units):
+        """Return the key of a demo's artifacts
+
+        It covers the resolved target config, every source and header it compiles, the link script and
+        libraries it links, the pre/post build scripts and the identity of its toolchain, plus the .config
+        (autoconf.h, OPT_LEVEL) and the cmake files turning it and the toolchain into compile options.
+        """
+        inputs = set()
+        for source, include_dirs in units:
+            inputs.add(source)
+            inputs |= self.graph.closure(source, include_dirs)
+        options = self.generator.expand_options(target.get("linker_options", []))
+        inputs |= {o[2:] for o in options if o.startswith("-T") and os.path.isfile(o[2:])}
+        for directory in self.generator.expand_options(target.get("linker_directories", [])):
+            inputs |= {os.path.join(directory, f"lib{lib}.a") for lib in target.get("linker_libraries", [])
+                       if os.path.isfile(os.path.join(directory, f"lib{lib}.a"))}
+        for phase in ("pre_build", "post_build"):
+            for entry in target.get(phase, []):
+                script = self.generator.expand_options([entry])[:1]
+                inputs |= {os.path.normpath(s) for s in script if os.path.isfile(s)}
+        build_files = [self.root_dir / ".config", self.root_dir / "cmake" / "kconfig.cmake",
+                       self.root_dir / "cmake" / "toolchain.cmake", self.root_dir / "cmake" / f"toolchain_{chip.lower()}.cmake"]
+        inputs |= {str(path) for path in build_files if path.is_file()}
+
+        compiler = "tc32-elf-gcc" if "TC32" in target.get("toolchain", "") else "riscv32-elf-gcc"
+        identity = toolchain_identity(compiler)
+        digest = hashlib.sha256(f"{KEY_VERSION}\0{chip}\0{identity[0] if identity else 'missing:' + compiler}".encode())
+        digest.update(json.dumps(target, sort_keys=True).encode())
+        for path in sorted(inputs):
+            digest.update(f"\0{os.path.relpath(path, self.root_dir)}\0{self.hash_file(path)}".encode())
+        return digest.hexdigest()
+
+    def restore(self, demos):
+        """Restore the artifacts of every demo whose key is cached; return (hits, misses) as lists of names"""
+        hits, misses = [], []
+        for chip, target, units in demos:
+            key = self.key(chip, target, units)
+            dest = self.artifact_dir(chip, target["name"])
+            files = self.local.get(key, dest)
+            if files is None and self.remote:
+                files = self.remote.get(key, dest)
+                # A remote hit is kept locally, the next build of this tree is served without the remote
+                if files is not None:
+                    self.local.put(key, [dest / name for name in files], f"{chip}/{target['name']}")
+            (hits if files is not None else misses).append(f"{chip}/{target['name']}")
+        self.save()
+        return hits, misses
+
+    def store(self, demos):
+        """Store the artifacts of every built demo in the local and remote stores; return the names stored"""
+        stored = []
+        for chip, target, units in demos:
+            paths = [self.artifact_dir(chip, target["name"]) / f"{target['name']}{suffix}" for suffix in ARTIFACT_SUFFIXES]
+            paths = [p for p in paths if p.is_file()]
+            # Without the ELF the demo was not built, there is nothing to cache
+            if not paths or paths[0].name != target["name"]:
+                continue
+            key = self.key(chip, target, units)
+            for store in filter(None, (self.local, self.remote)):
+                store.put(key, paths, f"{chip}/{target['name']}")
+            stored.append(f"{chip}/{target['name']}")
+        self.save()
+        return stored
+
+    def save(self):
+        for store in filter(None, (self.local, self.remote)):
+            store.save_index()
+
+    def stats(self):
+        """Return {store: {entries, size, hits, misses}} of the local and remote stores"""
+        return {name: {"entries": len(store.index["entries"]), "size": store.size(),
+                       "hits": store.index["hits"], "misses": store.index["misses"]}
+                for name, store in (("local", self.local), ("remote", self.remote)) if store}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache the .elf, .bin and listings of each demo by the inputs that built it")
+    parser.add_argument("command", choices=["restore", "store", "stats", "evict"],
+                        help="restore cached artifacts before a build, store them after it, or manage the store")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                        help="SDK root directory")
+    parser.add_argument("--chip", action="append", default=None, help="only this chip (repeatable)")
+    parser.add_argument("--target", action="append", default=None, help="only this demo (repeatable)")
+    parser.add_argument("--build-dir", default="build/{chip}", help="CMake binary dir of a chip, {chip} is its name")
+    parser.add_argument("--store", default=None, help="local store (default: build/artifact_cache)")
+    parser.add_argument("--remote", default=None, help="shared store directory consulted on a local miss")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE >> 20, help="store size bound in MiB")
+    parser.add_argument("--missed", default=None,
+                        help="restore: write the demos that missed, one per line, the targets left to build")
+    args = parser.parse_args()
+
+    cache = ArtifactCache(args.root, args.store, args.remote, args.build_dir, args.max_size << 20)
+    if args.command == "restore":
+        hits, misses = cache.restore(cache.load_demos(args.chip, args.target))
+        total = max(len(hits) + len(misses), 1)
+        print(f"Restored {len(hits)} demos from the cache, {len(misses)} to build ({100 * len(hits) / total:.0f}% hit rate)")
+        if args.missed:
+            with open(args.missed, 'w') as f:
+                f.writelines(f"{name}\n" for name in misses)
+    elif args.command == "store":
+        stored = cache.store(cache.load_demos(args.chip, args.target))
+        print(f"Stored the artifacts of {len(stored)} demos")
+    elif args.command == "evict":
+        dropped = sum(store.evict() for store in filter(None, (cache.local, cache.remote)))
+        cache.save()
+        print(f"Evicted {dropped} entries")
+    for name, stats in cache.stats().items():
+        print(f"{name}: {stats['entries']} entries, {stats['size'] / (1 << 20):.1f} MiB, "
+              f"{stats['hits']} hits, {stats['misses']} misses")
@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import time
+import tty
+import shlex
+import socket
+import struct
+import asyncio
+import termios
+import argparse
+import threading
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+AUTO_TEST_DIR = Path("demo") / "vendor" / "common" / "common" / "auto_test"
+DUT_CMD_HEADER = AUTO_TEST_DIR / "dut_cmd.h"
+PC_INTERFACE_HEADER = AUTO_TEST_DIR / "pc_interface.h"
+
+# The autotest firmware has no wire protocol: pc_interface.c keeps a parameter block (par_addr), stores its address
+# at PARA_BASE_ADDR and polls two rings of autotest_package_t slots the host reads and writes over the debug link
+PAYLOAD_SIZE = 60
+PACKAGE = struct.Struct("<60sH2s")
+# par_addr: the check word, then address, slot size, slot count, WPTR and RPTR of the command ring and the result ring
+PARAMS = struct.Struct("<IIBBBBIBBBB")
+# Offsets into par_addr; the host only writes the command WPTR and the result RPTR, the firmware owns the other two
+PARA_BUF_WPTR = 0xa
+PARA_BUF_RPTR = 0xb
+RESU_BUF_WPTR = 0x12
+RESU_BUF_RPTR = 0x13
+POLL_INTERVAL = 0.005
+OPENOCD_TCL_PORT = 6666
+
+# A board that times out this many tests in a row is taken out of the schedule
+MAX_CONSECUTIVE_TIMEOUTS = 2
+
+
+def crc_16(data):
+    """CRC-16/MODBUS, the same crc_16() the firmware checks packages with"""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def encode_package(payload):
+    """Return the autotest_package_t slot carrying payload"""
+    if len(payload) > PAYLOAD_SIZE:
+        raise ValueError(f"payload of {len(payload)} bytes exceeds {PAYLOAD_SIZE}")
+    return PACKAGE.pack(payload, len(payload), struct.pack("<H", crc_16(payload)))
+
+
+def decode_package(slot):
+    """Return the payload of an autotest_package_t slot, None if its length or CRC is wrong"""
+    payload, length, crc = PACKAGE.unpack_from(slot)
+    if length > PAYLOAD_SIZE or struct.unpack("<H", crc)[0] != crc_16(payload[:length]):
+        return None
+    return payload[:length]
+
+
+def load_commands(root_dir=ROOT_DIR):
+    """Return {name: value} of the DUTCMD_* commands in dut_cmd.h"""
+    with open(Path(root_dir) / DUT_CMD_HEADER, 'r') as f:
+        return {name: int(value, 0) for name, value in re.findall(r'#define\s+(DUTCMD_\w+)\s+(0x[0-9A-Fa-f]+|\d+)', f.read())}
+
+
+def load_base_addresses(root_dir=ROOT_DIR):
+    """Return {chip: PARA_BASE_ADDR} from the MCU_CORE_* branches of pc_interface.h"""
+    addresses = {}
+    chips = []
+    with open(Path(root_dir) / PC_INTERFACE_HEADER, 'r') as f:
+        for line in f:
+            if re.match(r'\s*#\s*(el)?if\b', line):
+                chips = re.findall(r'defined\(MCU_CORE_(\w+)\)', line)
+            match = re.match(r'\s*#\s*define\s+PARA_BASE_ADDR\s+(0x[0-9A-Fa-f]+)', line)
+            if match:
+                addresses.update((chip, int(match.group(1), 16)) for chip in chips)
+    return addresses
+
+
+def base_address(chip, addresses):
+    """Return PARA_BASE_ADDR of a chip named like its MCU_CORE_* macro or its chip_builds directory, None if unknown"""
+    name = chip.upper()
+    return addresses.get(name, addresses.get(re.sub(r'^T[LC]_', '', name)))
+
+
+class OpenOcdLink:
+    def __init__(self, address, timeout=5.0):
+        """Initialize a debug link through the TCL server of an OpenOCD attached to the board, address is HOST[:PORT]"""
+        host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+        self.address = (host, int(port or OPENOCD_TCL_PORT))
+        self.timeout = timeout
+        self.sock = None
+
+    def __str__(self):
+        return f"{self.address[0]}:{self.address[1]}"
+
+    def open(self):
+        self.sock = socket.create_connection(self.address, self.timeout)
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def command(self, line):
+        """Run one TCL command and return its output; commands and replies both end with 0x1a"""
+        if self.sock is None:
+            self.open()
+        self.sock.sendall(line.encode() + b"\x1a")
+        reply = b""
+        while not reply.endswith(b"\x1a"):
+            data = self.sock.recv(4096)
+            if not data:
+                self.close()
+                raise ConnectionError(f"{self} closed the connection")
+            reply += data
+        return reply[:-1].decode(errors="replace").strip()
+
+    def read(self, addr, size):
+        """Read size bytes of target memory at addr"""
+        reply = self.command(f"read_memory 0x{addr:x} 8 {size}")
+        try:
+            data = bytes(int(value, 0) for value in reply.split())
+        except ValueError:
+            data = b""
+        if len(data) != size:
+            raise OSError(f"reading {size} bytes at 0x{addr:x} failed: {reply}")
+        return data
+
+    def write(self, addr, data):
+        """Write data to target memory at addr"""
+        reply = self.command(f"write_memory 0x{addr:x} 8 {{{' '.join(f'0x{b:02x}' for b in data)}}}")
+        if reply:
+            raise OSError(f"writing {len(data)} bytes at 0x{addr:x} failed: {reply}")
+
+    def reset(self):
+        """Reset the core and let the firmware run again"""
+        self.command("reset run")
+
+
+class Mailbox:
+    def __init__(self, link, base_addr):
+        """Initialize the host side of the firmware's command and result rings, found through PARA_BASE_ADDR"""
+        self.link = link
+        self.base_addr = base_addr
+        self.par_addr = None
+
+    def locate(self):
+        """Find par_addr; False until the firmware has run para_buff_init() and result_buff_init()"""
+        par_addr = struct.unpack("<I", self.link.read(self.base_addr, 4))[0]
+        self.par_addr = None
+        if par_addr:
+            params = PARAMS.unpack(self.link.read(par_addr, PARAMS.size))
+            # PARA_BUF_CHECK holds the address of par_addr itself, a stale or random word at PARA_BASE_ADDR does not
+            if params[0] == par_addr and params[2] >= PACKAGE.size and params[3] and params[7] >= PACKAGE.size and params[8]:
+                self.par_addr = par_addr
+        return self.par_addr is not None
+
+    def params(self):
+        """Return (command addr, size, cnt, WPTR, RPTR, result addr, size, cnt, WPTR, RPTR)"""
+        return PARAMS.unpack(self.link.read(self.par_addr, PARAMS.size))[1:]
+
+    def send(self, payload):
+        """Put one command in the ring as para_buff_read() expects it; False while the ring is full"""
+        addr, size, cnt, wptr, rptr = self.params()[:5]
+        if (wptr + 1) % cnt == rptr:
+            return False
+        self.link.write(addr + size * wptr, encode_package(payload))
+        self.link.write(self.par_addr + PARA_BUF_WPTR, bytes([(wptr + 1) % cnt]))
+        return True
+
+    def receive(self):
+        """Take the results result_buff_write() left in the ring and return their payloads, dropping corrupted slots"""
+        addr, size, cnt, wptr, rptr = self.params()[5:]
+        payloads = []
+        while rptr != wptr:
+            payloads.append(decode_package(self.link.read(addr + size * rptr, PACKAGE.size)))
+            rptr = (rptr + 1) % cnt
+            self.link.write(self.par_addr + RESU_BUF_RPTR, bytes([rptr]))
+        return [p for p in payloads if p is not None]
+
+
+class Board:
+    def __init__(self, link, chip, base_addr, log_port=None, baudrate=115200, flash_cmd=None):
+        """Initialize a board on a debug link; log_port is the optional serial port of its printf output and
+        flash_cmd a template using {link}, {port}, {firmware} and {chip}"""
+        self.link = link
+        self.chip = chip
+        self.mailbox = Mailbox(link, base_addr)
+        self.log_port = log_port
+        self.baudrate = baudrate
+        self.flash_cmd = flash_cmd
+        self.firmware = None
+        self.fd = None
+        self.text = b""
+        self.logs = []
+        self.timeouts = 0
+        self.retired = False
+
+    def __str__(self):
+        return f"{self.chip}@{self.link}"
+
+    def open(self):
+        """Open the log port raw and non-blocking and start collecting its lines; the link connects on first use"""
+        if not self.log_port:
+            return
+        self.fd = os.open(self.log_port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        tty.setraw(self.fd)
+        attrs = termios.tcgetattr(self.fd)
+        speed = getattr(termios, f"B{self.baudrate}")
+        attrs[4] = attrs[5] = speed
+        termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+        termios.tcflush(self.fd, termios.TCIOFLUSH)
+        asyncio.get_running_loop().add_reader(self.fd, self._on_readable)
+
+    def close(self):
+        """Stop reading the log port and release the link"""
+        if self.fd is not None:
+            asyncio.get_running_loop().remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+        self.link.close()
+
+    def _on_readable(self):
+        """Collect the complete log lines the port delivered; a closed port stops the reader"""
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            asyncio.get_running_loop().remove_reader(self.fd)
+            return
+        self.text += data
+        *lines, self.text = self.text.split(b"\n")
+        self.logs += [line.rstrip(b"\r").decode(errors="replace") for line in lines if line.strip()]
+
+    async def flash(self, firmware, timeout):
+        """Flash firmware with the board's flash command; the link and port are released while the flasher owns them"""
+        if not self.flash_cmd or not firmware or firmware == self.firmware:
+            return True, ""
+        self.close()
+        # The new firmware places par_addr wherever its link put it
+        self.mailbox.par_addr = None
+        args = shlex.split(self.flash_cmd.format(link=self.link, port=self.log_port, firmware=firmware, chip=self.chip))
+        proc = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.STDOUT)
+        try:
+            output, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            output = f"flashing timed out after {timeout}s".encode()
+        self.open()
+        if proc.returncode != 0:
+            self.firmware = None
+            return False, output.decode(errors="replace").strip()
+        self.firmware = firmware
+        return True, ""
+
+    async def _poll(self, step, deadline):
+        """Run step on the link in a thread until it returns something truthy or the deadline passes"""
+        while True:
+            value = await asyncio.to_thread(step)
+            if value or time.monotonic() >= deadline:
+                return value
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def request(self, command, args, timeout):
+        """Send one command through the mailbox and return (result payload or None, log lines) within timeout"""
+        self.logs = []
+        deadline = time.monotonic() + timeout
+        payload = struct.pack("<H", command) + bytes(args)
+        try:
+            if self.mailbox.par_addr is None and not await self._poll(self.mailbox.locate, deadline):
+                return None, self.logs + [f"no autotest mailbox at 0x{self.mailbox.base_addr:08x}"]
+            # Results of an earlier, timed out request must not answer this one
+            await asyncio.to_thread(self.mailbox.receive)
+            if not await self._poll(lambda: self.mailbox.send(payload), deadline):
+                return None, self.logs + ["command ring full"]
+            while True:
+                results = await self._poll(self.mailbox.receive, deadline)
+                for result in results:
+                    if len(result) >= 2 and struct.unpack_from("<H", result)[0] == command:
+                        return result, self.logs
+                if time.monotonic() >= deadline:
+                    return None, self.logs
+        except OSError as e:
+            self.link.close()
+            return None, self.logs + [f"debug link: {e}"]
+
+    async def reset(self):
+        """Reset the core after a timeout, the firmware sets its rings up again"""
+        self.mailbox.par_addr = None
+        try:
+            await asyncio.to_thread(self.link.reset)
+        except OSError:
+            self.link.close()
+        await asyncio.sleep(0.1)
+
+
+class AutotestRunner:
+    def __init__(self, boards, tests, timeout=10.0, flash_timeout=120.0, retries=0, commands=None):
+        """Initialize the runner with the boards and the tests to spread over them"""
+        self.boards = boards
+        self.timeout = timeout
+        self.flash_timeout = flash_timeout
+        self.retries = retries
+        self.commands = commands or {}
+        # Group tests by firmware, so each board flashes once per demo rather than once per test
+        self.pending = sorted(tests, key=lambda t: (t.get("chip") or "", t.get("firmware") or ""))
+        self.results = []
+        # Tests in flight may come back for a retry, so idle workers wait for them to settle
+        self.running = 0
+        self.settled = None
+
+    def _command(self, test):
+        """Return the numeric command of a test, given by DUTCMD_* name or number"""
+        command = test["command"]
+        if isinstance(command, str) and not command[:1].isdigit():
+            if command not in self.commands:
+                raise KeyError(f"unknown command {command}")
+            return self.commands[command]
+        return int(command, 0) if isinstance(command, str) else command
+
+    def _next_test(self, board):
+        """Pop the next test this board can run, preferring one for the firmware it already holds"""
+        candidates = [t for t in self.pending if t.get("chip") in (None, board.chip) and board not in t["_failed_on"]]
+        if not candidates:
+            return None
+        test = next((t for t in candidates if t.get("firmware") == board.firmware), candidates[0])
+        self.pending.remove(test)
+        return test
+
+    async def run_test(self, board, test):
+        """Flash if needed, send the command and check the result, returning a result record"""
+        start = time.monotonic()
+        result = {"name": test["name"], "board": str(board), "attempt": test["_attempt"]}
+        ok, output = await board.flash(test.get("firmware"), self.flash_timeout)
+        if not ok:
+            result.update(status="failed", error=f"flashing failed: {output}", seconds=time.monotonic() - start)
+            return result
+
+        payload, logs = await board.request(self._command(test), bytes.fromhex(test.get("args", "")),
+                                            test.get("timeout", self.timeout))
+        result.update(seconds=time.monotonic() - start, log=logs)
+        if payload is None:
+            result.update(status="timeout", error=f"no result within {test.get('timeout', self.timeout)}s")
+            return result
+        # Result payloads are the command, the length byte, then the test's data
+        data = payload[3:]
+        result["data"] = data.hex()
+        expect = test.get("expect")
+        if expect is not None and data.hex() != expect.lower():
+            result.update(status="failed", error=f"expected {expect}, got {data.hex()}")
+        else:
+            result["status"] = "pass"
+        return result
+
+    async def worker(self, board):
+        """Run tests on one board until none it can run are left"""
+        while not board.retired:
+            test = self._next_test(board)
+            if test is None:
+                if not self.running:
+                    return
+                self.settled.clear()
+                await self.settled.wait()
+                continue
+            self.running += 1
+            try:
+                result = await self.run_test(board, test)
+            except (KeyError, ValueError) as e:
+                result = {"name": test["name"], "board": str(board), "attempt": test["_attempt"],
+                          "status": "failed", "error": str(e), "seconds": 0.0}
+            finally:
+                self.running -= 1
+
+            if result["status"] == "timeout":
+                board.timeouts += 1
+                await board.reset()
+                if board.timeouts >= MAX_CONSECUTIVE_TIMEOUTS:
+                    board.retired = True
+                    print(f"Board {board} timed out {board.timeouts} tests in a row, removing it from the schedule")
+            else:
+                board.timeouts = 0
+            if result["status"] != "pass" and test["_attempt"] < self.retries:
+                # Retry on another board where possible, a hung board should not fail the test twice
+                test["_attempt"] += 1
+                test["_failed_on"].append(board)
+                if not any(b for b in self.boards if not b.retired and b.chip == board.chip and b not in test["_failed_on"]):
+                    test["_failed_on"] = []
+                self.pending.append(test)
+                result["retried"] = True
+            self.results.append(result)
+            self._print(result)
+            self.settled.set()
+
+    def _print(self, result):
+        """Print one result line as soon as the test finishes"""
+        retry = " (retrying)" if result.get("retried") else ""
+        print(f"[{result['status']:>7}] {result['board']:<24} {result['seconds']:6.2f}s {result['name']}{retry}")
+        if result.get("error"):
+            print(f"          {result['error']}")
+
+    async def run(self):
+        """Run all tests concurrently across the boards and return the result records"""
+        for test in self.pending:
+            test.setdefault("_attempt", 0)
+            test.setdefault("_failed_on", [])
+        self.settled = asyncio.Event()
+        for board in self.boards:
+            board.open()
+        try:
+            await asyncio.gather(*(self.worker(board) for board in self.boards))
+        finally:
+            for board in self.boards:
+                board.close()
+
+        # Tests no remaining board could take
+        for test in self.pending:
+            result = {"name": test["name"], "board": "", "attempt": test["_attempt"], "status": "skipped",
+                      "error": f"no usable board for chip {test.get('chip')}", "seconds": 0.0}
+            self.results.append(result)
+            self._print(result)
+        self.results = [r for r in self.results if not r.get("retried")]
+        return self.results
+
+
+class FakeDevice:
+    BUFF_SIZE = 64
+    BUFF_CNT = 4
+
+    def __init__(self, chip="FAKE", base_addr=0x4, delay=0.01, hang=(), log_every=3):
+        """Initialize a device stand-in: target RAM behind an OpenOCD-like TCL server on loopback, a firmware thread
+        serving the rings in it like pc_interface.c, and a pty carrying its log lines"""
+        self.chip = chip
+        self.base_addr = base_addr
+        self.delay = delay
+        self.hang = set(hang)
+        self.log_every = log_every
+        # Where the fake firmware's linker put par_addr, command_buff and result_buff: past PARA_BASE_ADDR, like in RAM
+        self.par_addr = (base_addr & ~0xfff) + 0x1000
+        self.command_buff = self.par_addr + 0x100
+        self.result_buff = self.command_buff + self.BUFF_SIZE * self.BUFF_CNT
+        self.memory = bytearray(self.result_buff + self.BUFF_SIZE * self.BUFF_CNT)
+        self.lock = threading.Lock()
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.server.settimeout(0.05)
+        self.link = f"127.0.0.1:{self.server.getsockname()[1]}"
+        self.master, self.slave = os.openpty()
+        self.log_port = os.ttyname(self.slave)
+        self.handled = 0
+        self.stopped = False
+        self.threads = [threading.Thread(target=self._serve_link, daemon=True),
+                        threading.Thread(target=self._firmware, daemon=True)]
+
+    def start(self):
+        """Boot the firmware and serve the link from background threads"""
+        self._init_buffers()
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stop the firmware and the link, close the pty"""
+        self.stopped = True
+        self.server.close()
+        for thread in self.threads:
+            thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _init_buffers(self):
+        """What para_buff_init() and result_buff_init() leave in RAM"""
+        with self.lock:
+            struct.pack_into("<I", self.memory, self.base_addr, self.par_addr)
+            PARAMS.pack_into(self.memory, self.par_addr, self.par_addr, self.command_buff, self.BUFF_SIZE,
+                             self.BUFF_CNT, 0, 0, self.result_buff, self.BUFF_SIZE, self.BUFF_CNT, 0, 0)
+
+    def respond(self, command, args):
+        """Return the result payload: the command, the length byte and the arguments echoed back"""
+        data = bytes(args)
+        return struct.pack("<HB", command, 3 + len(data)) + data
+
+    def _firmware(self):
+        """Poll the command ring like main_loop(), para_buff_read() a command and result_buff_write() its result"""
+        while not self.stopped:
+            with self.lock:
+                _, cmd_addr, size, cnt, wptr, rptr = PARAMS.unpack_from(self.memory, self.par_addr)[:6]
+                if wptr != rptr:
+                    self.memory[self.par_addr + PARA_BUF_RPTR] = (rptr + 1) % cnt
+                    payload = decode_package(self.memory[cmd_addr + size * rptr:cmd_addr + size * (rptr + 1)])
+            if wptr == rptr:
+                time.sleep(0.001)
+                continue
+            if payload is None or len(payload) < 2:
+                continue
+            command = struct.unpack_from("<H", payload)[0]
+            self.handled += 1
+            if self.log_every and self.handled % self.log_every == 0:
+                os.write(self.master, f"[{self.chip}] handling command 0x{command:04x}\r\n".encode())
+            if command in self.hang:
+                continue
+            time.sleep(self.delay)
+            with self.lock:
+                res_addr, size, cnt, wptr, rptr = PARAMS.unpack_from(self.memory, self.par_addr)[6:]
+                # result_buff_write() drops the result while the host has not read the ring
+                if (wptr + 1) % cnt != rptr:
+                    slot = encode_package(self.respond(command, payload[2:]))
+                    self.memory[res_addr + size * wptr:res_addr + size * wptr + len(slot)] = slot
+                    self.memory[self.par_addr + RESU_BUF_WPTR] = (wptr + 1) % cnt
+
+    def _serve_link(self):
+        """Accept link connections, one thread each"""
+        while not self.stopped:
+            try:
+                conn, _ = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            conn.settimeout(None)
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn):
+        """Answer the read_memory, write_memory and reset commands of OpenOcdLink"""
+        buffer = b""
+        with conn:
+            while not self.stopped:
+                data = conn.recv(4096)
+                if not data:
+                    return
+                buffer += data
+                while b"\x1a" in buffer:
+                    line, buffer = buffer.split(b"\x1a", 1)
+                    conn.sendall(self._tcl(line.decode().split()).encode() + b"\x1a")
+
+    def _tcl(self, words):
+        """Run one TCL command against the RAM image and return its output"""
+        with self.lock:
+            if words[:1] == ["read_memory"] and len(words) == 4 and words[2] == "8":
+                addr, size = int(words[1], 0), int(words[3], 0)
+                if addr + size > len(self.memory):
+                    return f"read_memory: failed to read memory at 0x{addr:x}"
+                return " ".join(f"0x{b:02x}" for b in self.memory[addr:addr + size])
+            if words[:1] == ["write_memory"] and len(words) >= 4 and words[2] == "8":
+                addr = int(words[1], 0)
+                data = bytes(int(w.strip("{}"), 0) for w in words[3:] if w.strip("{}"))
+                if addr + len(data) > len(self.memory):
+                    return f"write_memory: failed to write memory at 0x{addr:x}"
+                self.memory[addr:addr + len(data)] = data
+                return ""
+        if words == ["reset", "run"]:
+            self._init_buffers()
+            return ""
+        return f"invalid command name \"{words[0] if words else ''}\""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run demo autotests on many boards concurrently through their "
+                                                 "debug links and the firmware's SRAM mailbox")
+    parser.add_argument("plan", help="JSON test plan: a list of tests, or {\"boards\": [...], \"tests\": [...]}")
+    parser.add_argument("--board", action="append", default=[], metavar="HOST[:PORT]:CHIP",
+                        help="OpenOCD TCL server attached to a board, and its chip (repeatable)")
+    parser.add_argument("--fake", action="append", default=[], metavar="CHIP[:N]",
+                        help="add N fake boards for CHIP (repeatable), for testing without hardware")
+    parser.add_argument("--fake-hang", action="append", default=[], metavar="COMMAND",
+                        help="command the fake boards never answer (repeatable)")
+    parser.add_argument("--flash-cmd", default=None,
+                        help="flash command template, e.g. 'flasher -p {port} {firmware}' (default: no flashing)")
+    parser.add_argument("--baudrate", type=int, default=115200, help="baud rate of the log ports")
+    parser.add_argument("--timeout", type=float, default=10.0, help="default per-test timeout in seconds")
+    parser.add_argument("--flash-timeout", type=float, default=120.0, help="per-flash timeout in seconds")
+    parser.add_argument("--retries", type=int, default=0, help="retry a failed test this many times")
+    parser.add_argument("--root", default=str(ROOT_DIR), help="SDK root directory (for dut_cmd.h and pc_interface.h)")
+    parser.add_argument("--report", default=None, help="write per-test results as JSON")
+    args = parser.parse_args()
+
+    with open(args.plan, 'r') as f:
+        plan = json.load(f)
+    if isinstance(plan, list):
+        plan = {"tests": plan}
+    commands = load_commands(args.root)
+    addresses = load_base_addresses(args.root)
+
+    def chip_base(chip, override=None):
+        addr = override if override is not None else base_address(chip, addresses)
+        if addr is None:
+            parser.error(f"no PARA_BASE_ADDR for chip {chip} in {PC_INTERFACE_HEADER}")
+        return int(addr, 0) if isinstance(addr, str) else addr
+
+    boards = [Board(OpenOcdLink(b["link"]), b["chip"], chip_base(b["chip"], b.get("base_addr")), b.get("log_port"),
+                    b.get("baudrate", args.baudrate), b.get("flash_cmd", args.flash_cmd))
+              for b in plan.get("boards", [])]
+    for spec in args.board:
+        link, _, chip = spec.rpartition(":")
+        boards.append(Board(OpenOcdLink(link), chip, chip_base(chip), None, args.baudrate, args.flash_cmd))
+    fakes = []
+    for spec in args.fake:
+        chip, _, count = spec.partition(":")
+        hang = [commands[c] if c in commands else int(c, 0) for c in args.fake_hang]
+        for _ in range(int(count or 1)):
+            fakes.append(FakeDevice(chip, chip_base(chip), hang=hang).start())
+            boards.append(Board(OpenOcdLink(fakes[-1].link), chip, fakes[-1].base_addr, fakes[-1].log_port,
+                                args.baudrate, args.flash_cmd))
+    if not boards:
+        parser.error("no boards given, use --board, --fake or a \"boards\" list in the plan")
+
+    start = time.monotonic()
+    runner = AutotestRunner(boards, plan["tests"], args.timeout, args.flash_timeout, args.retries, commands)
+    results = asyncio.run(runner.run())
+    for fake in fakes:
+        fake.stop()
+
+    counts = {status: sum(r["status"] == status for r in results) for status in ("pass", "failed", "timeout", "skipped")}
+    print(f"{len(results)} tests on {len(boards)} boards in {time.monotonic() - start:.2f}s: "
+          f"{counts['pass']} passed, {counts['failed']} failed, {counts['timeout']} timed out, {counts['skipped']} skipped")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=4)
+    sys.exit(0 if counts["pass"] == len(results) else 1)
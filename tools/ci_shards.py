@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import heapq
+import argparse
+from pathlib import Path
+from statistics import median
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from gen_cmake import CMakeGenerator
+from config_layers import chip_name
+
+# Without history a target costs this much per compiled source, and every chip tree a shard builds this much
+# to configure and to build its shared objects
+SECONDS_PER_SOURCE = 0.5
+TREE_SETUP_SECONDS = 20.0
+# Weight of a new measurement against the recorded duration
+HISTORY_WEIGHT = 0.5
+# Ninja names per-target objects <dir>/CMakeFiles/<target>.dir/... and links demo/vendor/<target>/<target>
+NINJA_OBJECT_RE = re.compile(r'CMakeFiles/([^/]+)\.dir/')
+NINJA_LINK_RE = re.compile(r'^demo/vendor/([^/]+)/\1(?:\.bin|\.lst|\.size)?$')
+
+
+class ShardPlanner:
+    def __init__(self, root_dir, history_file=None):
+        """Initialize the planner; history_file holds the recorded build seconds per chip/target"""
+        self.root_dir = Path(root_dir).resolve()
+        self.history_file = Path(history_file) if history_file else self.root_dir / "build" / "target_durations.json"
+        # "chip/target" -> seconds
+        self.history = {}
+        if self.history_file.exists():
+            with open(self.history_file, 'r') as f:
+                self.history = json.load(f)
+
+    def save_history(self):
+        os.makedirs(self.history_file.parent, exist_ok=True)
+        with open(self.history_file, 'w') as f:
+            json.dump(dict(sorted(self.history.items())), f, indent=4)
+            f.write("\n")
+
+    def record(self, chip, durations):
+        """Blend measured {target: seconds} of one chip into the history"""
+        for target, seconds in durations.items():
+            key = f"{chip}/{target}"
+            old = self.history.get(key)
+            self.history[key] = round(seconds if old is None else old + HISTORY_WEIGHT * (seconds - old), 3)
+
+    @staticmethod
+    def parse_ninja_log(path):
+        """Return {target: seconds} summed from a .ninja_log, the last run of every output"""
+        outputs = {}
+        with open(path, 'r') as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) == 5 and not line.startswith("#"):
+                    # Later lines are newer runs of the same output
+                    outputs[fields[3]] = (int(fields[1]) - int(fields[0])) / 1000
+        durations = {}
+        for output, seconds in outputs.items():
+            match = NINJA_OBJECT_RE.search(output) or NINJA_LINK_RE.match(output)
+            if match:
+                durations[match.group(1)] = durations.get(match.group(1), 0) + seconds
+        return durations
+
+    def load_targets(self, chips=None):
+        """Return {chip: {target: compiled source count}} from the config model"""
+        generator = CMakeGenerator(self.root_dir)
+        targets = {}
+        for json_file in sorted(self.root_dir.glob("cmake_configs/*_cmake.json")):
+            chip = chip_name(json_file)
+            json_data = generator.parse_json(json_file) if not chips or chip in chips else None
+            if json_data:
+                # Sources before driver pruning, the estimate only needs how the targets compare
+                targets[chip] = {t["name"]: len(generator.target_sources(t))
+                                 for t in json_data.get("targets", []) if t.get("name")}
+        return targets
+
+    def estimates(self, targets):
+        """Return {(chip, target): (seconds, measured)}; unmeasured targets are estimated from their source count
+
+        The seconds per source are calibrated on the measured targets when there are any.
+        """
+        measured = [(self.history[f"{chip}/{name}"], count) for chip, counts in targets.items()
+                    for name, count in counts.items() if f"{chip}/{name}" in self.history and count]
+        rate = median(seconds / count for seconds, count in measured) if measured else SECONDS_PER_SOURCE
+        result = {}
+        for chip, counts in targets.items():
+            for name, count in counts.items():
+                seconds = self.history.get(f"{chip}/{name}")
+                result[(chip, name)] = (seconds, True) if seconds is not None else (max(count, 1) * rate, False)
+        return result
+
+    @staticmethod
+    def split(chip, names, pieces, estimates):
+        """Split the targets of one chip into balanced groups: [(seconds with tree setup, chip, names)]"""
+        heap = [(0.0, index, []) for index in range(pieces)]
+        for name in sorted(names, key=lambda n: (-estimates[(chip, n)][0], n)):
+            seconds, index, members = heapq.heappop(heap)
+            members.append(name)
+            heapq.heappush(heap, (seconds + estimates[(chip, name)][0], index, members))
+        return [(seconds + TREE_SETUP_SECONDS, chip, members) for seconds, _, members in heap if members]
+
+    @staticmethod
+    def pack(groups, shard_count):
+        """Place the groups largest first on the least loaded shard: [(seconds, index, groups)]"""
+        shards = [(0.0, index, []) for index in range(shard_count)]
+        for group in sorted(groups, key=lambda g: (-g[0], g[1])):
+            load, index, members = heapq.heappop(shards)
+            members.append(group)
+            heapq.heappush(shards, (load + group[0], index, members))
+        return sorted(shards, key=lambda s: s[1])
+
+    def plan(self, targets, shard_count, tolerance=0.05):
+        """Bin-pack the targets into shard_count shards, keeping the targets of a chip tree together
+
+        Every chip starts as one group. While the longest shard is more than tolerance above the mean, the
+        largest splittable group on it is split in two, each half paying the tree setup again.
+        """
+        estimates = self.estimates(targets)
+        pieces = {chip: 1 for chip, counts in targets.items() if counts}
+
+        def pack_pieces(pieces):
+            return self.pack([g for chip, count in pieces.items()
+                              for g in self.split(chip, targets[chip], count, estimates)], shard_count)
+
+        shards = pack_pieces(pieces)
+        while True:
+            longest = max(shards)
+            if longest[0] <= sum(s[0] for s in shards) / shard_count * (1 + tolerance):
+                break
+            # Try one more split of each chip on the longest shard, keep the best if it shortens the build
+            candidates = []
+            for chip in {g[1] for g in longest[2] if pieces[g[1]] < len(targets[g[1]])}:
+                candidate = dict(pieces, **{chip: pieces[chip] + 1})
+                candidates.append((max(pack_pieces(candidate))[0], chip, candidate))
+            if not candidates or min(candidates)[0] >= longest[0]:
+                break
+            pieces = min(candidates)[2]
+            shards = pack_pieces(pieces)
+        return [{"index": index, "seconds": round(load, 1),
+                 "builds": [{"chip": chip, "targets": sorted(names), "seconds": round(seconds, 1)}
+                            for seconds, chip, names in sorted(members, key=lambda g: (g[1], g[2]))]}
+                for load, index, members in shards]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split the chip x demo build matrix into CI shards balanced by build time")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                        help="SDK root directory")
+    parser.add_argument("--history", default=None, help="recorded durations (default: build/target_durations.json)")
+    parser.add_argument("--chip", action="append", default=None, help="only plan this chip (repeatable)")
+    parser.add_argument("-n", "--shards", type=int, default=4, help="number of shards")
+    parser.add_argument("--shard", type=int, default=None,
+                        help="print the build list of one shard as lines of <chip> <target>...")
+    parser.add_argument("--json", default=None, help="write the plan as JSON")
+    parser.add_argument("--record", nargs=2, action="append", default=[], metavar=("CHIP", "NINJA_LOG"),
+                        help="blend the durations of a finished chip build into the history (repeatable)")
+    args = parser.parse_args()
+
+    planner = ShardPlanner(args.root, args.history)
+    if args.record:
+        for chip, ninja_log in args.record:
+            durations = ShardPlanner.parse_ninja_log(ninja_log)
+            planner.record(chip, durations)
+            print(f"Recorded {len(durations)} target durations of {chip}")
+        planner.save_history()
+        sys.exit(0)
+
+    targets = planner.load_targets(args.chip)
+    shards = planner.plan(targets, max(args.shards, 1))
+    if args.shard is not None:
+        for build in shards[args.shard]["builds"]:
+            print(build["chip"], *build["targets"])
+        sys.exit(0)
+    estimated = sum(not measured for _, measured in planner.estimates(targets).values())
+    for shard in shards:
+        chips = ", ".join(f"{b['chip']} ({len(b['targets'])})" for b in shard["builds"])
+        print(f"Shard {shard['index']}: {shard['seconds']:>8.1f} s  {chips}")
+    loads = [s["seconds"] for s in shards]
+    print(f"{sum(len(c) for c in targets.values())} targets in {len(shards)} shards, "
+          f"longest {max(loads):.1f} s vs {sum(loads) / len(loads):.1f} s mean, {estimated} targets without history")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"shards": shards}, f, indent=4)
+            f.write("\n")
+        print(f"Generated shard plan: {args.json}")
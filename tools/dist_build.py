@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import shlex
+import shutil
+import socket
+import struct
+import hashlib
+import secrets
+import argparse
+import tempfile
+import threading
+import subprocess
+import socketserver
+from pathlib import Path
+from collections import deque, Counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from gen_cmake import CMakeGenerator
+from config_layers import chip_name, chip_source_dir
+from include_graph import IncludeGraph
+from toolchain_probe import COMPILER_PREFIXES
+
+# Job arguments name files relative to these tokens, so a worker can run them in its own sandbox
+ROOT_TOKEN = "{root}"
+OUTPUT_TOKEN = "{output}"
+# Every message is a length-prefixed JSON header, followed by "size" bytes of payload
+FRAME = struct.Struct('>I')
+CONNECT_TIMEOUT = 5
+SOCKET_TIMEOUT = 600
+JOB_TIMEOUT = 600
+# Workers run what clients send, so every hello and run carries this shared secret
+TOKEN_ENV = "SDK_DIST_TOKEN"
+# Job ids and input blobs are named by their SHA-256
+DIGEST_RE = re.compile(r'[0-9a-f]{64}')
+
+
+# ----------------------------------------------------------------------
+# Protocol
+# ----------------------------------------------------------------------
+
+def send_message(sock, message, payload=b""):
+    """Send one JSON header and its payload"""
+    header = json.dumps(dict(message, size=len(payload))).encode()
+    sock.sendall(FRAME.pack(len(header)) + header)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed by peer")
+        data += chunk
+    return bytes(data)
+
+
+def recv_message(sock):
+    """Receive one JSON header and its payload"""
+    (length,) = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    message = json.loads(_recv_exact(sock, length))
+    return message, _recv_exact(sock, message["size"]) if message.get("size") else b""
+
+
+_identity_memo = {}
+
+
+def toolchain_identity(compiler):
+    """Return (id, path) of a compiler on this host, the id hashed from its version banner and target; None if missing"""
+    if compiler not in _identity_memo:
+        path = shutil.which(compiler)
+        identity = None
+        if path:
+            try:
+                version = subprocess.run([path, "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                         universal_newlines=True, timeout=30).stdout
+                machine = subprocess.run([path, "-dumpmachine"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                         universal_newlines=True, timeout=30).stdout
+                digest = hashlib.sha256(f"{os.path.basename(compiler)}\0{version}\0{machine}".encode())
+                identity = (digest.hexdigest()[:16], path)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        _identity_memo[compiler] = identity
+    return _identity_memo[compiler]
+
+
+def allowed_compiler(name):
+    """Return True for a bare cross compiler name a worker may run, not a path or any other program"""
+    return isinstance(name, str) and os.path.basename(name) == name and name.startswith(COMPILER_PREFIXES)
+
+
+def check_job(job):
+    """Raise ValueError unless a job received by a worker only names a cross compiler and sandbox-relative inputs"""
+    if not isinstance(job.get("id"), str) or not DIGEST_RE.fullmatch(job["id"]):
+        raise ValueError("job id is not a SHA-256")
+    args = job.get("args")
+    if not isinstance(args, list) or not args or not all(isinstance(a, str) for a in args):
+        raise ValueError("job arguments are not a list of strings")
+    if not allowed_compiler(args[0]):
+        raise ValueError(f"{args[0]} is not a cross compiler")
+    if not isinstance(job.get("files"), dict):
+        raise ValueError("job files are not a mapping")
+    for rel_path, digest in job["files"].items():
+        if not isinstance(digest, str) or not DIGEST_RE.fullmatch(digest):
+            raise ValueError(f"input {rel_path} is not named by a SHA-256")
+        parts = rel_path.replace("\\", "/").split("/")
+        if not rel_path or os.path.isabs(rel_path) or ".." in parts:
+            raise ValueError(f"input {rel_path} is not a path inside the sandbox")
+
+
+def run_command(args, sandbox, compiler_path):
+    """Run a job's command inside sandbox; return (returncode, stdout, stderr, output bytes)"""
+    output = os.path.join(sandbox, "__output")
+    args = [output if a == OUTPUT_TOKEN else a.replace(ROOT_TOKEN, sandbox) for a in args]
+    args[0] = compiler_path
+    try:
+        proc = subprocess.run(args, cwd=sandbox, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE, universal_newlines=True, timeout=JOB_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return -1, "", str(e), b""
+    data = b""
+    if proc.returncode == 0 and os.path.exists(output):
+        with open(output, 'rb') as f:
+            data = f.read()
+    return proc.returncode, proc.stdout, proc.stderr, data
+
+
+# ----------------------------------------------------------------------
+# Worker
+# ----------------------------------------------------------------------
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, store_dir, token, slots=None):
+        """Initialize a worker keeping input blobs and job results by content hash under store_dir
+
+        Only clients presenting token are served.
+        """
+        super().__init__(address, WorkerHandler)
+        self.token = token
+        self.store_dir = Path(store_dir)
+        self.slots = slots or os.cpu_count() or 1
+        self.running = threading.Semaphore(self.slots)
+        for sub in ("blobs", "results", "work"):
+            os.makedirs(self.store_dir / sub, exist_ok=True)
+
+    def blob_path(self, digest):
+        return self.store_dir / "blobs" / digest
+
+    def put_blob(self, digest, data):
+        """Store an input file under its SHA-256, rejecting data that does not match it"""
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"blob {digest[:12]} does not match its hash")
+        tmp = self.blob_path(digest).with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.blob_path(digest))
+
+    def execute(self, job):
+        """Run a checked job in a fresh sandbox holding exactly its input files, or return its cached result"""
+        result_path = self.store_dir / "results" / job["id"]
+        if result_path.exists():
+            with open(result_path, 'rb') as f:
+                return {"returncode": 0, "stdout": "", "stderr": "", "cached": True}, f.read()
+        identity = toolchain_identity(job["args"][0])
+        if not identity or identity[0] != job["toolchain_id"]:
+            return {"returncode": -1, "stdout": "", "stderr": f"toolchain {job['args'][0]} not on this worker"}, b""
+        with self.running:
+            sandbox = os.path.realpath(tempfile.mkdtemp(dir=self.store_dir / "work"))
+            try:
+                for rel_path, digest in job["files"].items():
+                    path = os.path.realpath(os.path.join(sandbox, rel_path))
+                    # Also catches a link an earlier input placed in the sandbox
+                    if not path.startswith(sandbox + os.sep):
+                        return {"returncode": -1, "stdout": "", "stderr": f"input {rel_path} leaves the sandbox"}, b""
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    try:
+                        os.link(self.blob_path(digest), path)
+                    except OSError:
+                        shutil.copyfile(self.blob_path(digest), path)
+                code, stdout, stderr, data = run_command(job["args"], sandbox, identity[1])
+            finally:
+                shutil.rmtree(sandbox, ignore_errors=True)
+        if code == 0:
+            tmp = result_path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, result_path)
+        return {"returncode": code, "stdout": stdout, "stderr": stderr, "cached": False}, data
+
+
+class WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        """Serve hello and run requests on one connection until the client closes it"""
+        server = self.server
+        sock = self.request
+        sock.settimeout(SOCKET_TIMEOUT)
+        try:
+            while True:
+                message, _ = recv_message(sock)
+                if not hmac.compare_digest(str(message.get("token", "")), server.token):
+                    send_message(sock, {"error": "authentication failed"})
+                    return
+                if message["op"] == "hello":
+                    toolchains = {}
+                    for compiler in filter(allowed_compiler, message.get("compilers", [])):
+                        identity = toolchain_identity(compiler)
+                        if identity:
+                            toolchains[compiler] = identity[0]
+                    send_message(sock, {"slots": server.slots, "toolchains": toolchains})
+                elif message["op"] == "run":
+                    job = message["job"]
+                    try:
+                        check_job(job)
+                    except ValueError as e:
+                        send_message(sock, {"error": f"job rejected: {e}"})
+                        return
+                    need = sorted({d for d in job["files"].values() if not server.blob_path(d).exists()})
+                    send_message(sock, {"need": need})
+                    for _ in need:
+                        blob, data = recv_message(sock)
+                        if blob.get("digest") not in need:
+                            return
+                        server.put_blob(blob["digest"], data)
+                    result, data = server.execute(job)
+                    send_message(sock, result, data)
+        except (ConnectionError, OSError, ValueError):
+            pass
+
+
+# ----------------------------------------------------------------------
+# Client side executors
+# ----------------------------------------------------------------------
+
+class LocalExecutor:
+    """Runs jobs on this machine, in the SDK tree itself; the failover for every remote worker"""
+
+    def __init__(self, root_dir, slots):
+        self.name = "local"
+        self.root_dir = root_dir
+        self.slots = slots
+        self.alive = True
+        self.toolchains = set()
+
+    def connect(self, compilers):
+        self.toolchains = {identity[0] for identity in map(toolchain_identity, compilers) if identity}
+
+    def session(self):
+        return None
+
+    def run(self, session, job, hash_file):
+        identity = toolchain_identity(job["args"][0])
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "__output")
+            args = [output if a == OUTPUT_TOKEN else a for a in job["args"]]
+            code, stdout, stderr, data = run_command(args, str(self.root_dir), identity[1])
+        return {"returncode": code, "stdout": stdout, "stderr": stderr, "cached": False}, data
+
+
+class RemoteExecutor:
+    """Runs jobs on a worker, one connection per slot; input files are sent only when the worker lacks them"""
+
+    def __init__(self, address, root_dir, token):
+        host, _, port = address.rpartition(":")
+        self.name = address
+        self.address = (host or "127.0.0.1", int(port))
+        self.root_dir = root_dir
+        self.token = token
+        self.slots = 0
+        self.alive = False
+        self.toolchains = set()
+
+    def session(self):
+        sock = socket.create_connection(self.address, timeout=CONNECT_TIMEOUT)
+        sock.settimeout(SOCKET_TIMEOUT)
+        return sock
+
+    def connect(self, compilers):
+        try:
+            with self.session() as sock:
+                send_message(sock, {"op": "hello", "token": self.token, "compilers": sorted(compilers)})
+                reply, _ = recv_message(sock)
+        except (OSError, ConnectionError, ValueError) as e:
+            print(f"Worker {self.name} unreachable: {e}")
+            return
+        if "error" in reply:
+            print(f"Worker {self.name} refused the connection: {reply['error']}")
+            return
+        self.slots = reply["slots"]
+        self.toolchains = set(reply["toolchains"].values())
+        self.alive = True
+
+    def run(self, session, job, hash_file):
+        files = {os.path.relpath(p, self.root_dir): hash_file(p) for p in job["inputs"]}
+        paths = {digest: path for path, digest in zip(job["inputs"], files.values())}
+        send_message(session, {"op": "run", "token": self.token,
+                               "job": {"id": job["id"], "toolchain_id": job["toolchain_id"],
+                                       "args": job["args"], "files": files}})
+        reply, _ = recv_message(session)
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        for digest in reply["need"]:
+            with open(paths[digest], 'rb') as f:
+                send_message(session, {"digest": digest}, f.read())
+        return recv_message(session)
+
+
+# ----------------------------------------------------------------------
+# Planning and scheduling
+# ----------------------------------------------------------------------
+
+class DistributedBuild:
+    def __init__(self, root_dir, workers=(), local_slots=1, token=""):
+        """Initialize the build over the given worker addresses, sharing token with them, plus local slots for failover"""
+        self.root_dir = Path(root_dir).resolve()
+        self.local = LocalExecutor(self.root_dir, local_slots)
+        self.remotes = [RemoteExecutor(address, self.root_dir, token) for address in workers]
+        self.hash_memo = {}
+        self.hash_lock = threading.Lock()
+        self.lock = threading.Condition()
+        self.stats = Counter()
+
+    def hash_file(self, path):
+        """Return the SHA-256 of a file, memoized for the headers and objects many jobs share"""
+        with self.hash_lock:
+            if path in self.hash_memo:
+                return self.hash_memo[path]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        with self.hash_lock:
+            self.hash_memo[path] = digest.hexdigest()
+        return self.hash_memo[path]
+
+    def relative(self, path):
+        """Return a path relative to the root, by prefix for the many files under it"""
+        prefix = str(self.root_dir) + os.sep
+        return path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, self.root_dir)
+
+    def _tokenize(self, arg):
+        return arg.replace(str(self.root_dir), ROOT_TOKEN)
+
+    def content_id(self, job):
+        """Address a job by its toolchain, its root-relative arguments and the content of every input"""
+        digest = hashlib.sha256(job["toolchain_id"].encode())
+        digest.update("\0".join(job["args"]).encode())
+        for path in sorted(job["inputs"]):
+            digest.update(f"\0{self.relative(path)}\0{self.hash_file(path)}".encode())
+        return digest.hexdigest()
+
+    def plan(self, chips=None, link=False, entries=None):
+        """Return the compile jobs, deduplicated by content, and optionally one link job per target
+
+        Compile jobs come from the config model like compile_commands.json (or from given entries); their
+        inputs are the source and every header it reaches.
+        """
+        generator = CMakeGenerator(self.root_dir)
+        configs = []
+        if entries is None:
+            entries = []
+            for json_file in sorted(self.root_dir.glob("cmake_configs/*_cmake.json")):
+                chip = chip_name(json_file)
+                json_data = generator.parse_json(json_file) if not chips or chip in chips else None
+                if json_data:
+                    configs.append((chip, json_data))
+                    entries += generator.iter_compile_commands(json_data, chip, chip_source_dir(json_data, chip))
+
+        graph = IncludeGraph(self.root_dir)
+        units = []
+        for entry in entries:
+            include_dirs = tuple(os.path.normpath(os.path.join(entry["directory"], a[2:]))
+                                 for a in entry["arguments"] if a.startswith("-I") and len(a) > 2)
+            units.append(("", "", [entry["file"]], include_dirs))
+        graph.scan_all(units)
+
+        jobs = {}
+        objects = {}
+        for entry, (_, _, (source,), include_dirs) in zip(entries, units):
+            args = list(entry["arguments"])
+            output = os.path.join(entry["directory"], args[args.index("-o") + 1])
+            args[args.index("-o") + 1] = OUTPUT_TOKEN
+            # autoconf.h comes in through -include, not through the include graph
+            forced = {os.path.join(entry["directory"], path) for flag, path in zip(args, args[1:]) if flag == "-include"}
+            job = {"kind": "compile", "args": [self._tokenize(a) for a in args], "outputs": [output], "deps": [],
+                   "inputs": sorted({source} | forced | graph.closure(source, include_dirs)), "name": entry["file"]}
+            identity = toolchain_identity(args[0])
+            job["toolchain_id"] = identity[0] if identity else f"missing:{args[0]}"
+            job["id"] = self.content_id(job)
+            # The same source built with the same flags by several demos compiles once
+            if job["id"] in jobs:
+                jobs[job["id"]]["outputs"].append(output)
+            else:
+                jobs[job["id"]] = job
+            # Objects land in build/<chip>/<target>/..., which is what a link job collects
+            parts = self.relative(output).split(os.sep)
+            if len(parts) > 3 and parts[0] == "build":
+                objects.setdefault((parts[1], parts[2]), []).append((output, jobs[job["id"]]["id"]))
+
+        links = []
+        for chip, json_data in configs if link else []:
+            for target in json_data.get("targets", []):
+                name = target.get("name")
+                built = objects.get((chip, name), [])
+                if not built:
+                    continue
+                compiler = "tc32-elf-gcc" if "TC32" in target.get("toolchain", "") else "riscv32-elf-gcc"
+                options = generator.expand_options(target.get("linker_options", []))
+                directories = generator.expand_options(target.get("linker_directories", []))
+                libraries = [os.path.join(d, f"lib{lib}.a") for d in directories
+                             for lib in target.get("linker_libraries", []) if os.path.exists(os.path.join(d, f"lib{lib}.a"))]
+                scripts = [o[2:] for o in options if o.startswith("-T") and os.path.exists(o[2:])]
+                args = ([compiler] + options + [o for o, _ in built] + [f"-L{d}" for d in directories]
+                        + ["-Wl,--start-group"] + [f"-l{lib}" for lib in target.get("linker_libraries", [])]
+                        + ["-Wl,--end-group", "-o", OUTPUT_TOKEN])
+                identity = toolchain_identity(compiler)
+                links.append({"kind": "link", "args": [self._tokenize(a) for a in args], "name": f"{chip}/{name}",
+                              "outputs": [str(self.root_dir / "build" / chip / name / f"{name}.elf")],
+                              "deps": sorted({job_id for _, job_id in built}),
+                              "inputs": [o for o, _ in built] + scripts + libraries,
+                              "toolchain_id": identity[0] if identity else f"missing:{compiler}"})
+        return list(jobs.values()) + links
+
+    # ------------------------------------------------------------------
+
+    def _eligible(self, executor, job):
+        return executor.alive and job["toolchain_id"] in executor.toolchains
+
+    def _enqueue(self, job):
+        """Queue a ready job on the least loaded remote able to run it, else locally; fail it if nobody can"""
+        remotes = [r for r in self.remotes if self._eligible(r, job)]
+        if remotes:
+            target = min(remotes, key=lambda r: len(self.queues[r.name]) / r.slots)
+        elif self._eligible(self.local, job):
+            target = self.local
+            if self.remotes:
+                self.stats["local_fallback"] += 1
+        else:
+            self._finish(job, f"{job['name']} (no live worker has {job['args'][0]})")
+            return
+        self.queues[target.name].append(job)
+        self.lock.notify_all()
+
+    def _finish(self, job, failure=None):
+        """Record a job as done, or failed with the given message, and release the jobs waiting on it"""
+        self.pending -= 1
+        self.done[job["id"]] = failure is None
+        if failure:
+            self.failed.append(failure)
+        for waiting in self.waiting.pop(job["id"], []):
+            waiting["missing"] -= 1
+            if waiting["missing"] == 0:
+                if all(self.done[d] for d in waiting["deps"]):
+                    waiting["id"] = self.content_id(waiting)
+                    self._enqueue(waiting)
+                else:
+                    # Dependents of a failed job are skipped, like make -k
+                    waiting["id"] = waiting["name"]
+                    self._finish(waiting, f"{waiting['name']} (skipped)")
+        self.lock.notify_all()
+
+    def _take(self, executor):
+        """Return the next job for an executor: its own queue first, else stolen from the longest other one"""
+        with self.lock:
+            while True:
+                if not executor.alive:
+                    return None
+                if self.queues[executor.name]:
+                    return self.queues[executor.name].popleft()
+                victims = sorted((q for name, q in self.queues.items() if name != executor.name and q),
+                                 key=len, reverse=True)
+                for queue in victims:
+                    # Steal from the far end, the jobs its owner would reach last
+                    for index in range(len(queue) - 1, -1, -1):
+                        if self._eligible(executor, queue[index]):
+                            job = queue[index]
+                            del queue[index]
+                            self.stats["stolen"] += 1
+                            return job
+                if self.pending == 0:
+                    return None
+                self.lock.wait()
+
+    def _fail_over(self, executor, job, error):
+        """Take a dead worker out of the pool and move its queued jobs and the interrupted one elsewhere"""
+        with self.lock:
+            if executor.alive:
+                executor.alive = False
+                print(f"Worker {executor.name} failed ({error}), moving its jobs")
+            orphans = [job] + list(self.queues[executor.name])
+            self.queues[executor.name].clear()
+            self.stats["failed_over"] += len(orphans)
+            for orphan in orphans:
+                self._enqueue(orphan)
+
+    def _complete(self, executor, job, result, data):
+        """Write a job's result to its outputs and release the jobs waiting on it"""
+        failed = result["returncode"] != 0
+        if not failed:
+            for output in job["outputs"]:
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                with open(output, 'wb') as f:
+                    f.write(data)
+                with self.hash_lock:
+                    self.hash_memo.pop(output, None)
+        if result.get("stdout") or result.get("stderr"):
+            print(f"[{executor.name}] {job['name']}:\n{result.get('stdout', '')}{result.get('stderr', '')}", end="")
+        with self.lock:
+            self.stats[f"{executor.name}:jobs"] += 1
+            self.stats["cached"] += bool(result.get("cached"))
+            self._finish(job, job["name"] if failed else None)
+
+    def _slot(self, executor):
+        session = None
+        while True:
+            job = self._take(executor)
+            if job is None:
+                break
+            try:
+                if session is None:
+                    session = executor.session()
+                result, data = executor.run(session, job, self.hash_file)
+            except (OSError, ConnectionError, ValueError) as e:
+                self._fail_over(executor, job, e)
+                break
+            self._complete(executor, job, result, data)
+        if session is not None:
+            session.close()
+
+    def run(self, jobs):
+        """Run the jobs over every live executor; return the names of the failed ones"""
+        compilers = {job["args"][0] for job in jobs}
+        for executor in [self.local] + self.remotes:
+            executor.connect(compilers)
+        self.queues = {executor.name: deque() for executor in [self.local] + self.remotes}
+        self.pending = len(jobs)
+        self.done = {}
+        self.failed = []
+        self.waiting = {}
+        start = time.perf_counter()
+        with self.lock:
+            for job in jobs:
+                job["missing"] = len(job["deps"])
+                for dep in job["deps"]:
+                    self.waiting.setdefault(dep, []).append(job)
+            # Only once every dependent waits, as a job can fail right away when nobody has its toolchain
+            for job in jobs:
+                if not job["deps"]:
+                    self._enqueue(job)
+        threads = [threading.Thread(target=self._slot, args=(executor,), daemon=True)
+                   for executor in [self.local] + self.remotes if executor.alive for _ in range(executor.slots)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.pending:
+            # Every executor able to run the rest is gone
+            self.failed.append(f"{self.pending} jobs without a live worker for their toolchain")
+        self.stats["seconds"] = round(time.perf_counter() - start, 2)
+        return self.failed
+
+
+def spawn_local_workers(count, slots, store_root, token):
+    """Start stand-in workers as local processes serving token; return (processes, addresses)"""
+    processes, addresses = [], []
+    for index in range(count):
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker", "--host", "127.0.0.1", "--port", "0",
+                                    "--store", os.path.join(store_root, f"worker{index}"), "--slots", str(slots)],
+                                   stdout=subprocess.PIPE, universal_newlines=True, env=dict(os.environ, **{TOKEN_ENV: token}))
+        # The worker prints its address once it listens
+        addresses.append(process.stdout.readline().split()[-1])
+        processes.append(process)
+    return processes, addresses
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the SDK compile and link jobs over a pool of socket workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="serve jobs to build clients")
+    worker.add_argument("--host", default="127.0.0.1",
+                        help="address to listen on (only expose it on a trusted network, clients run compilers on it)")
+    worker.add_argument("--port", type=int, default=7390, help="port to listen on (0 picks a free one)")
+    worker.add_argument("--store", default=os.path.join(tempfile.gettempdir(), "sdk_dist_worker"),
+                        help="blob and result store")
+    worker.add_argument("--slots", type=int, default=None, help="jobs run in parallel (default: CPU count)")
+    build = sub.add_parser("build", help="plan the jobs from the config model and run them")
+    build.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                       help="SDK root directory")
+    build.add_argument("--chip", action="append", default=None, help="only build this chip (repeatable)")
+    build.add_argument("--compile-commands", default=None,
+                       help="run the entries of this compilation database instead of the config model")
+    build.add_argument("--link", action="store_true", help="also link every target once its objects are built")
+    build.add_argument("--worker", action="append", default=[], metavar="HOST:PORT", help="remote worker (repeatable)")
+    build.add_argument("--local-workers", type=int, default=0, help="start this many stand-in workers on this machine")
+    build.add_argument("--local-slots", type=int, default=1, help="local jobs for stealing and failover")
+    args = parser.parse_args()
+    # Kept out of the command line, where every local user could read it
+    token = os.environ.get(TOKEN_ENV, "")
+
+    if args.command == "worker":
+        if not token:
+            parser.error(f"set {TOKEN_ENV} to the secret shared with the build clients")
+        server = WorkerServer((args.host, args.port), args.store, token, args.slots)
+        print(f"Worker listening on {server.server_address[0]}:{server.server_address[1]}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+
+    if args.worker and not token:
+        parser.error(f"set {TOKEN_ENV} to the secret the workers were started with")
+    # Stand-in workers only ever talk to this build, a fresh secret does
+    token = token or secrets.token_hex(32)
+    processes = []
+    store = tempfile.mkdtemp(prefix="sdk_dist_") if args.local_workers else None
+    try:
+        if args.local_workers:
+            processes, addresses = spawn_local_workers(args.local_workers, 2, store, token)
+            args.worker += addresses
+        dist = DistributedBuild(args.root, args.worker, args.local_slots, token)
+        entries = None
+        if args.compile_commands:
+            with open(args.compile_commands, 'r') as f:
+                entries = [e if "arguments" in e else dict(e, arguments=shlex.split(e["command"])) for e in json.load(f)]
+        jobs = dist.plan(args.chip, args.link, entries)
+        failed = dist.run(jobs)
+    finally:
+        for process in processes:
+            process.terminate()
+        if store:
+            shutil.rmtree(store, ignore_errors=True)
+    print(f"{len(jobs)} jobs in {dist.stats['seconds']} s: " + ", ".join(
+        f"{key} {value}" for key, value in sorted(dist.stats.items()) if key != "seconds"))
+    for name in failed:
+        print(f"Failed: {name}")
+    sys.exit(1 if failed else 0)
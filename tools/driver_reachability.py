@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from include_graph import IncludeGraph
+from config_layers import chip_name
+
+
+# Comments and literals carry no references; the literals also hide braces from the parser
+NOISE_RE = re.compile(rb'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+DIRECTIVE_RE = re.compile(rb'^[ \t]*#(?:[^\n]*\\\n)*[^\n]*', re.M)
+TOKEN_RE = re.compile(rb'[A-Za-z_]\w*|[{}()=;\[]')
+IDENT_RE = re.compile(rb'[A-Za-z_]\w*')
+DRIVER_DIR_RE = re.compile(r'^chip/[^/]+/drivers$')
+ATTRIBUTE_TOKENS = (b'__attribute__', b'__attribute')
+# Bumped whenever scan_symbols changes, so cached results from an older scanner are dropped
+SCAN_VERSION = 2
+
+
+def scan_symbols(path):
+    """Return [defined, referenced] symbols of one C or assembly file by a brace-level token scan"""
+    try:
+        with open(path, 'rb') as f:
+            text = NOISE_RE.sub(b' ', f.read())
+    except OSError:
+        return [[], []]
+    refs = set()
+    # Macro bodies may call functions, so identifiers in #define lines count as references
+    for directive in DIRECTIVE_RE.findall(text):
+        if re.match(rb'\s*#\s*define\b', directive):
+            refs.update(IDENT_RE.findall(directive))
+    text = DIRECTIVE_RE.sub(b' ', text)
+    if path.endswith(".S"):
+        # Vector tables and startup code reference handlers by name, anything can be a reference there
+        return [[], sorted(r.decode() for r in set(IDENT_RE.findall(text)) | refs)]
+
+    defined = set()
+    statement = []
+    depth = 0
+    body_kind = None
+    for token in TOKEN_RE.findall(text):
+        if token == b'{':
+            if depth == 0:
+                # name(...) { with no "=" before it opens a function body, anything else an initializer or type
+                if b'(' in statement and b'=' not in statement and statement[-1:] == [b')']:
+                    # The name precedes the parameter list, the last parenthesized group once the
+                    # __attribute__((...)) groups following it are skipped
+                    end = len(statement) - 1
+                    while True:
+                        level, start = 0, end
+                        for start in range(end, -1, -1):
+                            level += {b')': 1, b'(': -1}.get(statement[start], 0)
+                            if level == 0:
+                                break
+                        if start < 2 or statement[start - 1] not in ATTRIBUTE_TOKENS or statement[start - 2] != b')':
+                            break
+                        end = start - 2
+                    head = statement[:start]
+                    if head and IDENT_RE.fullmatch(head[-1]) and b'static' not in head:
+                        defined.add(head[-1])
+                    body_kind = "function"
+                else:
+                    body_kind = "block"
+            depth += 1
+        elif token == b'}':
+            depth = max(depth - 1, 0)
+            if depth == 0 and body_kind == "function":
+                statement = []
+        elif depth > 0:
+            if IDENT_RE.fullmatch(token):
+                refs.add(token)
+        elif token == b';':
+            # Global variable definitions: the name before "=" or "[" or ";" of a non-extern declaration
+            if statement and b'(' not in statement and not {b'extern', b'typedef', b'static'} & set(statement):
+                end = next((i for i, t in enumerate(statement) if t in (b'=', b'[')), len(statement))
+                names = [t for t in statement[:end] if IDENT_RE.fullmatch(t)]
+                if names:
+                    defined.add(names[-1])
+            if b'=' in statement:
+                refs.update(t for t in statement[statement.index(b'=') + 1:] if IDENT_RE.fullmatch(t))
+            statement = []
+        else:
+            statement.append(token)
+    return [sorted(d.decode() for d in defined), sorted(r.decode() for r in refs)]
+
+
+class DriverReachability:
+    def __init__(self, root_dir, cache_file=None, jobs=None, graph=None):
+        """Initialize the analyzer for the SDK root directory, optionally sharing an existing include graph"""
+        self.root_dir = Path(root_dir).resolve()
+        self.cache_file = Path(cache_file) if cache_file else self.root_dir / "build" / "driver_symbols_cache.json"
+        self.jobs = jobs
+        self.graph = graph or IncludeGraph(self.root_dir, jobs=jobs)
+        # path -> [mtime_ns, size, defined, referenced]
+        self.files = {}
+        # library path -> identifiers in its string tables
+        self.library_memo = {}
+        # (source, include_dirs) -> references of the unit, its own and those of the headers it reaches
+        self.refs_memo = {}
+
+    def load_cache(self):
+        """Load the per-file symbols of an earlier scan"""
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r') as f:
+                try:
+                    cache = json.load(f)
+                except json.JSONDecodeError:
+                    cache = {}
+            self.files = cache.get("files", {}) if cache.get("version") == SCAN_VERSION else {}
+
+    def save_cache(self):
+        """Write the per-file symbols"""
+        os.makedirs(self.cache_file.parent, exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump({"version": SCAN_VERSION, "files": self.files}, f)
+
+    def scan(self, paths):
+        """Scan every given file whose (mtime, size) changed since the cached scan, in parallel"""
+        stale = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            cached = self.files.get(path)
+            if not cached or cached[0] != stat.st_mtime_ns or cached[1] != stat.st_size:
+                stale.append((path, stat))
+        if stale:
+            with ProcessPoolExecutor(self.jobs) as pool:
+                results = pool.map(scan_symbols, [p for p, _ in stale], chunksize=32)
+                for (path, stat), (defined, refs) in zip(stale, results):
+                    self.files[path] = [stat.st_mtime_ns, stat.st_size, defined, refs]
+        return len(stale)
+
+    def _library_symbols(self, target, symbols):
+        """Return the given symbols a prebuilt library linked by the target names in its string table"""
+        found = set()
+        for directory in target.get("linker_directories", []):
+            directory = directory.replace("${CMAKE_CURRENT_SOURCE_DIR}", str(self.root_dir))
+            for name in target.get("linker_libraries", []):
+                path = os.path.join(directory, f"lib{name}.a")
+                if path not in self.library_memo:
+                    try:
+                        with open(path, 'rb') as f:
+                            names = re.findall(rb'\0([A-Za-z_]\w*)(?=\0)', f.read())
+                    except OSError:
+                        names = []
+                    self.library_memo[path] = {n.decode() for n in names}
+                found |= self.library_memo[path] & symbols
+        return found
+
+    def unit_refs(self, source, include_dirs):
+        """Return the references of a translation unit: its own plus every header it reaches"""
+        key = (source, include_dirs)
+        if key not in self.refs_memo:
+            refs = set(self.files.get(source, [0, 0, [], []])[3])
+            for header in self.graph.closure(source, include_dirs):
+                refs.update(self.files.get(header, [0, 0, [], []])[3])
+            self.refs_memo[key] = refs
+        return self.refs_memo[key]
+
+    def analyze(self, chips=None):
+        """Return {chip: {target: {"kept": [...], "pruned": [...]}}} of driver sources by symbol reachability"""
+        configs = {}
+        for json_file in sorted(self.graph.cmake_configs_dir.glob("*_cmake.json")):
+            chip = chip_name(json_file)
+            if not chips or chip in chips:
+                json_data = self.graph.parse_json(json_file)
+                if json_data:
+                    configs[chip] = {t.get("name"): t for t in json_data.get("targets", [])}
+        targets = self.graph.load_targets(chips)
+        self.graph.scan_all(targets)
+        if not self.files:
+            self.load_cache()
+
+        # A unit's references include those of every header it reaches, for static inline helpers and macros
+        units = {(source, include_dirs) for _, _, sources, include_dirs in targets for source in sources}
+        headers = {h for source, include_dirs in units for h in self.graph.closure(source, include_dirs)}
+        if self.scan(sorted({source for source, _ in units} | headers)):
+            self.save_cache()
+
+        report = defaultdict(dict)
+        for chip, name, sources, include_dirs in targets:
+            sources = list(dict.fromkeys(sources))
+            target = configs.get(chip, {}).get(name, {})
+            driver_dirs = [str(self.root_dir / d) + os.sep for d in target.get("directories", [])
+                           if DRIVER_DIR_RE.match(d.rstrip("/"))]
+            drivers = [s for s in sources if any(s.startswith(d) for d in driver_dirs)]
+            if not drivers:
+                continue
+            providers = defaultdict(set)
+            for source in drivers:
+                for symbol in self.files.get(source, [0, 0, [], []])[2]:
+                    providers[symbol].add(source)
+
+            # Everything outside the driver directories is a root, as is whatever the prebuilt libraries call
+            kept = set()
+            pending = [s for s in sources if s not in drivers]
+            required = self._library_symbols(target, providers.keys())
+            for symbol in required:
+                pending += providers[symbol]
+            while pending:
+                source = pending.pop()
+                if source in drivers:
+                    if source in kept:
+                        continue
+                    kept.add(source)
+                for symbol in self.unit_refs(source, include_dirs) & providers.keys():
+                    for provider in providers[symbol]:
+                        if provider not in kept:
+                            pending.append(provider)
+            report[chip][name] = {
+                "kept": [os.path.relpath(s, self.root_dir) for s in drivers if s in kept],
+                "pruned": [os.path.relpath(s, self.root_dir) for s in drivers if s not in kept],
+            }
+        return dict(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute the driver sources each demo reaches by symbol references")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                        help="SDK root directory")
+    parser.add_argument("--chip", action="append", default=None, help="only analyze this chip (repeatable)")
+    parser.add_argument("--cache", default=None, help="symbol cache file (default: build/driver_symbols_cache.json)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="parallel scanner processes")
+    parser.add_argument("-v", "--verbose", action="store_true", help="list the pruned sources of every demo")
+    parser.add_argument("--json", default=None, help="write the kept and pruned sources per demo as JSON")
+    args = parser.parse_args()
+
+    analyzer = DriverReachability(args.root, args.cache, args.jobs)
+    report = analyzer.analyze(args.chip)
+    total_kept = total_pruned = 0
+    for chip, demos in sorted(report.items()):
+        kept = sum(len(d["kept"]) for d in demos.values())
+        pruned = sum(len(d["pruned"]) for d in demos.values())
+        total_kept += kept
+        total_pruned += pruned
+        print(f"{chip}: {len(demos)} demos, {kept} driver sources kept, {pruned} pruned")
+        if args.verbose:
+            for name, demo in sorted(demos.items()):
+                pruned_names = ", ".join(os.path.basename(p) for p in demo["pruned"])
+                print(f"    {name:<32} {len(demo['kept']):>3} kept, pruned: {pruned_names or '-'}")
+    print(f"Total: {total_kept} driver sources compiled, {total_pruned} pruned "
+          f"({100 * total_pruned / max(total_kept + total_pruned, 1):.0f}% less driver compile work)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Generated driver reachability report: {args.json}")
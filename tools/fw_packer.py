@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import mmap
+import zlib
+import struct
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from gen_cmake import CMakeGenerator
+from config_layers import chip_name
+
+# Defaults of the "firmware_layout" config key: erase sector the image is padded to, erased flash value,
+# and whether the OTA trailer is appended
+DEFAULT_LAYOUT = {"sector": 0x1000, "fill": 0xff, "ota_trailer": True}
+CHUNK_SIZE = 1 << 20
+# The version string sdk_version.c places at the end of the firmware, the one tl_check_fw.sh greps for
+VERSION_RE = re.compile(rb'\$\$\$([A-Za-z0-9 _.]+)\$\$\$')
+# OTA trailer after the padded payload: magic, trailer format, region count, payload size, payload CRC-32,
+# reserved, SDK version
+OTA_TRAILER = struct.Struct('<4sHHIII16s')
+OTA_MAGIC = b"TLOT"
+OTA_FORMAT = 1
+
+
+class Digest:
+    """CRC-32 and SHA-256 of one stream, updated chunk by chunk"""
+
+    def __init__(self):
+        self.crc32 = 0
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def update(self, chunk):
+        self.crc32 = zlib.crc32(chunk, self.crc32)
+        self.sha256.update(chunk)
+        self.size += len(chunk)
+
+    def as_dict(self):
+        return {"size": self.size, "crc32": f"{self.crc32 & 0xffffffff:08x}", "sha256": self.sha256.hexdigest()}
+
+
+def pack_regions(regions, output, layout=None, flash_size=None):
+    """Stream the regions ([{"name", "offset", "path"}]) into one image, padded and with the OTA trailer
+
+    Inputs are mapped, not read, and go through memoryview slices straight into the output, which is
+    written once front to back; every chunk updates the region and image digests on its way.
+    """
+    layout = dict(DEFAULT_LAYOUT, **(layout or {}))
+    fill = memoryview(bytes([layout["fill"]]) * CHUNK_SIZE)
+    regions = sorted(regions, key=lambda r: r["offset"])
+    end = 0
+    for index, region in enumerate(regions):
+        region_end = region["offset"] + os.path.getsize(region["path"])
+        if region["offset"] < end:
+            raise ValueError(f"{region['name']} at 0x{region['offset']:x} overlaps {regions[index - 1]['name']}, "
+                             f"which ends at 0x{end:x}")
+        if flash_size and region_end > flash_size:
+            raise ValueError(f"{region['name']} ends at 0x{region_end:x}, past the 0x{flash_size:x} byte flash")
+        end = region_end
+    payload_size = -(-end // layout["sector"]) * layout["sector"]
+    if flash_size and payload_size + (OTA_TRAILER.size if layout["ota_trailer"] else 0) > flash_size:
+        raise ValueError(f"padded image of 0x{payload_size:x} bytes does not fit the 0x{flash_size:x} byte flash")
+
+    image = Digest()
+    payload = Digest()
+    manifest = {"regions": []}
+    version = b""
+    tmp = f"{output}.tmp"
+    with open(tmp, 'wb') as out:
+        def emit(view, *digests):
+            for start in range(0, len(view), CHUNK_SIZE):
+                chunk = view[start:start + CHUNK_SIZE]
+                for digest in digests:
+                    digest.update(chunk)
+                out.write(chunk)
+
+        def emit_fill(count):
+            while count > 0:
+                emit(fill[:min(count, CHUNK_SIZE)], image, payload)
+                count -= CHUNK_SIZE
+
+        for region in regions:
+            emit_fill(region["offset"] - image.size)
+            digest = Digest()
+            with open(region["path"], 'rb') as f:
+                if os.fstat(f.fileno()).st_size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        if not version:
+                            found = VERSION_RE.search(mapped)
+                            version = found.group(1) if found else b""
+                        with memoryview(mapped) as view:
+                            emit(view, digest, image, payload)
+            manifest["regions"].append({"name": region["name"], "file": os.path.basename(region["path"]),
+                                        "offset": f"0x{region['offset']:x}", **digest.as_dict()})
+        emit_fill(payload_size - image.size)
+        if layout["ota_trailer"]:
+            trailer = OTA_TRAILER.pack(OTA_MAGIC, OTA_FORMAT, len(regions), payload.size,
+                                       payload.crc32 & 0xffffffff, 0, version[:16])
+            emit(memoryview(trailer), image)
+    os.replace(tmp, output)
+
+    manifest.update(version=version.decode(), payload=payload.as_dict(), **image.as_dict())
+    return manifest
+
+
+class FirmwarePacker:
+    def __init__(self, root_dir, build_dir="build/{chip}", output_dir="build/firmware", jobs=None):
+        """Initialize the packer; build_dir is the CMake binary dir of a chip, {chip} is replaced by its name"""
+        self.root_dir = Path(root_dir).resolve()
+        self.build_dir = build_dir
+        self.output_dir = self.root_dir / output_dir
+        self.jobs = jobs
+        self.generator = CMakeGenerator(self.root_dir)
+
+    def bin_path(self, chip, target):
+        """Return where the CMake build of a chip leaves the .bin of a demo"""
+        return self.root_dir / self.build_dir.format(chip=chip) / "demo" / "vendor" / target / f"{target}.bin"
+
+    def load_jobs(self, chips=None, targets=None):
+        """Return one packing job per demo and per product: [{chip, name, regions, layout, flash_size}]"""
+        jobs = []
+        for json_file in sorted(self.root_dir.glob("cmake_configs/*_cmake.json")):
+            chip = chip_name(json_file)
+            if chips and chip not in chips:
+                continue
+            json_data = self.generator.parse_json(json_file)
+            if not json_data:
+                continue
+            layout = json_data.get("firmware_layout", {})
+            # A demo is an image on its own, the .bin starts at the address its link script loads it to
+            for target in json_data.get("targets", []):
+                name = target.get("name")
+                if name and (not targets or name in targets):
+                    _, flash_size = self.generator.link_layout(target)
+                    jobs.append({"chip": chip, "name": name, "layout": layout, "flash_size": flash_size,
+                                 "regions": [{"name": name, "offset": 0, "path": str(self.bin_path(chip, name))}]})
+            # A product places the image of every core at the offset of that core's link script
+            for product in self.generator.products(json_data):
+                if not targets or product["name"] in targets:
+                    jobs.append({"chip": chip, "name": product["name"], "layout": layout,
+                                 "flash_size": product["flash_size"],
+                                 "regions": [{"name": i["target"], "offset": i["offset"],
+                                              "path": str(self.bin_path(chip, i["target"]))}
+                                             for i in product["images"]]})
+        return jobs
+
+    def pack(self, job):
+        """Pack one job into <output>/<chip>/<name>.bin and its manifest; None if an input is not built"""
+        if not all(os.path.exists(r["path"]) for r in job["regions"]):
+            return None
+        out_dir = self.output_dir / job["chip"]
+        os.makedirs(out_dir, exist_ok=True)
+        manifest = pack_regions(job["regions"], out_dir / f"{job['name']}.bin", job["layout"], job["flash_size"])
+        manifest = {"chip": job["chip"], "name": job["name"], **manifest}
+        with open(out_dir / f"{job['name']}_manifest.json", 'w') as f:
+            json.dump(manifest, f, indent=4)
+            f.write("\n")
+        return manifest
+
+    def pack_all(self, jobs):
+        """Pack the jobs in parallel, mmap I/O and the digests release the GIL; return the manifests packed"""
+        with ThreadPoolExecutor(self.jobs) as pool:
+            results = list(pool.map(self.pack, jobs))
+        return [m for m in results if m]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack demo and multi-core product images for flashing and OTA")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                        help="SDK root directory")
+    parser.add_argument("--chip", action="append", default=None, help="only pack this chip (repeatable)")
+    parser.add_argument("--target", action="append", default=None, help="only pack this demo or product (repeatable)")
+    parser.add_argument("--build-dir", default="build/{chip}", help="CMake binary dir of a chip, {chip} is its name")
+    parser.add_argument("-o", "--output-dir", default="build/firmware", help="directory for the packed images")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="images packed in parallel")
+    args = parser.parse_args()
+
+    packer = FirmwarePacker(args.root, args.build_dir, args.output_dir, args.jobs)
+    jobs = packer.load_jobs(args.chip, args.target)
+    try:
+        manifests = packer.pack_all(jobs)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for manifest in manifests:
+        print(f"{manifest['chip']}/{manifest['name']}.bin: {manifest['size']} bytes, "
+              f"crc32 {manifest['payload']['crc32']}, version {manifest['version'] or '-'}")
+    print(f"Packed {len(manifests)} of {len(jobs)} images into {packer.output_dir}, "
+          f"{len(jobs) - len(manifests)} without built inputs")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import json
+import glob
+import argparse
+from pathlib import Path
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+# The config model lives next to the generators in the SDK root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from config_layers import load_config, chip_name
+
+
+INCLUDE_RE = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\r\n]+)[>"]', re.M)
+SOURCE_SUFFIXES = (".c", ".S")
+
+
+def scan_includes(path):
+    """Return the include directives of one file as [[kind, name]], kind is '"' or '<'"""
+    try:
+        with open(path, 'rb') as f:
+            return [[kind.decode(), name.decode(errors="ignore").strip()] for kind, name in INCLUDE_RE.findall(f.read())]
+    except OSError:
+        return []
+
+
+class IncludeGraph:
+    def __init__(self, root_dir, cache_file=None, jobs=None):
+        """Initialize the include graph for the SDK root directory"""
+        self.root_dir = Path(root_dir).resolve()
+        self.cmake_configs_dir = self.root_dir / "cmake_configs"
+        self.cache_file = Path(cache_file) if cache_file else self.root_dir / "build" / "include_graph_cache.json"
+        self.jobs = jobs
+        # path -> [mtime_ns, size, includes]
+        self.files = {}
+        self.resolve_memo = {}
+        # (source, include_dirs) -> headers reached, shared by every analysis over the same graph
+        self.closure_memo = {}
+        self.targets_memo = {}
+
+    def parse_json(self, json_path):
+        """Parse a single JSON configuration file, resolving its layers into the flat format"""
+        try:
+            return load_config(json_path)
+        except (ValueError, OSError) as e:
+            print(f"Error parsing {json_path}: {e}")
+            return None
+
+    def load_targets(self, chips=None):
+        """Return [(chip, target, sources, include_dirs)] from the JSON config model"""
+        key = tuple(chips or ())
+        if key in self.targets_memo:
+            return self.targets_memo[key]
+        targets = []
+        for json_file in sorted(glob.glob(str(self.cmake_configs_dir / "*_cmake.json"))):
+            chip = chip_name(json_file)
+            if chips and chip not in chips:
+                continue
+            json_data = self.parse_json(json_file)
+            if not json_data:
+                continue
+            for target in json_data.get("targets", []):
+                include_dirs = []
+                for option in target.get("c_compile_options", []):
+                    if option.startswith("-I"):
+                        path = option[2:].strip().strip('"').replace("${CMAKE_CURRENT_SOURCE_DIR}", str(self.root_dir))
+                        include_dirs.append(str((self.root_dir / path).resolve()))
+                sources = []
+                for dir_path in target.get("directories", []):
+                    path = self.root_dir / dir_path
+                    if path.is_file() and path.suffix in SOURCE_SUFFIXES:
+                        sources.append(str(path))
+                    elif path.is_dir():
+                        sources += [str(p) for p in sorted(path.rglob("*")) if p.suffix in SOURCE_SUFFIXES]
+                targets.append((chip, target.get("name", ""), sources, tuple(include_dirs)))
+        self.targets_memo[key] = targets
+        return targets
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+
+    def load_cache(self):
+        """Load the per-file include directives of an earlier scan"""
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r') as f:
+                try:
+                    self.files = json.load(f)
+                except json.JSONDecodeError:
+                    self.files = {}
+
+    def save_cache(self):
+        """Write the per-file include directives"""
+        os.makedirs(self.cache_file.parent, exist_ok=True)
+        with open(self.cache_file, 'w') as f:
+            json.dump(self.files, f)
+
+    def scan(self, paths):
+        """Scan every given file whose (mtime, size) changed since the cached scan, in parallel"""
+        stale = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            cached = self.files.get(path)
+            if not cached or cached[0] != stat.st_mtime_ns or cached[1] != stat.st_size:
+                stale.append((path, stat))
+        if stale:
+            with ProcessPoolExecutor(self.jobs) as pool:
+                results = pool.map(scan_includes, [p for p, _ in stale], chunksize=32)
+                for (path, stat), includes in zip(stale, results):
+                    self.files[path] = [stat.st_mtime_ns, stat.st_size, includes]
+        return len(stale)
+
+    def scan_all(self, targets):
+        """Scan all sources and, level by level, every header they reach"""
+        # A graph reused for several chips keeps what it already loaded
+        if not self.files:
+            self.load_cache()
+        pending = {source for _, _, sources, _ in targets for source in sources}
+        seen = set()
+        scanned = 0
+        while pending:
+            scanned += self.scan(sorted(pending))
+            seen |= pending
+            next_level = set()
+            for path in pending:
+                if path not in self.files:
+                    continue
+                for include_dirs in {t[3] for t in targets}:
+                    for header in self.includes_of(path, include_dirs):
+                        if header not in seen:
+                            next_level.add(header)
+            pending = next_level
+        if scanned:
+            self.save_cache()
+        return scanned
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+
+    def resolve(self, kind, name, current_dir, include_dirs):
+        """Resolve an include like the compiler: quoted ones first next to the includer, then -I paths"""
+        key = (kind, name, current_dir if kind == '"' else None, include_dirs)
+        if key not in self.resolve_memo:
+            candidates = ([current_dir] if kind == '"' else []) + list(include_dirs)
+            found = None
+            for directory in candidates:
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    found = os.path.normpath(path)
+                    break
+            self.resolve_memo[key] = found
+        return self.resolve_memo[key]
+
+    def includes_of(self, path, include_dirs):
+        """Return the resolved headers one file includes directly; system headers resolve to nothing"""
+        current_dir = os.path.dirname(path)
+        headers = []
+        for kind, name in self.files.get(path, [0, 0, []])[2]:
+            header = self.resolve(kind, name, current_dir, include_dirs)
+            if header:
+                headers.append(header)
+        return headers
+
+    def closure(self, source, include_dirs):
+        """Return every header a translation unit reaches through any chain of includes"""
+        key = (source, include_dirs)
+        if key in self.closure_memo:
+            return self.closure_memo[key]
+        reached = set()
+        stack = [source]
+        while stack:
+            for header in self.includes_of(stack.pop(), include_dirs):
+                if header not in reached:
+                    reached.add(header)
+                    stack.append(header)
+        self.closure_memo[key] = reached
+        return reached
+
+    def analyze(self, targets):
+        """Rank headers by the translation units that include them, weighted by the bytes they re-parse"""
+        # A source built with the same include paths by several targets is one translation unit
+        units = {(source, include_dirs, chip) for chip, _, sources, include_dirs in targets for source in sources}
+        fan_in = defaultdict(int)
+        chip_fan_in = defaultdict(lambda: defaultdict(int))
+        direct = defaultdict(set)
+        for source, include_dirs, chip in units:
+            for header in self.closure(source, include_dirs):
+                fan_in[header] += 1
+                chip_fan_in[chip][header] += 1
+        for path in self.files:
+            for include_dirs in {t[3] for t in targets}:
+                for header in self.includes_of(path, include_dirs):
+                    direct[header].add(path)
+
+        ranking = []
+        for header, count in fan_in.items():
+            size = self.files.get(header, [0, os.path.getsize(header)])[1]
+            ranking.append({
+                "header": os.path.relpath(header, self.root_dir),
+                "fan_in": count,
+                "direct_includers": len(direct[header]),
+                "size": size,
+                "weight": count * size,
+            })
+        ranking.sort(key=lambda r: (-r["weight"], r["header"]))
+
+        # Per chip, the share of that chip's translation units reaching each header (PCH candidates)
+        chip_units = defaultdict(int)
+        for _, _, chip in units:
+            chip_units[chip] += 1
+        chips = {}
+        for chip, counts in chip_fan_in.items():
+            chips[chip] = [{"header": os.path.relpath(h, self.root_dir), "fan_in": c,
+                            "coverage": round(c / chip_units[chip], 3)}
+                           for h, c in sorted(counts.items(), key=lambda item: (-item[1], item[0]))]
+        return {"translation_units": len(units), "headers": ranking, "chips": chips}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank headers by transitive fan-in over the config model")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                        help="SDK root directory")
+    parser.add_argument("--chip", action="append", default=None, help="only analyze this chip (repeatable)")
+    parser.add_argument("--cache", default=None, help="scan cache file (default: build/include_graph_cache.json)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="parallel scanner processes")
+    parser.add_argument("-n", "--top", type=int, default=30, help="number of headers to print")
+    parser.add_argument("--json", default=None, help="write the full ranking and per-chip fan-in as JSON")
+    args = parser.parse_args()
+
+    graph = IncludeGraph(args.root, args.cache, args.jobs)
+    targets = graph.load_targets(args.chip)
+    scanned = graph.scan_all(targets)
+    report = graph.analyze(targets)
+    print(f"{len(targets)} targets, {report['translation_units']} translation units, "
+          f"{len(report['headers'])} headers reached, {scanned} files rescanned")
+    print(f"{'weight':>12} {'fan-in':>7} {'direct':>7} {'size':>8}  header")
+    for row in report["headers"][:args.top]:
+        print(f"{row['weight']:>12} {row['fan_in']:>7} {row['direct_includers']:>7} {row['size']:>8}  {row['header']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"Generated include graph report: {args.json}")
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import glob
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Locations that hold vendored copies of the driver archives
+LIBRARY_PATTERNS = [
+    "chip/*/drivers/lib/*.a",
+    "tools/release_lib/*/*.a",
+    "tools/release_sdk_tool/config/*.a",
+]
+
+
+class LibraryStore:
+    def __init__(self, root_dir, store_dir=None, manifest=None):
+        """Initialize the library store for the SDK root directory"""
+        self.root_dir = Path(root_dir).resolve()
+        self.store_dir = Path(store_dir).absolute() if store_dir else self.root_dir / ".lib_store"
+        self.manifest_path = Path(manifest).absolute() if manifest else \
+            self.root_dir / "tools" / "release_lib" / "lib_manifest.json"
+
+    def hash_file(self, path):
+        """Return the SHA-256 of a file, read in 1 MiB chunks"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def object_path(self, digest):
+        """Return the store path of an archive with the given content hash"""
+        return self.store_dir / digest[:2] / f"{digest}.a"
+
+    def find_libraries(self):
+        """Return all vendored archives as paths relative to the SDK root"""
+        paths = set()
+        for pattern in LIBRARY_PATTERNS:
+            for path in glob.glob(str(self.root_dir / pattern)):
+                paths.add(Path(path).relative_to(self.root_dir).as_posix())
+        return sorted(paths)
+
+    def hash_libraries(self, paths):
+        """Hash the given relative paths in parallel, returning {path: digest}"""
+        with ThreadPoolExecutor() as pool:
+            digests = pool.map(lambda p: self.hash_file(self.root_dir / p), paths)
+        return dict(zip(paths, digests))
+
+    def load_manifest(self):
+        """Load the {path: digest} manifest, empty if none was written yet"""
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f).get("libraries", {})
+
+    def save_manifest(self, libraries):
+        """Write the {path: digest} manifest"""
+        os.makedirs(self.manifest_path.parent, exist_ok=True)
+        with open(self.manifest_path, 'w') as f:
+            json.dump({"libraries": dict(sorted(libraries.items()))}, f, indent=4)
+            f.write("\n")
+
+    def add_object(self, path, digest):
+        """Copy an archive into the store once per content hash"""
+        target = self.object_path(digest)
+        if not target.exists():
+            os.makedirs(target.parent, exist_ok=True)
+            tmp = target.with_suffix(".tmp")
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, target)
+            # Store objects are shared by every location, keep them read-only
+            os.chmod(target, 0o444)
+        return target
+
+    def materialize(self, rel_path, digest, mode="hardlink"):
+        """Point rel_path at the store object for digest, as a hardlink, symlink or copy"""
+        source = self.object_path(digest)
+        dest = self.root_dir / rel_path
+        os.makedirs(dest.parent, exist_ok=True)
+        if dest.exists() and not dest.is_symlink() and mode == "hardlink" and os.path.samefile(source, dest):
+            return mode
+
+        # Build the link next to the destination and rename it over, so readers never see a missing file
+        tmp = dest.with_name(f".{dest.name}.tmp")
+        if tmp.exists() or tmp.is_symlink():
+            tmp.unlink()
+        used = mode
+        if mode == "hardlink":
+            try:
+                os.link(source, tmp)
+            except OSError:
+                used = "symlink"
+        if used == "symlink":
+            try:
+                os.symlink(os.path.relpath(source, dest.parent), tmp)
+            except OSError:
+                used = "copy"
+        if used == "copy":
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, dest)
+        return used
+
+    def scan(self):
+        """Report duplicate archives and how many bytes deduplication would save"""
+        libraries = self.hash_libraries(self.find_libraries())
+        groups = {}
+        for path, digest in libraries.items():
+            groups.setdefault(digest, []).append(path)
+
+        saved = 0
+        for digest, paths in sorted(groups.items(), key=lambda item: item[1]):
+            if len(paths) < 2:
+                continue
+            size = os.path.getsize(self.root_dir / paths[0])
+            saved += size * (len(paths) - 1)
+            print(f"{digest[:12]} {size:>9} bytes x{len(paths)}: {', '.join(paths)}")
+        print(f"{len(libraries)} archives, {len(groups)} unique, {saved} bytes reclaimable")
+        return groups
+
+    def dedup(self, mode="hardlink"):
+        """Move every archive into the store and replace each location with a link to it"""
+        libraries = self.hash_libraries(self.find_libraries())
+        for path, digest in libraries.items():
+            self.add_object(self.root_dir / path, digest)
+        for path, digest in libraries.items():
+            used = self.materialize(path, digest, mode)
+            print(f"Linked {path} -> {digest[:12]} ({used})")
+        self.save_manifest(libraries)
+        print(f"Generated library manifest: {self.manifest_path}")
+        return libraries
+
+    def restore(self, mode="hardlink"):
+        """Recreate every manifest location from the store, e.g. in a fresh build container"""
+        libraries = self.load_manifest()
+        missing = [digest for digest in set(libraries.values()) if not self.object_path(digest).exists()]
+        if missing:
+            print(f"Store is missing {len(missing)} objects, run dedup on a full checkout first")
+            return False
+        for path, digest in libraries.items():
+            self.materialize(path, digest, mode)
+        print(f"Restored {len(libraries)} libraries from {self.store_dir}")
+        return True
+
+    def verify(self):
+        """Check every location and store object against its recorded hash"""
+        libraries = self.load_manifest()
+        paths = [p for p in libraries if (self.root_dir / p).exists()]
+        actual = self.hash_libraries(paths)
+
+        errors = 0
+        for path, digest in libraries.items():
+            if path not in actual:
+                print(f"Missing: {path}")
+                errors += 1
+            elif actual[path] != digest:
+                print(f"Hash mismatch: {path} is {actual[path][:12]}, expected {digest[:12]}")
+                errors += 1
+        for digest in set(libraries.values()):
+            obj = self.object_path(digest)
+            if obj.exists() and self.hash_file(obj) != digest:
+                print(f"Corrupt store object: {obj}")
+                errors += 1
+        for path in self.find_libraries():
+            if path not in libraries:
+                print(f"Not in manifest: {path}")
+        print(f"Verified {len(libraries)} libraries, {errors} errors")
+        return errors == 0
+
+    def release(self, new_lib, location, mode="hardlink"):
+        """Release a new archive: every location sharing location's old content is updated together"""
+        libraries = self.load_manifest()
+        location = Path(os.path.abspath(location)).relative_to(self.root_dir).as_posix()
+        old_digest = libraries.get(location)
+        digest = self.hash_file(new_lib)
+        self.add_object(new_lib, digest)
+
+        targets = [p for p, d in libraries.items() if d == old_digest] if old_digest else [location]
+        for path in targets:
+            self.materialize(path, digest, mode)
+            libraries[path] = digest
+            print(f"Released {path} -> {digest[:12]}")
+        self.save_manifest(libraries)
+        return targets
+
+    def prune(self):
+        """Remove store objects no manifest location refers to"""
+        referenced = set(self.load_manifest().values())
+        removed = 0
+        for obj in glob.glob(str(self.store_dir / "*" / "*.a")):
+            if Path(obj).stem not in referenced:
+                os.remove(obj)
+                removed += 1
+        print(f"Removed {removed} unreferenced store objects")
+        return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content-addressed store for the vendored driver libraries")
+    parser.add_argument("--root", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."),
+                        help="SDK root directory")
+    parser.add_argument("--store", default=None, help="store directory (default: <root>/.lib_store)")
+    parser.add_argument("--mode", choices=["hardlink", "symlink", "copy"], default="hardlink",
+                        help="how locations point at store objects")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("scan", help="report duplicate archives")
+    sub.add_parser("dedup", help="move archives into the store and link every location")
+    sub.add_parser("restore", help="recreate all locations from the store")
+    sub.add_parser("verify", help="check locations and store objects against the manifest")
+    sub.add_parser("prune", help="remove unreferenced store objects")
+    release = sub.add_parser("release", help="install a new archive at a location and all its copies")
+    release.add_argument("library", help="newly built archive")
+    release.add_argument("location", help="any location of the library being replaced")
+    args = parser.parse_args()
+
+    store = LibraryStore(args.root, args.store)
+    if args.command == "scan":
+        store.scan()
+    elif args.command == "dedup":
+        store.dedup(args.mode)
+    elif args.command == "restore":
+        sys.exit(0 if store.restore(args.mode) else 1)
+    elif args.command == "verify":
+        sys.exit(0 if store.verify() else 1)
+    elif args.command == "prune":
+        store.prune()
+    elif args.command == "release":
+        store.release(args.library, args.location, args.mode)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import argparse
+
+from fw_packer import pack_regions
+
+# Core images are placed back to back at their offsets, without sector padding or OTA trailer
+PRODUCT_LAYOUT = {"sector": 1, "ota_trailer": False}
+
+
+class ProductImage:
+    def __init__(self, name, flash_size=None):
+        """Initialize a product whose core images are placed at fixed offsets of one flash image"""
+        self.name = name
+        self.flash_size = flash_size
+        # [{"core", "offset", "path"}]
+        self.images = []
+
+    def add_image(self, core, offset, path):
+        """Place the binary of one core at a flash offset"""
+        self.images.append({"core": core, "offset": offset, "path": path})
+
+    def pack(self, output_dir):
+        """Write <name>.bin with every core image at its offset and <name>_manifest.json describing them"""
+        os.makedirs(output_dir, exist_ok=True)
+        bin_path = os.path.join(output_dir, f"{self.name}.bin")
+        regions = [{"name": image["core"], "offset": image["offset"], "path": image["path"]} for image in self.images]
+        packed = pack_regions(regions, bin_path, PRODUCT_LAYOUT, self.flash_size)
+
+        manifest = {"product": self.name, "flash_size": self.flash_size, "images": []}
+        for region in packed["regions"]:
+            manifest["images"].append({"core": region["name"], **{k: v for k, v in region.items() if k != "name"}})
+        manifest.update(size=packed["size"], crc32=packed["crc32"], sha256=packed["sha256"])
+        manifest_path = os.path.join(output_dir, f"{self.name}_manifest.json")
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=4)
+            f.write("\n")
+        print(f"Generated {self.name}.bin ({packed['size']} bytes, "
+              f"{' + '.join(i['core'] for i in manifest['images'])}) and {os.path.basename(manifest_path)}")
+        return manifest
+
+
+def parse_image(value):
+    """Parse CORE:OFFSET:PATH, the offset in any base int() accepts"""
+    core, offset, path = value.split(":", 2)
+    return core, int(offset, 0), path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the core images of a multi-core product into one flash image")
+    parser.add_argument("--name", required=True, help="product name, the stem of the output files")
+    parser.add_argument("--image", action="append", type=parse_image, required=True, metavar="CORE:OFFSET:PATH",
+                        help="core binary and its flash offset (repeatable)")
+    parser.add_argument("--flash-size", type=lambda v: int(v, 0), default=None, help="flash size to check against")
+    parser.add_argument("-o", "--output-dir", default=".", help="directory for the image and the manifest")
+    args = parser.parse_args()
+
+    product = ProductImage(args.name, args.flash_size)
+    for core, offset, path in args.image:
+        product.add_image(core, offset, path)
+    try:
+        product.pack(args.output_dir)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+import os
+import re
+import sys
+import copy
+import json
+import time
+import shlex
+import hashlib
+import argparse
+import threading
+import subprocess
+import configparser
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+TOOL_DIR = Path(__file__).resolve().parent
+ROOT_DIR = TOOL_DIR.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(TOOL_DIR.parent))
+
+import config_layers  # noqa: E402
+from instrumentation import log, span, add_arguments, configure_from_args  # noqa: E402
+from resolve_kconfig import KconfigResolver  # noqa: E402
+from lib_store import LibraryStore  # noqa: E402
+
+# Release flag name -> cfg.ini section, chip directory, cmake_configs JSON and the libraries make_lib_v*.bat builds.
+# Each library is (make lib target, toolchain, normal name under chip/<dir>/drivers/lib, name under tools/release_lib/<dir>)
+CHIPS = {
+    "B91": {"section": "B91", "chip_dir": "B91", "config": "TL_PLATFORM_SDK_B91",
+            "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver.a", "libdriver_s2.a")]},
+    "B92": {"section": "B92", "chip_dir": "B92", "config": "TL_PLATFORM_SDK_B92",
+            "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver.a", "libdriver.a")]},
+    "TL7518": {"section": "TL7518", "chip_dir": "TL7518", "config": None,
+               "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver.a", "libdriver.a")]},
+    "TL751X": {"section": "tl751x", "chip_dir": "tl751x", "config": "TL_PLATFORM_SDK_TL751X",
+               "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver_d25f.a", "libdriver_d25f.a"),
+                        ("N22_STIMER_Demo", "nds32le-elf-mculib-v5", "libdriver_n22.a", "libdriver_n22.a")]},
+    "TL753X": {"section": "tl753x", "chip_dir": "tl753x", "config": None,
+               "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver_d25f.a", "libdriver_d25f.a"),
+                        ("N22_STIMER_Demo", "nds32le-elf-mculib-v5", "libdriver_n22.a", "libdriver_n22.a")]},
+    "TL721X": {"section": "TL721X", "chip_dir": "TL721X", "config": "TL_PLATFORM_SDK_TL721X",
+               "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver.a", "libdriver.a")]},
+    "TL321X": {"section": "TL321X", "chip_dir": "TL321X", "config": "TL_PLATFORM_SDK_TL321X",
+               "libs": [("UART_Demo", "nds32le-elf-mculib-v5", "libdriver.a", "libdriver.a")]},
+    "TL322X": {"section": "tl322x", "chip_dir": "tl322x", "config": "TL_PLATFORM_SDK_TL322X",
+               "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver_d25f.a", "libdriver_d25f.a"),
+                        ("N22_STimer_Demo", "nds32le-elf-mculib-v5", "libdriver_n22.a", "libdriver_n22.a")]},
+    "W92": {"section": "W92", "chip_dir": "W92", "config": None,
+            "libs": [("UART_Demo", "nds32le-elf-mculib-v5f", "libdriver.a", "libdriver.a")]},
+}
+
+STEPS = ["mklib", "rmopt", "rmlnk", "rmfile", "tstcmp"]
+
+
+class ReleasePipeline:
+    def __init__(self, root_dir, cfg_file=None, toolchain_root=None, jobs=None, build_dir=None, compile_cmd=None):
+        """Initialize the release pipeline for the SDK root directory"""
+        self.root_dir = Path(root_dir).resolve()
+        self.cfg_file = Path(cfg_file) if cfg_file else TOOL_DIR / "config" / "cfg.ini"
+        self.toolchain_root = Path(toolchain_root) if toolchain_root else None
+        self.jobs = jobs or os.cpu_count() or 1
+        self.build_dir = Path(build_dir).absolute() if build_dir else self.root_dir / "build" / "release"
+        self.compile_cmd = compile_cmd
+        # A --compile-cmd build may rewrite the one shared build_config.h, so those run one at a time
+        self.compile_cmd_lock = threading.Lock()
+        self.lib_store = LibraryStore(self.root_dir)
+        # Chips release concurrently and share the library manifest
+        self.lib_store_lock = threading.Lock()
+        self.state_file = TOOL_DIR / "~release_state.json"
+        self.cfg = self.read_cfg()
+
+    def read_cfg(self):
+        """Read cfg.ini into {section: {key: [values]}}, keeping the key case of the .bat reader"""
+        parser = configparser.ConfigParser(interpolation=None)
+        parser.optionxform = str
+        with open(self.cfg_file, 'r', encoding="utf-8", errors="ignore") as f:
+            parser.read_file(f)
+
+        cfg = {}
+        for section in parser.sections():
+            cfg[section] = {}
+            for key, value in parser.items(section):
+                cfg[section][key] = [v.strip().replace("\\", "/") for v in value.split(",") if v.strip()]
+        return cfg
+
+    def read_bat_flags(self, bat_file=None):
+        """Return the release_*_flag and exc_*_flag values set in ReleaseSDK.bat"""
+        bat_file = bat_file or TOOL_DIR / "ReleaseSDK.bat"
+        chips, steps = [], []
+        with open(bat_file, 'r', encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                match = re.match(r'^set release_(\w+)_flag=1\s*$', line.strip())
+                if match and match.group(1) in CHIPS:
+                    chips.append(match.group(1))
+                match = re.match(r'^set exc_(\w+?)(?:_flag)?=1\s*$', line.strip())
+                if match and match.group(1) in STEPS:
+                    steps.append(match.group(1))
+        return chips, steps
+
+    def run(self, command, cwd=None):
+        """Run a command, returning (returncode, combined output)"""
+        try:
+            result = subprocess.run(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    universal_newlines=True)
+        except OSError as e:
+            return 127, str(e)
+        return result.returncode, result.stdout
+
+    # ------------------------------------------------------------------
+    # Change detection
+    # ------------------------------------------------------------------
+
+    def input_hash(self, chip):
+        """Hash everything a chip release depends on: its cfg.ini section, JSON config layers and driver sources"""
+        info = CHIPS[chip]
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.cfg.get(info["section"], {}), sort_keys=True).encode())
+        if info["config"]:
+            config = self.root_dir / "cmake_configs" / f"{info['config']}_cmake.json"
+            # A layered config also changes with its family base
+            for path in config_layers.config_files(config) if config.exists() else []:
+                digest.update(Path(path).relative_to(self.root_dir).as_posix().encode())
+                digest.update(Path(path).read_bytes())
+
+        drivers = self.root_dir / "chip" / info["chip_dir"] / "drivers"
+        outputs = {name for lib in info["libs"] for name in lib[2:]}
+        for path in sorted(drivers.rglob("*")) if drivers.exists() else []:
+            # The archives this pipeline writes are outputs, not inputs
+            if not path.is_file() or (path.parent.name == "lib" and path.name in outputs):
+                continue
+            digest.update(path.relative_to(self.root_dir).as_posix().encode())
+            digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def load_state(self):
+        """Load the per-chip input hashes of the last successful release"""
+        if not self.state_file.exists():
+            return {}
+        with open(self.state_file, 'r') as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        """Write the per-chip input hashes"""
+        with open(self.state_file, 'w') as f:
+            json.dump(state, f, indent=4, sort_keys=True)
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+
+    def load_config(self, chip):
+        """Load a chip's resolved cmake_configs JSON, or None if the chip has none in this tree
+
+        The steps edit a copy of the flat form, the resolved config is shared with every other loader.
+        """
+        if not CHIPS[chip]["config"]:
+            return None, None
+        path = self.root_dir / "cmake_configs" / f"{CHIPS[chip]['config']}_cmake.json"
+        if not path.exists():
+            return None, path
+        try:
+            return copy.deepcopy(config_layers.load_config(path)), path
+        except ValueError as e:
+            log(f"Error parsing {path}: {e}", event="error", path=path)
+            return None, path
+
+    def save_config(self, json_data, path):
+        """Write a cmake_configs JSON back in its flat form, a layered file no longer extends its family base"""
+        with open(path, 'w') as f:
+            json.dump(json_data, f, indent=4)
+            f.write("\n")
+
+    def toolchain_prefix(self, toolchain):
+        """Return the riscv32-elf- prefix for a toolchain, from --toolchain-root or else PATH"""
+        if self.toolchain_root:
+            return str(self.toolchain_root / toolchain / "bin" / "riscv32-elf-")
+        return "riscv32-elf-"
+
+    def compile_flags(self, target):
+        """Return a target's C flags with ${CMAKE_CURRENT_SOURCE_DIR} pointed at the SDK root"""
+        flags = []
+        for option in target.get("c_compile_options", []):
+            flags += shlex.split(option.replace("${CMAKE_CURRENT_SOURCE_DIR}", str(self.root_dir)))
+        return flags
+
+    def make_lib(self, chip, json_data, pool):
+        """Compile the cfg.ini 'lib' sources of every library of a chip in parallel and archive them"""
+        info = CHIPS[chip]
+        lib_dir = self.root_dir / "chip" / info["chip_dir"] / "drivers" / "lib"
+        sources = self.cfg.get(info["section"], {}).get("lib", [])
+        if not (lib_dir / "src").exists():
+            log(f"{chip}: no library sources in {lib_dir / 'src'}, keeping the shipped archives",
+                event="skipped", chip=chip)
+            return True
+        targets = {t["name"].upper(): t for t in (json_data or {}).get("targets", [])}
+
+        ok = True
+        for target_name, toolchain, normal_name, release_name in info["libs"]:
+            target = targets.get(target_name.upper())
+            if target is None:
+                log(f"{chip}: make lib target {target_name} not found, skipping {normal_name}",
+                    event="error", chip=chip)
+                ok = False
+                continue
+            prefix = self.toolchain_prefix(toolchain)
+            obj_dir = self.build_dir / info["chip_dir"] / target_name / "lib"
+            flags = self.compile_flags(target)
+
+            def compile_one(name):
+                obj = obj_dir / f"{name}.o"
+                os.makedirs(obj.parent, exist_ok=True)
+                return self.run([f"{prefix}gcc", *flags, "-c", str(lib_dir / "src" / f"{name}.c"), "-o", str(obj)])
+
+            results = list(pool.map(compile_one, sources))
+            failed = [(name, output) for name, (code, output) in zip(sources, results) if code != 0]
+            for name, output in failed:
+                log(f"{chip}: compiling {name}.c failed:\n{output}", event="error", chip=chip)
+            if failed:
+                ok = False
+                continue
+
+            archive = obj_dir / normal_name
+            if archive.exists():
+                archive.unlink()
+            code, output = self.run([f"{prefix}gcc-ar", "-crs", str(archive)] +
+                                    [str(obj_dir / f"{name}.o") for name in sources])
+            if code != 0:
+                log(f"{chip}: archiving {normal_name} failed:\n{output}", event="error", chip=chip)
+                ok = False
+                continue
+
+            release_dir = TOOL_DIR.parent / "release_lib" / info["chip_dir"]
+            self.install_library(archive, [lib_dir / normal_name, release_dir / release_name])
+            log(f"{chip}: built {normal_name} from {len(sources)} objects", event="generated", chip=chip,
+                path=lib_dir / normal_name)
+        return ok
+
+    def install_library(self, archive, dests):
+        """Put a built archive at the given locations through the library store and record it in the manifest
+
+        The locations may be hardlinks to read-only store objects, so they are replaced, never written into.
+        """
+        digest = self.lib_store.hash_file(archive)
+        with self.lib_store_lock:
+            self.lib_store.add_object(archive, digest)
+            libraries = self.lib_store.load_manifest()
+            for dest in dests:
+                rel_path = dest.relative_to(self.root_dir).as_posix()
+                self.lib_store.materialize(rel_path, digest)
+                libraries[rel_path] = digest
+            self.lib_store.save_manifest(libraries)
+
+    def remove_options(self, chip, json_data, path):
+        """Drop the cfg.ini 'rm_options' targets from the chip's JSON config"""
+        remove = {name.upper() for name in self.cfg.get(CHIPS[chip]["section"], {}).get("rm_options", [])}
+        before = len(json_data["targets"])
+        json_data["targets"] = [t for t in json_data["targets"] if t["name"].upper() not in remove]
+        self.save_config(json_data, path)
+        log(f"{chip}: removed {before - len(json_data['targets'])} compile options", event="removed", chip=chip)
+
+    def remove_links(self, chip, json_data, path):
+        """Drop directories matching the cfg.ini 'rm_links' entries from every remaining target"""
+        links = [("demo/" + link if link.startswith("vendor/") else "demo/vendor/" + link).rstrip("/")
+                 for link in self.cfg.get(CHIPS[chip]["section"], {}).get("rm_links", [])]
+        removed = 0
+        for target in json_data["targets"]:
+            kept = [d for d in target.get("directories", [])
+                    if not any(d == link or d.startswith(link + "/") for link in links)]
+            removed += len(target.get("directories", [])) - len(kept)
+            target["directories"] = kept
+        self.save_config(json_data, path)
+        log(f"{chip}: removed {removed} linked directories", event="removed", chip=chip)
+
+    def remove_files(self, chip):
+        """Delete the cfg.ini 'rm_files' entries; a name applies to the directory entry before it"""
+        base = self.root_dir
+        removed = 0
+        for entry in self.cfg.get(CHIPS[chip]["section"], {}).get("rm_files", []):
+            if entry.endswith("/"):
+                # Directory entries set the base for the following names, as in tool.bat
+                base = self.root_dir / entry.strip("/")
+                continue
+            target = base / entry.strip("/")
+            if target.is_dir():
+                for path in sorted(target.rglob("*"), reverse=True):
+                    path.rmdir() if path.is_dir() else path.unlink()
+                target.rmdir()
+                removed += 1
+            elif target.exists():
+                target.unlink()
+                removed += 1
+        log(f"{chip}: removed {removed} files", event="removed", chip=chip)
+
+    def test_compile(self, chip, json_data, pool):
+        """Configure and build every remaining demo of a chip, returning the failed ones
+
+        The CMake builds run in parallel, each demo compiles against its own build_config.h. A --compile-cmd
+        build cannot be assumed to do the same, those run one at a time across all chips.
+        """
+        kconfig_chip = "CHIP_" + config_layers.chip_name(CHIPS[chip]["config"])
+        resolver = KconfigResolver(self.root_dir)
+        demos = [t["name"] for t in json_data["targets"]]
+        demo_symbols = [name for name in resolver.symbols if name.startswith("DEMO_")]
+
+        def compile_one(demo):
+            build = self.build_dir / CHIPS[chip]["chip_dir"] / demo
+            selection = {symbol: "n" for symbol in demo_symbols}
+            selection[kconfig_chip] = "y"
+            selection[f"DEMO_{demo.upper()}"] = "y"
+            config = resolver.write_config(resolver.resolve(selection), build / ".config")
+            if self.compile_cmd:
+                command = shlex.split(self.compile_cmd.format(root=self.root_dir, chip=chip, demo=demo,
+                                                              build=build, config=config))
+                with self.compile_cmd_lock:
+                    return self.run(command)
+            code, output = self.run(["cmake", "-S", str(self.root_dir), "-B", str(build / "cmake"),
+                                     f"-DKCONFIG_CONFIG={config}"])
+            if code != 0:
+                return code, output
+            return self.run(["cmake", "--build", str(build / "cmake")])
+
+        failed = []
+        for demo, (code, output) in zip(demos, pool.map(compile_one, demos)):
+            if code != 0:
+                failed.append(demo)
+                log(f"{chip}: test compile {demo} failed:\n{output[-2000:]}", event="error", chip=chip)
+        log(f"{chip}: test compiled {len(demos) - len(failed)}/{len(demos)} demos", event="tested", chip=chip)
+        return failed
+
+    # ------------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------------
+
+    def release_chip(self, chip, steps, pool):
+        """Run the selected steps for one chip, returning True on success"""
+        start = time.time()
+        json_data, path = self.load_config(chip)
+        ok = True
+        if "mklib" in steps:
+            with span("mklib", chip=chip):
+                ok = self.make_lib(chip, json_data, pool) and ok
+        if json_data is None:
+            log(f"{chip}: no cmake_configs JSON in this tree, skipping option removal and test compile",
+                event="skipped", chip=chip)
+        else:
+            if "rmopt" in steps:
+                self.remove_options(chip, json_data, path)
+            if "rmlnk" in steps:
+                self.remove_links(chip, json_data, path)
+        if "rmfile" in steps:
+            self.remove_files(chip)
+        if "tstcmp" in steps and json_data is not None:
+            with span("tstcmp", chip=chip):
+                ok = not self.test_compile(chip, json_data, pool) and ok
+        log(f"{chip}: {'done' if ok else 'FAILED'} in {time.time() - start:.1f}s", event="done" if ok else "error",
+            chip=chip)
+        return ok
+
+    def release(self, chips, steps, force=False):
+        """Release the given chips concurrently, skipping those whose inputs are unchanged"""
+        state = self.load_state()
+        with span("input_hash"):
+            hashes = {chip: self.input_hash(chip) for chip in chips}
+        todo = [chip for chip in chips if force or state.get(chip) != hashes[chip]]
+        for chip in chips:
+            if chip not in todo:
+                log(f"{chip}: inputs unchanged since the last release, skipping", event="unchanged", chip=chip)
+
+        # One shared pool runs the compile jobs; the per-chip threads only wait on it
+        with ThreadPoolExecutor(self.jobs) as pool, ThreadPoolExecutor(max(len(todo), 1)) as chip_pool:
+            results = dict(zip(todo, chip_pool.map(lambda c: self.release_chip(c, steps, pool), todo)))
+
+        for chip, ok in results.items():
+            if ok:
+                # Hash again, the steps may have rewritten the chip's JSON config
+                state[chip] = self.input_hash(chip)
+        self.save_state(state)
+        failed = [chip for chip, ok in results.items() if not ok]
+        log(f"Released {len(results) - len(failed)}/{len(results)} chips, {len(chips) - len(todo)} unchanged",
+            event="released", released=len(results) - len(failed), failed=failed)
+        return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build driver libraries and release the SDK from config/cfg.ini")
+    parser.add_argument("--root", default=str(ROOT_DIR), help="SDK root directory")
+    parser.add_argument("--cfg", default=None, help="cfg.ini path (default: config/cfg.ini)")
+    parser.add_argument("--chips", default=None,
+                        help="comma-separated chips to release (default: release_*_flag in ReleaseSDK.bat)")
+    parser.add_argument("--steps", default=None,
+                        help=f"comma-separated steps from {','.join(STEPS)} (default: exc_* in ReleaseSDK.bat)")
+    parser.add_argument("--toolchain-root", default=None,
+                        help="directory holding nds32le-elf-mculib-v5f/ and -v5/ (default: compilers on PATH)")
+    parser.add_argument("--build-dir", default=None, help="object and test build directory")
+    parser.add_argument("--compile-cmd", default=None,
+                        help="test compile command template, with {root} {chip} {demo} {build} {config}")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="parallel compile jobs")
+    parser.add_argument("--force", action="store_true", help="release chips whose inputs are unchanged too")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    pipeline = ReleasePipeline(args.root, args.cfg, args.toolchain_root, args.jobs, args.build_dir, args.compile_cmd)
+    bat_chips, bat_steps = pipeline.read_bat_flags()
+    chips = args.chips.split(",") if args.chips else bat_chips
+    steps = args.steps.split(",") if args.steps else bat_steps
+    unknown = [c for c in chips if c not in CHIPS] + [s for s in steps if s not in STEPS]
+    if unknown:
+        parser.error(f"unknown chips or steps: {', '.join(unknown)}")
+    sys.exit(0 if pipeline.release(chips, steps, args.force) else 1)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+TOOL_DIR = Path(__file__).resolve().parent
+
+# (system, arch) -> signer binary, the same table secure_boot_tool.sh walks on every call
+SIGNERS = {
+    ("Linux", "x86"): "linux/x86/Secure_Boot_Tool_Linux",
+    ("Windows", "x86"): "windows/x86/Secure_Boot_Tool_Windows.exe",
+    ("Darwin", "x86"): "mac/x86/Secure_Boot_Tool_Mac_X64",
+    ("Darwin", "arm"): "mac/arm/Secure_Boot_Tool_Mac_AARCH64",
+}
+
+
+def detect_signer(tool_dir=TOOL_DIR):
+    """Return the signer binary for this host, or None if the host is not supported"""
+    system = platform.system()
+    if "MINGW" in system.upper() or "CYGWIN" in system.upper():
+        system = "Windows"
+    machine = platform.machine().lower()
+    arch = "arm" if machine.startswith(("arm", "aarch64")) else "x86" if "86" in machine or machine == "amd64" else machine
+    rel_path = SIGNERS.get((system, arch))
+    return Path(tool_dir) / rel_path if rel_path else None
+
+
+def stub_sign(config, input_file, output):
+    """Write a deterministic fake run descriptor, for testing the batch flow without the real signer"""
+    digest = hashlib.sha256()
+    for path in (config, input_file):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    with open(output, 'wb') as f:
+        f.write(b"TLNK" + digest.digest())
+
+
+class SecureBootBatch:
+    def __init__(self, signer=None, jobs=None, cache_file=None, timeout=None):
+        """Initialize the batch signer with the signer command, pool size and result cache"""
+        if signer is None:
+            signer = detect_signer()
+            if signer is None:
+                raise RuntimeError(f"{platform.system()}:{platform.machine()} not supported by secure boot tool")
+        self.signer = Path(signer)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache_file = Path(cache_file) if cache_file else TOOL_DIR / "~sign_cache.json"
+        self.timeout = timeout
+        self.hash_memo = {}
+
+    def hash_file(self, path):
+        """Return the SHA-256 of a file, memoized for files shared by many jobs (configs, the signer)"""
+        path = os.path.abspath(path)
+        if path not in self.hash_memo:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            self.hash_memo[path] = digest.hexdigest()
+        return self.hash_memo[path]
+
+    def load_jobs(self, jobs_file):
+        """Load jobs from a JSON list of {chip, config, input, output} or lines of 'chip input output [config]'"""
+        base = Path(jobs_file).absolute().parent
+        with open(jobs_file, 'r') as f:
+            text = f.read()
+        if text.lstrip().startswith("["):
+            entries = json.loads(text)
+        else:
+            entries = []
+            for line in text.splitlines():
+                fields = line.split("#")[0].split()
+                if fields:
+                    entries.append(dict(zip(["chip", "input", "output", "config"], fields)))
+
+        jobs = []
+        for entry in entries:
+            # Without an explicit config, use the chip's config the IDE post build step passes
+            config = entry.get("config") or TOOL_DIR / "config" / entry["chip"] / "secure_boot_tool_cfg.ini"
+            jobs.append({
+                "chip": entry["chip"],
+                "config": str(base / config),
+                "input": str(base / entry["input"]),
+                "output": str(base / entry["output"]),
+            })
+        return jobs
+
+    def load_cache(self):
+        """Load the {output: {key, output_hash}} cache of earlier runs"""
+        if not self.cache_file.exists():
+            return {}
+        with open(self.cache_file, 'r') as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return {}
+
+    def save_cache(self, cache):
+        """Write the result cache"""
+        with open(self.cache_file, 'w') as f:
+            json.dump(cache, f, indent=4, sort_keys=True)
+
+    def job_key(self, job):
+        """Return the cache key of a job: the hashes of its input, config and the signer"""
+        return "-".join(self.hash_file(p) for p in (job["input"], job["config"], self.signer))
+
+    def command(self, job):
+        """Return the signer command line for a job"""
+        args = ["--config", job["config"], "--input", job["input"], "--output", job["output"]]
+        if self.signer.suffix == ".py":
+            return [sys.executable, str(self.signer)] + args
+        return [str(self.signer)] + args
+
+    def run_job(self, job, cache):
+        """Sign one image unless the cache holds a result for the same inputs, returning a result record"""
+        start = time.time()
+        result = {"chip": job["chip"], "input": job["input"], "output": job["output"]}
+        try:
+            key = self.job_key(job)
+        except OSError as e:
+            result.update(status="failed", error=str(e), seconds=time.time() - start)
+            return result
+
+        cached = cache.get(job["output"])
+        if cached and cached["key"] == key and os.path.exists(job["output"]) \
+                and self.hash_file(job["output"]) == cached["output_hash"]:
+            result.update(status="cached", key=key, seconds=time.time() - start)
+            return result
+
+        os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+        try:
+            proc = subprocess.run(self.command(job), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  universal_newlines=True, timeout=self.timeout)
+            code, output = proc.returncode, proc.stdout
+        except subprocess.TimeoutExpired:
+            code, output = -1, f"timed out after {self.timeout}s"
+        except OSError as e:
+            code, output = -1, str(e)
+
+        if code != 0 or not os.path.exists(job["output"]):
+            result.update(status="failed", error=output.strip() or f"exit code {code}", seconds=time.time() - start)
+            return result
+        # The output was just rewritten, drop any memoized hash of an older version
+        self.hash_memo.pop(os.path.abspath(job["output"]), None)
+        result.update(status="signed", key=key, output_hash=self.hash_file(job["output"]),
+                      seconds=time.time() - start)
+        return result
+
+    def run(self, jobs):
+        """Run all jobs on a bounded worker pool and return their result records"""
+        cache = self.load_cache()
+        if self.signer.exists() and self.signer.suffix != ".py":
+            self.signer.chmod(self.signer.stat().st_mode | 0o111)
+
+        start = time.time()
+        with ThreadPoolExecutor(self.jobs) as pool:
+            results = list(pool.map(lambda job: self.run_job(job, cache), jobs))
+
+        for result in results:
+            if result["status"] == "signed":
+                cache[result["output"]] = {"key": result["key"], "output_hash": result["output_hash"]}
+            elif result["status"] == "failed":
+                cache.pop(result["output"], None)
+        self.save_cache(cache)
+
+        for result in results:
+            line = f"[{result['status']:>6}] {result['chip']:<8} {result['seconds']:6.2f}s {result['output']}"
+            print(line)
+            if result["status"] == "failed":
+                print(f"         {result['error']}")
+        counts = {status: sum(r["status"] == status for r in results) for status in ("signed", "cached", "failed")}
+        print(f"{len(results)} jobs in {time.time() - start:.2f}s: "
+              f"{counts['signed']} signed, {counts['cached']} cached, {counts['failed']} failed")
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sign many firmware images with the secure boot tool in parallel")
+    parser.add_argument("jobs_file", nargs="?", help="JSON list or 'chip input output [config]' lines")
+    parser.add_argument("--signer", default=None, help="signer executable (default: detected for this host)")
+    parser.add_argument("--stub", action="store_true", help="use the built-in stub signer instead of the real tool")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="parallel signer processes")
+    parser.add_argument("--cache", default=None, help="result cache file (default: ~sign_cache.json)")
+    parser.add_argument("--timeout", type=float, default=None, help="per-job timeout in seconds")
+    parser.add_argument("--report", default=None, help="write per-job results as JSON")
+    # Signer interface, so the stub can stand in for the real binary
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.config and args.input and args.output:
+        stub_sign(args.config, args.input, args.output)
+        sys.exit(0)
+    if not args.jobs_file:
+        parser.error("jobs_file is required")
+
+    batch = SecureBootBatch(os.path.abspath(__file__) if args.stub else args.signer, args.jobs, args.cache, args.timeout)
+    results = batch.run(batch.load_jobs(args.jobs_file))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=4)
+    sys.exit(1 if any(r["status"] == "failed" for r in results) else 0)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import glob
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+from pathlib import Path
+
+from gen_cmake import CMakeGenerator
+from gen_kconfig import KconfigGenerator
+from generate_toolchain import ToolchainGenerator
+from config_layers import config_files, chip_name as config_chip_name, chip_source_dir
+from instrumentation import log, span, add_arguments, configure_from_args
+
+# inotify event masks (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    def __init__(self, directory):
+        """Watch a directory with inotify; raises OSError where inotify is unavailable"""
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name or not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, str(directory).encode(), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Return the names of files changed within timeout seconds (empty set on timeout)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        names = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="ignore")
+            offset += length
+            if name:
+                names.add(name)
+        return names
+
+
+class PollingWatcher:
+    def __init__(self, directory, interval=1.0):
+        """Watch a directory by comparing (mtime, size) snapshots every interval seconds"""
+        self.directory = Path(directory)
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        """Return {name: (mtime_ns, size)} for the files in the directory"""
+        entries = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return entries
+
+    def wait(self, timeout):
+        """Return the names of files changed within timeout seconds (empty set on timeout)"""
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._snapshot()
+            changed = {name for name in set(current) | set(self.snapshot)
+                       if current.get(name) != self.snapshot.get(name)}
+            self.snapshot = current
+            if changed or time.monotonic() >= deadline:
+                return changed
+            time.sleep(min(self.interval, max(deadline - time.monotonic(), 0)))
+
+
+class ConfigWatcher:
+    def __init__(self, root_dir, debounce=0.3, poll=False, interval=1.0):
+        """Initialize the watcher with the project root; the config model is loaded once and kept in memory"""
+        self.root_dir = Path(root_dir).absolute()
+        self.cmake_configs_dir = self.root_dir / "cmake_configs"
+        self.debounce = debounce
+        self.cmake_generator = CMakeGenerator(self.root_dir)
+        self.model = {}
+        # config name -> the layer files it is resolved from, so a family base edit reaches every chip on it
+        self.layers = {}
+        for json_file in glob.glob(str(self.cmake_configs_dir / "*_cmake.json")):
+            json_data = self.cmake_generator.parse_json(json_file)
+            if json_data:
+                self.model[os.path.basename(json_file)] = json_data
+                self.layers[os.path.basename(json_file)] = config_files(json_file)
+
+        self.watcher = None
+        if not poll:
+            try:
+                self.watcher = InotifyWatcher(self.cmake_configs_dir)
+            except OSError as e:
+                log(f"inotify unavailable ({e}), falling back to polling", event="warning")
+        if self.watcher is None:
+            self.watcher = PollingWatcher(self.cmake_configs_dir, interval)
+
+    def diff(self, old, new):
+        """Compare two versions of a JSON config at target level: (added, removed, changed, meta_changed)"""
+        old_targets = {t.get("name"): t for t in (old or {}).get("targets", [])}
+        new_targets = {t.get("name"): t for t in (new or {}).get("targets", [])}
+        added = [name for name in new_targets if name not in old_targets]
+        removed = [name for name in old_targets if name not in new_targets]
+        changed = [name for name in new_targets if name in old_targets and new_targets[name] != old_targets[name]]
+        meta = lambda data: {k: v for k, v in (data or {}).items() if k != "targets"}
+        return added, removed, changed, meta(old) != meta(new)
+
+    def apply(self, names):
+        """Reload the changed JSON files and re-emit only the outputs their changes affect"""
+        regenerate_kconfig = False
+        regenerate_toolchain = False
+        names = set(names)
+        for name in list(names):
+            if name.endswith(".json") and not name.endswith("_cmake.json"):
+                layer = str(self.cmake_configs_dir / name)
+                names |= {config for config, files in self.layers.items() if layer in files}
+        for name in sorted(names):
+            if not name.endswith("_cmake.json"):
+                continue
+            json_path = self.cmake_configs_dir / name
+            chip_name = config_chip_name(name)
+            old = self.model.get(name)
+            if json_path.exists():
+                new = self.cmake_generator.parse_json(json_path)
+                if new is None:
+                    # Half-saved file, keep the last good model and wait for the next write
+                    continue
+            else:
+                new = None
+
+            added, removed, changed, meta_changed = self.diff(old, new)
+            if not (added or removed or changed or meta_changed):
+                continue
+            log(f"{name}: {len(added)} added, {len(removed)} removed, {len(changed)} changed targets",
+                event="info", path=json_path)
+
+            if new is None:
+                del self.model[name]
+                self.layers.pop(name, None)
+            else:
+                self.model[name] = new
+                self.layers[name] = config_files(json_path)
+                targets = {t.get("name"): t for t in new.get("targets", [])}
+                for target_name in added + changed:
+                    self.cmake_generator.generate_demo_cmakelists(targets[target_name], chip_name, force=True)
+                # Source directory and PCH flag groups depend on every target of the chip
+                self.cmake_generator.generate_chip_specific_cmake(
+                    chip_name, chip_source_dir(new, chip_name), new)
+            for target_name in removed:
+                log(f"Target {target_name} removed, its demo CMakeLists.txt is left in place", event="warning",
+                    path=json_path)
+
+            # The demo and chip lists in Kconfig only change with the set of targets or files
+            regenerate_kconfig |= bool(added or removed) or old is None or new is None
+            regenerate_toolchain |= old is None or new is None
+
+        if regenerate_kconfig:
+            kconfig_generator = KconfigGenerator(self.root_dir)
+            kconfig_generator.generate_chip_kconfig()
+            kconfig_generator.generate_demo_kconfig()
+            kconfig_generator.generate_kconfig_cmake()
+        if regenerate_toolchain:
+            ToolchainGenerator(self.root_dir).generate_all()
+
+    def run(self):
+        """Wait for edits, collect each burst until it has been quiet for the debounce time, then apply it"""
+        log(f"Watching {self.cmake_configs_dir} ({type(self.watcher).__name__}), Ctrl+C to stop", event="info",
+            path=self.cmake_configs_dir)
+        try:
+            while True:
+                names = self.watcher.wait(3600)
+                if not names:
+                    continue
+                while True:
+                    more = self.watcher.wait(self.debounce)
+                    if not more:
+                        break
+                    names |= more
+                start = time.monotonic()
+                with span("regenerate"):
+                    self.apply(names)
+                log(f"Regenerated in {time.monotonic() - start:.2f}s", event="info", files=sorted(names))
+        except KeyboardInterrupt:
+            log("Stopped watching", event="info")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch cmake_configs/*.json and regenerate only the affected files")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    parser.add_argument("--interval", type=float, default=1.0, help="polling interval in seconds")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="quiet time in seconds that ends a burst of edits")
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    ConfigWatcher(os.getcwd(), args.debounce, args.poll, args.interval).run()